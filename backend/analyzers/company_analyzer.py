@@ -9,14 +9,30 @@ Date: February 25, 2025
 """
 
 import anthropic
-import requests
+import hashlib
 import json
+import logging
 import os
 import time
 import re
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Dict, List, Any, Generator, Iterator, Optional, Tuple, Union
+
+from utils.case_study_index import FUNCTION_QUERIES, CaseStudyIndex, query_text
+from utils.case_study_store import get_case_study_store
+from utils.content_extraction import chunk_pages, pack_pages
+from utils.json_stream import IncrementalJSONParser, finish_json_response, parse_json_response
+from utils.metrics import record_claude_call, record_parse_failure
+from utils.page_cache import PageCache
+from utils.result_cache import ResultCache, make_cache_key, normalize_text, normalize_url
+from utils.single_flight import SingleFlight
+from utils.site_crawler import SiteCrawler, format_pages
+from utils.template_registry import PromptTemplate, get_template_registry
+from utils.tracing import add_timing, in_context, span
+from utils.use_case_roi import apply_use_case_roi
+
+logger = logging.getLogger(__name__)
 
 
 class CompanyAnalyzer:
@@ -25,6 +41,28 @@ class CompanyAnalyzer:
     information for use case matching and ROI calculation.
     """
     
+    # Model used for all analysis calls (part of every result cache key)
+    MODEL = "claude-sonnet-4-20250514"
+    # Cheaper model for the per-chunk notes of very large websites
+    CHUNK_MODEL = "claude-3-5-haiku-20241022"
+    # How often a stream waiting on an identical in-flight analysis sends a keep-alive
+    STREAM_KEEPALIVE_SECONDS = 10.0
+    
+    # Standardized industries (GICS-based)
+    STANDARDIZED_INDUSTRIES = [
+        "Information Technology",
+        "Health Care", 
+        "Financials",
+        "Consumer Discretionary",
+        "Communication Services",
+        "Industrials",
+        "Consumer Staples",
+        "Energy",
+        "Utilities",
+        "Real Estate",
+        "Materials"
+    ]
+    
     def __init__(self, api_key=None):
         """
         Initialize the analyzer with API key and load templates
@@ -42,315 +80,239 @@ class CompanyAnalyzer:
             print("Using alternate client initialization method...")
             self.client = anthropic.Client(api_key=self.api_key)
         
-        self.templates_dir = os.path.join(os.path.dirname(__file__), "..", "data", "templates")
-        
-        # Ensure templates directory exists
-        os.makedirs(self.templates_dir, exist_ok=True)
-        
-        # Create prompt templates if they don't exist yet
-        self._ensure_prompt_templates()
+        # Prompt templates, loaded and validated once and reloaded when edited;
+        # fails here rather than on the first request if one is broken
+        self.templates = get_template_registry()
+        self.templates.snapshot()
+        
+        # Shared in-memory case study corpus (loaded once per process)
+        self.case_study_store = get_case_study_store()
+        
+        # Case studies sent per business function; 0 sends the full corpus.
+        # Off by default: the full corpus is one cached prompt prefix, while a
+        # per-request selection is sent uncached at the full input price
+        self.case_study_top_k = int(os.environ.get("CASE_STUDY_TOP_K", 0))
+        
+        # Concurrent per-function calls in fan-out mode, each with that
+        # function's top case studies (the full corpus in every call would
+        # cost far more than the one combined call)
+        self.fanout_workers = int(os.environ.get("FANOUT_WORKERS", 9))
+        self.fanout_case_study_top_k = int(os.environ.get("FANOUT_CASE_STUDY_TOP_K", 8))
+        
+        # Disk cache of crawled pages; PAGE_CACHE_TTL=0 disables it
+        page_cache = None
+        page_cache_ttl = float(os.environ.get("PAGE_CACHE_TTL", 24 * 3600))
+        if page_cache_ttl > 0:
+            try:
+                page_cache = PageCache(
+                    os.environ.get("PAGE_CACHE_PATH") or None,
+                    ttl_seconds=page_cache_ttl,
+                    max_bytes=int(float(os.environ.get("PAGE_CACHE_MAX_MB", 50)) * 1024 * 1024)
+                )
+            except Exception as e:
+                logger.warning(f"Page cache disabled: {e}")
+        
+        # Pooled website crawler: page cap and total deadline per site
+        self.crawler = SiteCrawler(
+            max_pages=int(os.environ.get("CRAWL_MAX_PAGES", 5)),
+            deadline_seconds=float(os.environ.get("CRAWL_DEADLINE", 20)),
+            cache=page_cache,
+            max_bytes=int(float(os.environ.get("CRAWL_MAX_KB", 2048)) * 1024),
+            extract_processes=int(os.environ.get("CRAWL_EXTRACT_PROCESSES", 2))
+        )
+        
+        # Input tokens of website text sent to Claude per analysis
+        self.content_token_budget = int(os.environ.get("CONTENT_TOKEN_BUDGET", 6000))
+        
+        # Sites with more than WEBSITE_MAP_REDUCE_RATIO x the budget of text are
+        # read in up to WEBSITE_MAX_CHUNKS concurrent chunks, then merged. The
+        # chunk calls roughly double the cost of the analysis, so this is only
+        # worth it when packing would keep a small share of the site
+        self.map_reduce_ratio = float(os.environ.get("WEBSITE_MAP_REDUCE_RATIO", 4))
+        self.map_reduce_chunks = int(os.environ.get("WEBSITE_MAX_CHUNKS", 6))
+        
+        # Coalesces identical analyses that are running at the same time
+        self.single_flight = SingleFlight()
+        
+        # Persistent cache of finished analyses; RESULT_CACHE_TTL=0 disables it
+        self.result_cache = None
+        cache_ttl = float(os.environ.get("RESULT_CACHE_TTL", 7 * 24 * 3600))
+        if cache_ttl > 0:
+            try:
+                self.result_cache = ResultCache(
+                    os.environ.get("RESULT_CACHE_PATH") or None,
+                    max_entries=int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 1000)),
+                    ttl_seconds=cache_ttl
+                )
+            except Exception as e:
+                logger.warning(f"Result cache disabled: {e}")
     
-    def _ensure_prompt_templates(self):
+    def _cached_prompt_content(self, cached_prompt: str, dynamic_prompt: str,
+                               uncached_prompt: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Create prompt templates if they don't exist
+        Build user message content with the static prefix marked for prompt caching.
+        An optional uncached block (e.g. a per-request case study selection) goes
+        between the cached prefix and the company-specific part.
         """
-        website_prompt_path = os.path.join(self.templates_dir, "company_website_prompt.txt")
-        description_prompt_path = os.path.join(self.templates_dir, "company_description_prompt.txt")
-        
-        if not os.path.exists(website_prompt_path):
-            with open(website_prompt_path, "w") as f:
-                f.write(self._get_default_website_prompt())
+        content = [{"type": "text", "text": cached_prompt, "cache_control": {"type": "ephemeral"}}]
+        if uncached_prompt:
+            content.append({"type": "text", "text": uncached_prompt})
+        content.append({"type": "text", "text": dynamic_prompt})
+        return content
+    
+    def _select_case_studies(self, query: Any, functions: Optional[Dict[str, str]] = None,
+                             top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the case studies to put in a prompt: the top-k per business function
+        (all 9, or just those in functions) from the retrieval index, or the full
+        corpus when retrieval is disabled (top_k <= 0), the query is empty or
+        nothing matches. top_k defaults to CASE_STUDY_TOP_K.
+        """
+        if top_k is None:
+            top_k = self.case_study_top_k
+        snapshot = self.case_study_store.snapshot()
+        text = query_text(query).strip()
+        if top_k <= 0 or not text:
+            return snapshot.case_studies
+        
+        index = snapshot.derived("bm25_index", lambda snap: CaseStudyIndex(snap.case_studies))
+        selected = index.select_for_functions(text, top_k, functions)
+        if not selected or len(selected) >= len(snapshot.case_studies):
+            return snapshot.case_studies
+        
+        logger.info(f"Selected {len(selected)} of {len(snapshot.case_studies)} case studies for the prompt")
+        return selected
+    
+    def _static_prompt_blocks(self, kind: str, rules_prompt: str, case_studies: List[Dict[str, Any]],
+                              build_case_studies) -> Tuple[str, Optional[str]]:
+        """
+        Return (cached prefix, uncached case study block) for a prompt.
         
-        if not os.path.exists(description_prompt_path):
-            with open(description_prompt_path, "w") as f:
-                f.write(self._get_default_description_prompt())
+        With the full corpus, rules and case studies form one cached prefix that is
+        built once per snapshot, so every request sends a byte-identical prefix.
+        With a retrieved subset only the rules are cached and the case studies
+        follow as a separate uncached block; the rules alone can fall below the
+        minimum cacheable prompt length, in which case nothing is cached.
+        """
+        try:
+            snapshot = self.case_study_store.snapshot()
+        except Exception:
+            snapshot = None
+        if snapshot is not None and case_studies is snapshot.case_studies:
+            cached = snapshot.derived(f"static_prompt:{kind}", lambda snap: rules_prompt + build_case_studies(snap.case_studies))
+            return cached, None
+        if snapshot is None or not case_studies:
+            return rules_prompt + build_case_studies(case_studies), None
+        return rules_prompt, build_case_studies(case_studies)
     
-    def _get_default_website_prompt(self) -> str:
+    def _create_message(self, operation: str, **kwargs) -> Any:
         """
-        Returns default prompt for analyzing company websites
+        Send a Claude request with messages.create and return the message,
+        recording latency, token usage and cost. Time to first token is only
+        recorded by the streaming analysis, which reads the stream anyway.
         """
-        return """# Company Website Analysis
-
-You are an expert business analyst tasked with analyzing a company's website to extract information for potential AI implementation opportunities. Analyze the provided website content to identify key business characteristics.
-
-## Instructions
-Analyze the HTML content below and extract the following information:
-
-1. Company Information:
-   - Company name
-   - Industry (be specific and use standardized categories)
-   - Approximate company size (SMB, Mid-Market, Enterprise based on clues)
-   - Geographic focus (global, regional, specific markets)
-   - Founded year (if mentioned)
-
-2. Business Focus:
-   - Primary products or services
-   - Target customer segments
-   - Value proposition
-   - Key differentiators
-
-3. Technical Infrastructure Indicators:
-   - Technologies mentioned
-   - Digital maturity indicators
-   - Current automation level
-   - Integration capabilities mentioned
-
-4. Business Challenges:
-   - Pain points mentioned
-   - Scaling challenges
-   - Efficiency issues
-   - Customer experience challenges
-   - Market challenges
-
-5. AI Implementation Opportunities:
-   - Content generation needs
-   - Customer service optimization
-   - Data analysis requirements
-   - Document processing volume
-   - Research and information needs
-   - Other potential Claude use cases
-
-## Format Requirements
-Return a JSON object with the structure below. Include confidence scores (1-5) for each section based on the information available. Provide "Not found" when information isn't available. Be factual and don't hallucinate information not present in the content.
-
-```json
-{
-  "companyInfo": {
-    "name": "Company name",
-    "industry": {
-      "primary": "Primary industry",
-      "secondary": ["Additional sector 1", "Additional sector 2"],
-      "confidence": 4
-    },
-    "size": {
-      "category": "SMB/Mid-Market/Enterprise",
-      "employeeEstimate": "Approximate number if mentioned",
-      "signals": ["Signal 1", "Signal 2"],
-      "confidence": 3
-    },
-    "geography": {
-      "headquarters": "HQ location",
-      "markets": ["Market 1", "Market 2"],
-      "confidence": 4
-    },
-    "founded": "Year",
-    "companyDescription": "Concise company description"
-  },
-  "businessFocus": {
-    "products": ["Product 1", "Product 2"],
-    "services": ["Service 1", "Service 2"],
-    "targetCustomers": ["Customer segment 1", "Customer segment 2"],
-    "valueProposition": "Core value proposition",
-    "differentiators": ["Differentiator 1", "Differentiator 2"],
-    "confidence": 4
-  },
-  "technicalProfile": {
-    "technologies": ["Technology 1", "Technology 2"],
-    "digitalMaturity": "Low/Medium/High",
-    "automationLevel": "Low/Medium/High",
-    "integrations": ["Integration 1", "Integration 2"],
-    "confidence": 3
-  },
-  "businessChallenges": {
-    "explicitChallenges": ["Challenge 1", "Challenge 2"],
-    "impliedChallenges": ["Implied challenge 1", "Implied challenge 2"],
-    "confidence": 3
-  },
-  "aiOpportunities": {
-    "contentGeneration": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    },
-    "customerService": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    },
-    "dataAnalysis": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    },
-    "documentProcessing": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    },
-    "researchNeeds": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    }
-  },
-  "analysisMetadata": {
-    "source": "Website URL",
-    "contentQuality": "Assessment of how much useful information was available",
-    "analysisDate": "Current date",
-    "overallConfidence": 3
-  }
-}
-```
-
-Website URL: {url}
-Content:
-{content}
-"""
+        model = kwargs.get("model", "")
+        start = time.perf_counter()
+        try:
+            with span("claude", operation=operation, model=model):
+                response = self.client.messages.create(**kwargs)
+        except Exception:
+            record_claude_call(model, operation, time.perf_counter() - start, outcome="error")
+            raise
+        record_claude_call(model, operation, time.perf_counter() - start, response)
+        return response
     
-    def _get_default_description_prompt(self) -> str:
+    def _template_version(self, *parts: str) -> str:
         """
-        Returns default prompt for analyzing company descriptions
+        Short content hash identifying a prompt template version
         """
-        return """# Company Description Analysis
-
-You are an expert business analyst tasked with analyzing a company's description to extract information for potential AI implementation opportunities. Analyze the provided description to identify key business characteristics.
-
-## Instructions
-Analyze the text description below and extract the following information:
-
-1. Company Information:
-   - Company name
-   - Industry (be specific and use standardized categories)
-   - Approximate company size (SMB, Mid-Market, Enterprise based on clues)
-   - Geographic focus (global, regional, specific markets)
-   - Founded year (if mentioned)
-
-2. Business Focus:
-   - Primary products or services
-   - Target customer segments
-   - Value proposition
-   - Key differentiators
-
-3. Technical Infrastructure Indicators:
-   - Technologies mentioned
-   - Digital maturity indicators
-   - Current automation level
-   - Integration capabilities mentioned
-
-4. Business Challenges:
-   - Pain points mentioned
-   - Scaling challenges
-   - Efficiency issues
-   - Customer experience challenges
-   - Market challenges
-
-5. AI Implementation Opportunities:
-   - Content generation needs
-   - Customer service optimization
-   - Data analysis requirements
-   - Document processing volume
-   - Research and information needs
-   - Other potential Claude use cases
-
-## Format Requirements
-Return a JSON object with the structure below. Include confidence scores (1-5) for each section based on the information available. Provide "Not found" when information isn't available. Be factual and don't hallucinate information not present in the description.
-
-```json
-{
-  "companyInfo": {
-    "name": "Company name",
-    "industry": {
-      "primary": "Primary industry",
-      "secondary": ["Additional sector 1", "Additional sector 2"],
-      "confidence": 4
-    },
-    "size": {
-      "category": "SMB/Mid-Market/Enterprise",
-      "employeeEstimate": "Approximate number if mentioned",
-      "signals": ["Signal 1", "Signal 2"],
-      "confidence": 3
-    },
-    "geography": {
-      "headquarters": "HQ location",
-      "markets": ["Market 1", "Market 2"],
-      "confidence": 4
-    },
-    "founded": "Year",
-    "companyDescription": "Concise company description"
-  },
-  "businessFocus": {
-    "products": ["Product 1", "Product 2"],
-    "services": ["Service 1", "Service 2"],
-    "targetCustomers": ["Customer segment 1", "Customer segment 2"],
-    "valueProposition": "Core value proposition",
-    "differentiators": ["Differentiator 1", "Differentiator 2"],
-    "confidence": 4
-  },
-  "technicalProfile": {
-    "technologies": ["Technology 1", "Technology 2"],
-    "digitalMaturity": "Low/Medium/High",
-    "automationLevel": "Low/Medium/High",
-    "integrations": ["Integration 1", "Integration 2"],
-    "confidence": 3
-  },
-  "businessChallenges": {
-    "explicitChallenges": ["Challenge 1", "Challenge 2"],
-    "impliedChallenges": ["Implied challenge 1", "Implied challenge 2"],
-    "confidence": 3
-  },
-  "aiOpportunities": {
-    "contentGeneration": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    },
-    "customerService": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    },
-    "dataAnalysis": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    },
-    "documentProcessing": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    },
-    "researchNeeds": {
-      "potential": "Low/Medium/High",
-      "specificUses": ["Use 1", "Use 2"],
-      "confidence": 3
-    }
-  },
-  "analysisMetadata": {
-    "source": "Company description",
-    "contentQuality": "Assessment of how much useful information was available",
-    "analysisDate": "Current date",
-    "overallConfidence": 3
-  }
-}
-```
-
-Company Description:
-{description}
-"""
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:12]
     
-    def analyze_website(self, url: str) -> Dict[str, Any]:
+    def _cached_result(self, key_parts: Dict[str, Any], compute, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Serve a result from the persistent result cache, or compute and store it.
+        With refresh=True the lookup is skipped but the fresh result is stored.
+        Error and truncated results are never cached.
+        
+        Identical requests that miss the cache while one is already running wait
+        for that call instead of starting another Claude request.
+        """
+        key = make_cache_key(key_parts)
+        if self.result_cache is not None and not refresh:
+            with span("cache_lookup"):
+                cached = self.result_cache.get(key)
+            if cached is not None:
+                print(f"Result cache hit for {key_parts.get('operation')}")
+                return cached
+        
+        def compute_and_store():
+            result = compute()
+            if self._cacheable(result):
+                self.result_cache.set(key, result)
+            return result
+        
+        result, shared = self.single_flight.do(key, compute_and_store)
+        if shared:
+            print(f"Joined in-flight {key_parts.get('operation')} request")
+        return result
+    
+    def _cacheable(self, result: Any) -> bool:
+        return (self.result_cache is not None and isinstance(result, dict)
+                and "error" not in result and not result.get("truncated")
+                and not result.get("failedFunctions"))
+    
+    def analyze_website(self, url: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Analyze a company website to extract business information
         """
+        prompt_template = self.templates.get("company_website_prompt.txt")
+        
+        key_parts = {
+            "operation": "analyze_website",
+            "url": normalize_url(url),
+            "model": self.MODEL,
+            "templateVersion": prompt_template.version,
+            "contentTokenBudget": self.content_token_budget,
+            "mapReduce": [self.map_reduce_ratio, self.map_reduce_chunks]
+        }
+        return self._cached_result(key_parts, lambda: self._analyze_website(url, prompt_template), refresh)
+    
+    def _analyze_website(self, url: str, prompt_template: PromptTemplate) -> Dict[str, Any]:
+        """
+        Scrape a website and analyze it with Claude (uncached)
+        """
         # Scrape the website content
-        content = self._scrape_website(url)
-        if not content:
+        with span("scrape", url=url):
+            pages = self._scrape_website(url)
+        if not pages:
             raise ValueError(f"Failed to retrieve content from {url}")
         
-        # Load the prompt template
-        prompt_path = os.path.join(self.templates_dir, "company_website_prompt.txt")
-        with open(prompt_path, "r") as f:
-            prompt_template = f.read()
+        # Keep the most informative paragraphs that fit the token budget
+        with span("pack_content"):
+            packed, content_stats = pack_pages(pages, self.content_token_budget)
+        print(f"Website content: kept {content_stats['selectedParagraphs']}/{content_stats['paragraphs']} paragraphs, "
+              f"~{content_stats['selectedTokens']} of ~{content_stats['totalTokens']} tokens")
+        
+        content = None
+        if (self.map_reduce_chunks > 1
+                and content_stats["totalTokens"] > self.content_token_budget * self.map_reduce_ratio):
+            # Far too much to pack: read the site in chunks and merge the notes
+            with span("map_chunks"):
+                content = self._map_website_chunks(url, pages)
+        if content is None:
+            content = format_pages(packed)
         
         # Format the prompt with the website content
-        prompt = prompt_template.format(url=url, content=content[:50000])  # Limit content to 50k chars
+        with span("prompt"):
+            prompt = prompt_template.format(url=url, content=content)
         
         # Process with Claude
         print(f"Analyzing website: {url}")
         try:
             # Try the newer API format first
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = self._create_message(
+                "analyze_website",
+                model=self.MODEL,
                 max_tokens=2000,
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -367,58 +329,51 @@ Company Description:
         try:
             # For newer API
             result = response.content[0].text
-            
-            # Print token usage
-            print(f"Token usage:")
-            print(f"Input tokens: {response.usage.input_tokens}")
-            print(f"Output tokens: {response.usage.output_tokens}")
-            print(f"Total tokens: {response.usage.input_tokens + response.usage.output_tokens}")
-            print(f"Estimated cost: ${(response.usage.input_tokens * 0.000003) + (response.usage.output_tokens * 0.000015):.4f}")
         except AttributeError:
             # For older API
             result = response.completion
             print("Token usage data not available in this API version")
         
         try:
-            # Clean the result in case it has markdown code blocks
-            cleaned_result = result.strip()
-            
-            # Find JSON block in the response
-            if "```json" in cleaned_result:
-                start_idx = cleaned_result.find("```json") + 7
-                end_idx = cleaned_result.find("```", start_idx)
-                if end_idx != -1:
-                    cleaned_result = cleaned_result[start_idx:end_idx].strip()
-            elif cleaned_result.startswith("```json"):
-                cleaned_result = cleaned_result[7:]
-                if cleaned_result.endswith("```"):
-                    cleaned_result = cleaned_result[:-3]
-            
-            analysis = json.loads(cleaned_result.strip())
+            # Skips markdown fences or prose around the JSON object
+            with span("parse"):
+                analysis, _ = parse_json_response(result, allow_truncated=False)
             return analysis
         except json.JSONDecodeError as e:
+            record_parse_failure("analyze_website")
             print(f"Failed to parse analysis as JSON: {e}")
             print("Raw response:", result)
             raise
     
-    def analyze_description(self, description: str) -> Dict[str, Any]:
+    def analyze_description(self, description: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Analyze a company description to extract business information
         """
-        # Load the prompt template
-        prompt_path = os.path.join(self.templates_dir, "company_description_prompt.txt")
-        with open(prompt_path, "r") as f:
-            prompt_template = f.read()
+        prompt_template = self.templates.get("company_description_prompt.txt")
         
+        key_parts = {
+            "operation": "analyze_description",
+            "description": normalize_text(description),
+            "model": self.MODEL,
+            "templateVersion": prompt_template.version
+        }
+        return self._cached_result(key_parts, lambda: self._analyze_description(description, prompt_template), refresh)
+    
+    def _analyze_description(self, description: str, prompt_template: PromptTemplate) -> Dict[str, Any]:
+        """
+        Analyze a company description with Claude (uncached)
+        """
         # Format the prompt with the company description
-        prompt = prompt_template.format(description=description)
+        with span("prompt"):
+            prompt = prompt_template.format(description=description)
         
         # Process with Claude
         print(f"Analyzing company description")
         try:
             # Try the newer API format first
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = self._create_message(
+                "analyze_description",
+                model=self.MODEL,
                 max_tokens=2000,
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -435,82 +390,42 @@ Company Description:
         try:
             # For newer API
             result = response.content[0].text
-            
-            # Print token usage
-            print(f"Token usage:")
-            print(f"Input tokens: {response.usage.input_tokens}")
-            print(f"Output tokens: {response.usage.output_tokens}")
-            print(f"Total tokens: {response.usage.input_tokens + response.usage.output_tokens}")
-            print(f"Estimated cost: ${(response.usage.input_tokens * 0.000003) + (response.usage.output_tokens * 0.000015):.4f}")
         except AttributeError:
             # For older API
             result = response.completion
             print("Token usage data not available in this API version")
         
         try:
-            # Clean the result in case it has markdown code blocks
-            cleaned_result = result.strip()
-            
-            # Find JSON block in the response
-            if "```json" in cleaned_result:
-                start_idx = cleaned_result.find("```json") + 7
-                end_idx = cleaned_result.find("```", start_idx)
-                if end_idx != -1:
-                    cleaned_result = cleaned_result[start_idx:end_idx].strip()
-            elif cleaned_result.startswith("```json"):
-                cleaned_result = cleaned_result[7:]
-                if cleaned_result.endswith("```"):
-                    cleaned_result = cleaned_result[:-3]
-            
-            analysis = json.loads(cleaned_result.strip())
+            # Skips markdown fences or prose around the JSON object
+            with span("parse"):
+                analysis, _ = parse_json_response(result, allow_truncated=False)
             return analysis
         except json.JSONDecodeError as e:
+            record_parse_failure("analyze_description")
             print(f"Failed to parse analysis as JSON: {e}")
             print("Raw response:", result[:500] + "...")
             raise
     
-    def match_use_cases(self, company_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_matching_case_studies_prompt(self, case_studies: List[Dict[str, Any]]) -> str:
         """
-        Match company analysis to potential Claude use cases with confidence scores
-        and provide role-specific recommendations based on case studies.
+        Case study section of the use case matching prompt
         """
-        # Load enhanced case studies with business functions
-        enhanced_path = os.path.join(os.path.dirname(__file__), "..", "data", "case_studies", "all_120_case_studies.json")
-        try:
-            with open(enhanced_path, "r") as f:
-                case_studies_with_functions = json.load(f)
-            print(f"Loaded {len(case_studies_with_functions)} enhanced case studies")
-        except Exception as e:
-            print(f"Error loading enhanced case studies: {e}")
-            case_studies_with_functions = []
-        
-        # Define standardized business functions based on practical company organization
-        standardized_functions = [
-            "Executive/Leadership",  # C-suite, VPs, Directors
-            "Sales & Marketing",     # Sales, Marketing, Customer Success, BD
-            "Product & Engineering", # Product Management, Software Development, QA
-            "Operations",           # Operations, Supply Chain, Procurement, Facilities
-            "Finance & Accounting", # Finance, Accounting, FP&A, Treasury
-            "Human Resources",      # HR, Recruiting, L&D, Compensation
-            "Legal & Compliance",   # Legal, Compliance, Risk, IP
-            "Customer Support",     # Support, Success, Implementation
-            "Research & Development", # R&D, Innovation, Strategy
-            "Information Technology" # IT, Security, Infrastructure, Data
-        ]
-        
-        # Create a matching prompt with evidence-based approach
-        matching_prompt = f"""
-        You are an AI implementation expert tasked with recommending Claude AI use cases based on real-world evidence.
-        
-        ## Company Analysis
-        ```json
-        {json.dumps(company_analysis, indent=2)}
-        ```
-        
+        return f"""
         ## Available Case Studies with Business Functions
         ```json
-        {json.dumps(case_studies_with_functions, indent=2)}
+        {json.dumps(case_studies, indent=2)}
         ```
+        """
+    
+    def _build_matching_rules_prompt(self) -> str:
+        """
+        Static rules of the use case matching prompt: standardized business
+        functions, instructions and output structure. Contains nothing
+        company-specific.
+        """
+        return """
+        You are an AI implementation expert tasked with recommending Claude AI use cases based on real-world evidence.
+        The case studies and the company analysis you are matching are provided after these instructions.
         
         ## Standardized Business Functions
         Use ONLY these business functions (with their typical roles):
@@ -532,15 +447,6 @@ Company Description:
         - Mention the SPECIFIC task or process improved (e.g. "automated tier-1 support tickets")
         - Use action verbs (reduced, saved, automated, accelerated, etc.)
         
-        CRITICAL INFORMATION FROM COMPANY ANALYSIS:
-        Company location: """ + str(company_analysis.get('companyInfo', {}).get('geography', {}).get('headquarters', 'Unknown')) + """
-        Total employees: """ + str(company_analysis.get('employeeRoles', {}).get('totalEmployees', {}).get('count', 0)) + """
-        
-        DEBUG - Geography info: """ + str(company_analysis.get('companyInfo', {}).get('geography', {})) + """
-        
-        ROLE DISTRIBUTION:
-        """ + "\n        ".join([f"- {r['role']}: {r['count']} employees" for r in company_analysis.get('employeeRoles', {}).get('roleDistribution', [])]) + """
-        
         IMPORTANT INSTRUCTIONS:
         1. Map the company's employee roles to the standardized business functions above
         2. YOU MUST include ALL 9 business functions for every company (Executive/Leadership, Sales, Marketing, Product & Engineering, Operations, Finance & Accounting, Human Resources, Legal & Compliance, Customer Support).
@@ -586,16 +492,16 @@ Company Description:
         - Customer Support
         
         Example structure (you must include ALL 9, not just this one):
-        {{
+        {
           "businessFunctions": [
-            {{
+            {
               "id": "customer_support",
               "name": "Customer Support",
               "totalEmployees": 150,
               "relevanceScore": 95,
               "whyRelevant": "You have 150 customer service reps handling high inquiry volume who could benefit from AI automation",
               "useCases": [
-                {{
+                {
                   "id": "ai_support_agent",
                   "name": "AI Support Agent",
                   "description": "Automated first-line support for common customer queries",
@@ -610,8 +516,8 @@ Company Description:
                     // MUST be real companies from the case studies list
                     // NO FAKE COMPANIES
                   ]
-                }},
-                {{
+                },
+                {
                   "id": "response_drafting",
                   "name": "Customer Response Drafting",
                   "description": "AI-assisted drafting of customer emails and chat responses",
@@ -626,8 +532,8 @@ Company Description:
                     // MUST be real companies from the case studies list
                     // NO FAKE COMPANIES
                   ]
-                }},
-                {{
+                },
+                {
                   "id": "knowledge_base",
                   "name": "Knowledge Base Creation",
                   "description": "Generate and maintain customer-facing documentation",
@@ -642,32 +548,32 @@ Company Description:
                     // MUST be real companies from the case studies list
                     // NO FAKE COMPANIES
                   ]
-                }}
+                }
               ],
               "targetRoles": [
-                {{
+                {
                   "role": "Customer Service/Support",
                   "employeeCount": 150,
                   "hourlyRate": 20,
                   "adjustedHourlyRate": 6,
                   "rateAdjustmentReason": "Eastern Europe (Croatia) - 0.3x US baseline"
-                }}
+                }
               ],
               "totalApplicableHours": 30,
               "totalApplicablePercent": 75,
               "secondOrderBenefits": [
-                {{
+                {
                   "benefit": "Improved Customer Satisfaction",
                   "description": "Faster, more consistent responses lead to happier customers"
-                }},
-                {{
+                },
+                {
                   "benefit": "Employee Retention", 
                   "description": "Less repetitive work reduces burnout"
-                }}
+                }
               ]
-            }}
+            }
           ]
-        }}
+        }
         
         MANDATORY: You MUST return ALL 9 business functions in your response:
         1. Executive/Leadership
@@ -707,9 +613,7 @@ Company Description:
         - Be realistic: no use case should have 100% of employees unless truly universal
         
         MANDATORY GEOGRAPHIC ADJUSTMENT:
-        The company is based in: """ + str(company_analysis.get('companyInfo', {}).get('geography', {}).get('headquarters', 'Unknown')) + """
-        
-        You MUST adjust hourly rates based on location:
+        You MUST adjust hourly rates based on the company's location (given with the company analysis):
         - United States/Canada: 1.0x (baseline)
         - Western Europe (UK, Germany, France): 0.9x for support, 0.8x for engineering
         - Eastern Europe (Poland, Romania, Croatia): 0.3x for support, 0.25x for engineering  
@@ -735,6 +639,63 @@ Company Description:
         ✓ Realistic employee allocation per use case (not 100% for everything)
         
         CRITICAL: Even if a function has 0 employees, STILL INCLUDE IT with relevanceScore of 10-20.
+        """
+    
+    def match_use_cases(self, company_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Match company analysis to potential Claude use cases with confidence scores
+        and provide role-specific recommendations based on case studies.
+        """
+        # Load enhanced case studies with business functions, narrowed to the
+        # most relevant ones per business function
+        try:
+            with span("select_case_studies"):
+                case_studies_with_functions = self._select_case_studies(company_analysis)
+            print(f"Loaded {len(case_studies_with_functions)} enhanced case studies")
+        except Exception as e:
+            print(f"Error loading enhanced case studies: {e}")
+            case_studies_with_functions = []
+        
+        # Define standardized business functions based on practical company organization
+        standardized_functions = [
+            "Executive/Leadership",  # C-suite, VPs, Directors
+            "Sales & Marketing",     # Sales, Marketing, Customer Success, BD
+            "Product & Engineering", # Product Management, Software Development, QA
+            "Operations",           # Operations, Supply Chain, Procurement, Facilities
+            "Finance & Accounting", # Finance, Accounting, FP&A, Treasury
+            "Human Resources",      # HR, Recruiting, L&D, Compensation
+            "Legal & Compliance",   # Legal, Compliance, Risk, IP
+            "Customer Support",     # Support, Success, Implementation
+            "Research & Development", # R&D, Innovation, Strategy
+            "Information Technology" # IT, Security, Infrastructure, Data
+        ]
+        
+        # Create a matching prompt with evidence-based approach.
+        # The static part (case studies, standardized functions, rules) goes first
+        # as its own cacheable block; the company-specific part follows it.
+        cached_prompt, case_studies_prompt = self._static_prompt_blocks(
+            "matching", self._build_matching_rules_prompt(), case_studies_with_functions,
+            self._build_matching_case_studies_prompt
+        )
+        headquarters = str(company_analysis.get('companyInfo', {}).get('geography', {}).get('headquarters', 'Unknown'))
+        company_prompt = f"""
+        ## Company Analysis
+        ```json
+        {json.dumps(company_analysis, indent=2)}
+        ```
+        
+        CRITICAL INFORMATION FROM COMPANY ANALYSIS:
+        Company location: """ + headquarters + """
+        Total employees: """ + str(company_analysis.get('employeeRoles', {}).get('totalEmployees', {}).get('count', 0)) + """
+        
+        DEBUG - Geography info: """ + str(company_analysis.get('companyInfo', {}).get('geography', {})) + """
+        
+        ROLE DISTRIBUTION:
+        """ + "\n        ".join([f"- {r['role']}: {r['count']} employees" for r in company_analysis.get('employeeRoles', {}).get('roleDistribution', [])]) + """
+        
+        MANDATORY GEOGRAPHIC ADJUSTMENT:
+        The company is based in: """ + headquarters + """
+        Apply the location multipliers above and include the adjusted hourly rates in your response.
         
         Your response MUST start with:
         {
@@ -748,11 +709,12 @@ Company Description:
         print(f"Matching company profile to use cases")
         try:
             # Try the newer API format first
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = self._create_message(
+                "match_use_cases",
+                model=self.MODEL,
                 max_tokens=8192,  # Increased for Sonnet's richer output
                 system="You are a JSON-only response bot. You must ONLY output valid JSON with no additional text, markdown, or explanations.",
-                messages=[{"role": "user", "content": matching_prompt}]
+                messages=[{"role": "user", "content": self._cached_prompt_content(cached_prompt, company_prompt, case_studies_prompt)}]
             )
         except AttributeError:
             # Fall back to older format if needed
@@ -760,69 +722,29 @@ Company Description:
             response = self.client.completion(
                 model="claude-3-5-haiku-20241022",
                 max_tokens_to_sample=4000,  # Increased max tokens
-                prompt=f"\n\nHuman: {matching_prompt}\n\nAssistant:"
+                prompt=f"\n\nHuman: {cached_prompt}{case_studies_prompt or ''}{company_prompt}\n\nAssistant:"
             )
         
         # Extract completion result based on API version
         try:
             # For newer API
             result = response.content[0].text
-            
-            # Print token usage
-            print(f"Token usage:")
-            print(f"Input tokens: {response.usage.input_tokens}")
-            print(f"Output tokens: {response.usage.output_tokens}")
-            print(f"Total tokens: {response.usage.input_tokens + response.usage.output_tokens}")
-            print(f"Estimated cost: ${(response.usage.input_tokens * 0.000003) + (response.usage.output_tokens * 0.000015):.4f}")
         except AttributeError:
             # For older API
             result = response.completion
             print("Token usage data not available in this API version")
         
         try:
-            # Clean the result in case it has markdown code blocks
-            cleaned_result = result.strip()
-            
-            # Enhanced JSON parsing logic to handle various formats
-            if cleaned_result.startswith("```json"):
-                # Find the start and end of the JSON block
-                start_idx = cleaned_result.find("```json")
-                if start_idx != -1:
-                    start_idx += 7  # Length of "```json"
-                    end_idx = cleaned_result.find("```", start_idx)
-                    if end_idx != -1:
-                        cleaned_result = cleaned_result[start_idx:end_idx].strip()
-            elif cleaned_result.startswith("```"):
-                # Handle case where json keyword might be missing
-                start_idx = cleaned_result.find("```")
-                if start_idx != -1:
-                    start_idx += 3  # Length of "```"
-                    end_idx = cleaned_result.find("```", start_idx)
-                    if end_idx != -1:
-                        cleaned_result = cleaned_result[start_idx:end_idx].strip()
-
-            # Attempt to find a valid JSON object even in messy text
-            start_brace = cleaned_result.find("{")
-            if start_brace != -1:
-                # Find matching closing brace by counting opening and closing braces
-                open_count = 0
-                close_brace = -1
-                for i in range(start_brace, len(cleaned_result)):
-                    if cleaned_result[i] == "{":
-                        open_count += 1
-                    elif cleaned_result[i] == "}":
-                        open_count -= 1
-                        if open_count == 0:
-                            close_brace = i
-                            break
-                
-                if close_brace != -1:
-                    cleaned_result = cleaned_result[start_brace:close_brace+1]
-            
-            print("Attempting to parse JSON:", cleaned_result[:100] + "...")
-            
-            # Try to parse the JSON
-            matches = json.loads(cleaned_result)
+            # Single pass over the response: skips fences and surrounding text,
+            # tolerates trailing commas, and closes a truncated response at the
+            # last complete element
+            with span("parse"):
+                matches, truncated = parse_json_response(result)
+            if not isinstance(matches, dict):
+                raise json.JSONDecodeError("Expected a JSON object", result, 0)
+            if truncated:
+                print("⚠️ WARNING: Response was truncated, keeping the complete part")
+                matches["truncated"] = True
             
             # Debug logging
             if "businessFunctions" in matches:
@@ -830,144 +752,14 @@ Company Description:
                 for func in matches.get('businessFunctions', []):
                     print(f"  - {func.get('name')}: {func.get('totalEmployees', 0)} employees, {len(func.get('useCases', []))} use cases")
             
-            # Handle both old useCases format and new businessFunctions format
-            if "businessFunctions" in matches:
-                # New evidence-based format - add category mapping for backward compatibility
-                role_to_category_mapping = {
-                    "Engineering/Development": "coding",
-                    "Software Engineer": "coding",
-                    "Developer": "coding",
-                    "Customer Service": "customer_service",
-                    "Support": "customer_service",
-                    "Marketing": "content_creation",
-                    "Content": "content_creation",
-                    "Sales": "productivity",
-                    "Legal": "document_qa",
-                    "Compliance": "document_qa",
-                    "Research": "document_qa",
-                    "Data Analysis": "document_qa",
-                    "Operations": "productivity",
-                    "Administration": "productivity",
-                    "Executive": "productivity",
-                    "Management": "productivity"
-                }
-                
-                # Default hourly rates for ROI calculation (US baseline)
-                # Based on 2024/2025 market data
-                # Aligned with our 9 standardized business functions
-                hourly_rates = {
-                    "Executive/Leadership": 100,      # ~$200k/year = $100/hr
-                    "Sales": 50,                      # ~$100k/year = $50/hr
-                    "Marketing": 40,                  # ~$80k/year = $40/hr
-                    "Product & Engineering": 60,      # ~$120k/year = $60/hr (includes IT/DevOps)
-                    "Operations": 30,                 # ~$60k/year = $30/hr
-                    "Finance & Accounting": 55,       # ~$110k/year = $55/hr
-                    "Human Resources": 35,            # ~$70k/year = $35/hr
-                    "Legal & Compliance": 75,         # ~$150k/year = $75/hr
-                    "Customer Support": 20,           # $17-22/hr US average
-                    "Other": 35                       # Generic professional fallback
-                }
-                
-                for business_function in matches["businessFunctions"]:
-                    # Calculate ROI for each use case if not provided
-                    if "useCases" in business_function:
-                        total_employees = business_function.get("totalEmployees", 0)
-                        
-                        # Get hourly rate for this function's roles
-                        hourly_rate = 35  # default
-                        if "targetRoles" in business_function and len(business_function["targetRoles"]) > 0:
-                            first_role = business_function["targetRoles"][0]
-                            
-                            # Use adjusted rate if provided by Claude
-                            if "adjustedHourlyRate" in first_role:
-                                hourly_rate = first_role["adjustedHourlyRate"]
-                            else:
-                                # Fall back to default rates
-                                role_name = first_role.get("role", "Other")
-                                for rate_key, rate_value in hourly_rates.items():
-                                    if rate_key.lower() in role_name.lower():
-                                        hourly_rate = rate_value
-                                        break
-                        
-                        total_applicable_hours = 0
-                        for use_case in business_function["useCases"]:
-                            hours_per_week = use_case.get("hoursPerWeek", 0)
-                            time_savings_percent = use_case.get("timeSavingsPercent", 0) / 100
-                            complexity_weeks = use_case.get("complexityWeeks", 1)
-                            
-                            # Calculate annual ROI for this use case
-                            annual_hours_saved = hours_per_week * time_savings_percent * 50  # 50 weeks/year
-                            annual_roi = annual_hours_saved * hourly_rate * total_employees
-                            use_case["annualROI"] = int(annual_roi)
-                            
-                            # Calculate quick win score
-                            if complexity_weeks > 0:
-                                use_case["quickWinScore"] = int(annual_roi / (complexity_weeks * 1000))  # Divide by 1000 for readability
-                            else:
-                                use_case["quickWinScore"] = 0
-                            
-                            total_applicable_hours += hours_per_week
-                        
-                        # Sort use cases by quickWinScore
-                        business_function["useCases"] = sorted(
-                            business_function["useCases"],
-                            key=lambda x: x.get("quickWinScore", 0),
-                            reverse=True
-                        )
-                        
-                        # Calculate total applicable percentage
-                        if business_function.get("totalApplicableHours") is None:
-                            business_function["totalApplicableHours"] = total_applicable_hours
-                        if business_function.get("totalApplicablePercent") is None and total_applicable_hours > 0:
-                            business_function["totalApplicablePercent"] = int((total_applicable_hours / 40) * 100)
-                    
-                    # Add category mapping for backward compatibility
-                    if "targetRoles" in business_function:
-                        for role_info in business_function["targetRoles"]:
-                            role_name = role_info["role"]
-                            # Find matching category
-                            category = None
-                            for key, value in role_to_category_mapping.items():
-                                if key.lower() in role_name.lower():
-                                    category = value
-                                    break
-                            role_info["category"] = category or "productivity"
-            elif "useCases" in matches:
-                # Old format - keep for backward compatibility
-                role_to_category_mapping = {
-                    "Engineering/Development": "coding",
-                    "Software Engineer": "coding",
-                    "Developer": "coding",
-                    "Customer Service": "customer_service",
-                    "Support": "customer_service",
-                    "Marketing": "content_creation",
-                    "Content": "content_creation",
-                    "Sales": "productivity",
-                    "Legal": "document_qa",
-                    "Compliance": "document_qa",
-                    "Research": "document_qa",
-                    "Data Analysis": "document_qa",
-                    "Operations": "productivity",
-                    "Administration": "productivity",
-                    "Executive": "productivity",
-                    "Management": "productivity"
-                }
-                
-                for use_case in matches["useCases"]:
-                    if "targetRoles" in use_case:
-                        for role_info in use_case["targetRoles"]:
-                            role_name = role_info["role"]
-                            # Find matching category
-                            category = None
-                            for key, value in role_to_category_mapping.items():
-                                if key.lower() in role_name.lower():
-                                    category = value
-                                    break
-                            role_info["category"] = category or "productivity"
+            # ROI figures and role categories, for both the businessFunctions and the old useCases format
+            with span("roi"):
+                apply_use_case_roi(matches)
             
             return matches
         
         except json.JSONDecodeError as e:
+            record_parse_failure("match_use_cases")
             print(f"Failed to parse matches as JSON: {e}")
             print("Raw response (first 500 chars):", result[:500] if 'result' in locals() else "No result")
             
@@ -980,26 +772,258 @@ Company Description:
             print(f"Error in match_use_cases: {e}")
             raise
     
-    def analyze_and_match_combined(self, description: str, corrected_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _build_combined_rules_prompt(self) -> str:
+        """
+        Static rules of the first-time combined analysis prompt: extraction and
+        use case rules. The case studies and the company description follow it.
+        """
+        return f"""
+        Analyze the company described at the end of this message and provide a complete AI implementation roadmap in ONE response.
+        
+        INSTRUCTIONS:
+        
+        1. EXTRACT COMPANY INFO:
+        - Industry: MUST be one of these: {', '.join(self.STANDARDIZED_INDUSTRIES)}
+        - Total employees: Extract the exact number stated
+        - Headquarters: Location if mentioned (e.g., "India", "US", etc.)
+        - Key challenges: List the main pain points mentioned
+        
+        2. MAP ALL EMPLOYEES TO EXACTLY THESE 9 FUNCTIONS:
+        - Executive/Leadership
+        - Sales
+        - Marketing
+        - Product & Engineering
+        - Operations
+        - Finance & Accounting
+        - Human Resources
+        - Legal & Compliance
+        - Customer Support
+        
+        CRITICAL MAPPING RULES:
+        - "software engineers" (200) → Product & Engineering
+        - "product managers and designers" (50) → Product & Engineering
+        - "data analysts and business intelligence team" (40) → Product & Engineering
+        - "customer success and support representatives" (180) → Customer Support
+        - "sales representatives" (120) → Sales
+        - "marketing professionals" (80) → Marketing
+        - "HR and recruiting staff" (30) → Human Resources
+        - "finance and accounting team" (25) → Finance & Accounting
+        - "legal and compliance officers" (20) → Legal & Compliance
+        - "executives and senior leadership" (15) → Executive/Leadership
+        - "other operations and administrative staff" (90) → Operations
+        - ALL employees must be mapped, sum MUST equal total
+        
+        3. CALCULATE SALARY ADJUSTMENTS:
+        Based on the headquarters location and industry, intelligently determine appropriate salary levels.
+        Consider:
+        - Cost of living in that specific region
+        - Average salary levels for THIS SPECIFIC INDUSTRY in that region
+        - Local purchasing power parity
+        - Economic development level
+        
+        For example:
+        - Software engineers in Bangalore, India (IT industry) might earn $24,000/year (0.2x US)
+        - But doctors in Bangalore (Healthcare) might earn $40,000/year (0.3x US)
+        - Manufacturing workers in Poland earn differently than tech workers in Poland
+        
+        BE SPECIFIC to both location AND industry when setting avgSalaryUSD.
+        
+        4. FOR EACH OF THE 9 FUNCTIONS (even if 0 employees):
+        Provide exactly 3 use cases with:
+        - Name and description
+        - employeesUsing: ACTUAL NUMBER (not percentage!) of employees who would use this
+        - hoursPerWeek: CONSERVATIVE hours spent on this task (typically 2-10 hours, rarely over 15)
+        - timeSavingsPercent: CONSERVATIVE 15-40% (be realistic - most tasks see 20-30% improvement)
+        - complexity: Low/Medium/High
+        - For examples: YOU MUST ONLY USE COMPANIES FROM THE CASE STUDIES LIST PROVIDED AT THE BOTTOM
+        
+        CRITICAL: DO NOT MAKE UP COMPANY NAMES. DO NOT USE: GitHub, Replit, AppZen, Workiva, MindBridge, Kira Systems, Luminance, etc.
+        ONLY USE REAL COMPANIES FROM THE CASE STUDIES LIST AT THE BOTTOM OF THIS PROMPT
+        
+        OUTPUT FORMAT:
+        Return a JSON object with:
+        - companyInfo: name, industry (from standard list), totalEmployees, headquarters, keyChallenges array
+        - businessFunctions: array of ALL 9 functions, each with:
+          - id, name, employeeCount, avgSalaryUSD, relevanceScore
+          - useCases: array of 3 use cases, each with:
+            - id, name, description, employeesUsing (number), hoursPerWeek, timeSavingsPercent, complexity
+            - examples: array with company, metric, and caseStudyId
+            
+        For examples, ONLY use companies from the case studies list below.
+        Each example must have: company (exact name from list), metric (from their data), caseStudyId (their id)
+        """
+    
+    def _build_combined_case_studies_prompt(self, case_studies: List[Dict[str, Any]]) -> str:
+        """
+        Case study section of the first-time combined analysis prompt
+        """
+        return f"""
+        HERE ARE THE ONLY COMPANIES YOU CAN USE:
+        {', '.join([cs.get("companyName", cs.get("company", "")) for cs in case_studies])}
+        
+        FULL CASE STUDY DATA:
+        {json.dumps([{
+            "id": cs.get("id", ""),
+            "company": cs.get("companyName", cs.get("company", "")),
+            "businessFunctions": cs.get("businessFunctions", []),
+            "metrics": cs.get("results", {}).get("quantitativeMetrics", [])
+        } for cs in case_studies], indent=2)}
+        
+        ABSOLUTE REQUIREMENTS FOR EXAMPLES:
+        1. ONLY use company names from the list above (e.g., TRY, Block, JetBrains, etc.)
+        2. ONLY use metrics from those specific companies
+        3. Use the correct caseStudyId (the "id" field from above)
+        4. NEVER make up companies like GitHub, Replit, PayPal, Stripe, etc. unless they're in the list
+        5. NEVER use generic descriptions like "Leading company" or "Major retailer"
+        6. If you can't find 3 relevant examples for a use case, use fewer examples rather than making them up
+        
+        """
+    
+    def analyze_and_match_combined(self, description: str, corrected_data: Optional[Dict[str, Any]] = None,
+                                   refresh: bool = False, fan_out: bool = False) -> Dict[str, Any]:
         """
         ONE METHOD that does EVERYTHING - Extract company info AND match use cases in a single Claude call
         Can optionally accept corrected_data from user review
+        
+        With fan_out=True a short extraction call is followed by one concurrent
+        use case call per business function; the result has the same shape.
         """
-        # Standardized industries (GICS-based)
-        STANDARDIZED_INDUSTRIES = [
-            "Information Technology",
-            "Health Care", 
-            "Financials",
-            "Consumer Discretionary",
-            "Communication Services",
-            "Industrials",
-            "Consumer Staples",
-            "Energy",
-            "Utilities",
-            "Real Estate",
-            "Materials"
-        ]
+        if fan_out:
+            key_parts = self._fanout_key_parts(description, corrected_data)
+            return self._cached_result(key_parts, lambda: self._analyze_and_match_fanout(description, corrected_data), refresh)
+        key_parts = self._combined_key_parts(description, corrected_data)
+        return self._cached_result(key_parts, lambda: self._analyze_and_match_combined(description, corrected_data), refresh)
+    
+    def analyze_and_match_combined_stream(self, description: str, corrected_data: Optional[Dict[str, Any]] = None,
+                                          refresh: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streaming variant of analyze_and_match_combined.
+        
+        Yields (event, data) pairs: "start", then "companyInfo" and one
+        "businessFunction" per function as soon as its JSON object is complete
+        in the partial output, periodic "progress" events, and finally "done"
+        with the full validated result (the same shape the blocking call returns).
+        
+        The stream shares the blocking call's cache key and single-flight slot:
+        while an identical analysis (streamed or not) is running, this call
+        waits for it, sending "progress" keep-alives, and then replays its
+        final result instead of starting another Claude request.
+        """
+        key = make_cache_key(self._combined_key_parts(description, corrected_data))
+        if self.result_cache is not None and not refresh:
+            with span("cache_lookup"):
+                cached = self.result_cache.get(key)
+            if cached is not None:
+                print("Result cache hit for analyze_and_match_combined (stream)")
+                yield "start", {"cached": True}
+                yield from self._replay_combined(cached, cached=True)
+                return
+        
+        call, leader = self.single_flight.begin(key)
+        if not leader:
+            print("Joined in-flight analyze_and_match_combined request (stream)")
+            yield "start", {"cached": False, "shared": True}
+            while not self.single_flight.wait(call, timeout=self.STREAM_KEEPALIVE_SECONDS):
+                yield "progress", {"waiting": True}
+            yield from self._replay_combined(self.single_flight.result(call), cached=False, shared=True)
+            return
         
+        try:
+            result = yield from self._stream_combined(description, corrected_data)
+        except GeneratorExit:
+            # The leader's client disconnected; release the waiting callers
+            self.single_flight.finish(key, call, error=RuntimeError("The analysis was cancelled before it finished"))
+            raise
+        except BaseException as e:
+            self.single_flight.finish(key, call, error=e)
+            raise
+        if self._cacheable(result):
+            self.result_cache.set(key, result)
+        self.single_flight.finish(key, call, result)
+        yield "done", {"result": result, "cached": False}
+    
+    def _replay_combined(self, result: Dict[str, Any], **flags: bool) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream events for an already finished combined result
+        """
+        if isinstance(result.get("companyInfo"), dict):
+            yield "companyInfo", result["companyInfo"]
+        for index, business_function in enumerate(result.get("businessFunctions", []) or []):
+            yield "businessFunction", {"index": index, "function": business_function}
+        yield "done", dict(result=result, **flags)
+    
+    def _stream_combined(self, description: str,
+                         corrected_data: Optional[Dict[str, Any]]) -> Generator[Tuple[str, Dict[str, Any]], None, Dict[str, Any]]:
+        """
+        Run the streaming Claude request, yielding partial events; returns the
+        parsed result
+        """
+        with span("prompt"):
+            request_kwargs, case_studies = self._build_combined_request(description, corrected_data)
+        parser = IncrementalJSONParser()
+        
+        print("Making streaming combined analysis request...")
+        yield "start", {"cached": False}
+        received = 0
+        last_progress = 0
+        start = time.perf_counter()
+        first_token = None
+        claude_span = span("claude", operation="analyze_and_match_stream", model=self.MODEL)
+        try:
+            with claude_span, self.client.messages.stream(**request_kwargs) as stream:
+                for text in stream.text_stream:
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                        add_timing("claude-ttft", first_token, operation="analyze_and_match_stream")
+                    received += len(text)
+                    for path, value in parser.feed(text):
+                        if path == ("companyInfo",):
+                            yield "companyInfo", value
+                        elif len(path) == 2 and path[0] == "businessFunctions":
+                            yield "businessFunction", {"index": path[1], "function": value}
+                    if received - last_progress >= 2000:
+                        last_progress = received
+                        yield "progress", {"outputChars": received}
+                response = stream.get_final_message()
+        except Exception as e:
+            record_claude_call(self.MODEL, "analyze_and_match_stream", time.perf_counter() - start, outcome="error",
+                               first_token_seconds=first_token)
+            print(f"❌ Error in streaming combined analysis: {e}")
+            raise
+        
+        record_claude_call(self.MODEL, "analyze_and_match_stream", time.perf_counter() - start, response,
+                           first_token_seconds=first_token)
+        return self._parse_combined_response(response.content[0].text, case_studies, parser)
+    
+    def _combined_key_parts(self, description: str, corrected_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Result cache key parts for the combined analysis
+        """
+        return {
+            "operation": "analyze_and_match_combined",
+            "description": normalize_text(description),
+            "correctedData": corrected_data,
+            "model": self.MODEL,
+            "templateVersion": self._combined_prompt_version()
+        }
+    
+    def _combined_prompt_version(self) -> str:
+        """
+        Version of everything besides the company input that shapes the combined
+        prompt: the rules, the case study corpus and the retrieval depth
+        """
+        try:
+            corpus_version = self.case_study_store.snapshot().version
+        except Exception:
+            corpus_version = "none"
+        return self._template_version(self._build_combined_rules_prompt(), corpus_version, str(self.case_study_top_k))
+    
+    def _build_combined_request(self, description: str,
+                                corrected_data: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Build the messages.create arguments for the combined analysis.
+        Returns (request kwargs, full case study list used for validation).
+        """
         # Explicit role mappings for compound roles
         ROLE_MAPPINGS = {
             "product managers and designers": "Product & Engineering",
@@ -1013,13 +1037,11 @@ Company Description:
         }
         
         # Load case studies for examples
-        enhanced_path = os.path.join(os.path.dirname(__file__), "..", "data", "case_studies", "all_120_case_studies.json")
         try:
-            with open(enhanced_path, "r") as f:
-                case_studies = json.load(f)
+            case_studies = self.case_study_store.all()
             print(f"Loaded {len(case_studies)} case studies for examples")
         except FileNotFoundError:
-            print(f"Warning: Case studies file not found at {enhanced_path}")
+            print(f"Warning: Case studies file not found at {self.case_study_store.path}")
             print("Continuing without case study examples...")
             case_studies = []
         except json.JSONDecodeError as e:
@@ -1088,18 +1110,166 @@ Company Description:
           ]
         }}
         """
+            prompt_content = combined_prompt
         else:
-            # First-time analysis
-            combined_prompt = f"""
-        Analyze this company and provide a complete AI implementation roadmap in ONE response.
-        
+            # First-time analysis: static instructions and case studies first
+            # (cacheable), then the company description
+            # Only the most relevant case studies per business function go into the prompt
+            prompt_case_studies = self._select_case_studies(description) if case_studies else []
+            cached_prompt, case_studies_prompt = self._static_prompt_blocks(
+                "combined", self._build_combined_rules_prompt(), prompt_case_studies,
+                self._build_combined_case_studies_prompt
+            )
+            company_prompt = f"""
         COMPANY DESCRIPTION:
         {description}
         
-        INSTRUCTIONS:
+        RETURN ONLY VALID JSON. Include ALL 9 business functions.
+        """
+            prompt_content = self._cached_prompt_content(cached_prompt, company_prompt, case_studies_prompt)
+        
+        request_kwargs = {
+            "model": self.MODEL,
+            "max_tokens": 8192,  # Sonnet 4 can handle more complex output
+            "system": "You are a JSON-only response bot. Return ONLY valid JSON with no explanation.",
+            "messages": [{"role": "user", "content": prompt_content}]
+        }
+        return request_kwargs, case_studies
+    
+    def _analyze_and_match_combined(self, description: str, corrected_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Combined analysis with Claude (uncached)
+        """
+        with span("prompt"):
+            request_kwargs, case_studies = self._build_combined_request(description, corrected_data)
+        
+        # Make the API call
+        print("Making combined analysis request...")
+        try:
+            response = self._create_message("analyze_and_match", **request_kwargs)
+            
+            result = response.content[0].text
+        except Exception as e:
+            print(f"❌ Error in combined analysis: {e}")
+            if hasattr(e, 'response'):
+                print(f"   Response: {e.response}")
+            raise
+        
+        return self._parse_combined_response(result, case_studies)
+    
+    def _parse_combined_response(self, result: str, case_studies: List[Dict[str, Any]],
+                                 parser: Optional[IncrementalJSONParser] = None) -> Dict[str, Any]:
+        """
+        Parse and validate the combined analysis output. A truncated response is
+        closed at its last complete element and marked with "truncated".
+        
+        Pass the parser that was fed the streamed output to reuse its scan
+        instead of parsing the text again.
+        """
+        try:
+            with span("parse"):
+                if parser is not None:
+                    parsed, truncated = finish_json_response(parser)
+                else:
+                    parsed, truncated = parse_json_response(result)
+            if not isinstance(parsed, dict):
+                raise json.JSONDecodeError("Expected a JSON object", result, 0)
+        except json.JSONDecodeError as e:
+            record_parse_failure("analyze_and_match")
+            print(f"Failed to parse matches as JSON: {e}")
+            print("Raw response (first 500 chars):", result[:500])
+            
+            # Nothing parseable: return a basic structure the frontend can render
+            return {
+                "businessFunctions": [{
+                    "id": "general",
+                    "name": "General Business Functions",
+                    "relevanceScore": 75,
+                    "whyRelevant": "Unable to parse specific recommendations, but Claude AI can benefit most knowledge workers",
+                    "examples": [],
+                    "targetRoles": [],
+                    "totalEmployeesAffected": 0,
+                    "estimatedROI": "$0",
+                    "estimatedImplementationCost": {
+                        "level": "Medium",
+                        "range": "$10,000 - $50,000"
+                    }
+                }],
+                "error": "Failed to parse Claude response completely",
+                "partial_response": result[:200] + "..." # Include the start of the response
+            }
+        
+        if truncated:
+            print(f"⚠️ WARNING: Response was truncated after {len(result)} characters, keeping the complete part")
+            parsed["truncated"] = True
+        
+        with span("validate"):
+            return self._validate_combined_result(parsed, case_studies)
+    
+    def _validate_combined_result(self, parsed: Dict[str, Any], case_studies: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Log problems in a combined analysis result: invented example companies,
+        employee totals that don't add up and missing business functions
+        """
+        # Validate no fake companies
+        fake_companies = ["GitHub", "Replit", "AppZen", "Workiva", "MindBridge", "Kira Systems", "Luminance", "Freshdesk", "HubSpot", "Zendesk", "Asana", "Intercom", "Copy.ai", "Confluence", "GitBook"]
+        valid_companies = [cs.get("companyName", cs.get("company", "")) for cs in case_studies]
+        
+        for func in parsed.get('businessFunctions', []):
+            for use_case in func.get('useCases', []):
+                for example in use_case.get('examples', []):
+                    company = example.get('company', '')
+                    if company and company not in valid_companies and company in fake_companies:
+                        print(f"❌ ERROR: Found fake company '{company}' - not in case studies!")
+                        print(f"Valid companies include: {', '.join(valid_companies[:10])}...")
+        
+        # Validate employee count
+        total_mapped = sum(f.get('employeeCount', 0) for f in parsed.get('businessFunctions', []))
+        total_stated = parsed.get('companyInfo', {}).get('totalEmployees', 0)
+        
+        if total_mapped != total_stated:
+            print(f"⚠️ WARNING: Mapped {total_mapped} employees but company states {total_stated}")
+        
+        # Validate we have all 9 functions
+        if len(parsed.get('businessFunctions', [])) != 9:
+            print(f"⚠️ WARNING: Expected 9 functions, got {len(parsed.get('businessFunctions', []))}")
+        
+        print(f"✅ Successfully analyzed company: {parsed.get('companyInfo', {}).get('name', 'Unknown')}")
+        print(f"   Industry: {parsed.get('companyInfo', {}).get('industry')}")
+        print(f"   Total Employees: {total_stated}")
+        print(f"   Headquarters: {parsed.get('companyInfo', {}).get('headquarters')}")
+        
+        return parsed
+    
+    def _fanout_key_parts(self, description: str, corrected_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Result cache key parts for the fan-out combined analysis
+        """
+        try:
+            corpus_version = self.case_study_store.snapshot().version
+        except Exception:
+            corpus_version = "none"
+        return {
+            "operation": "analyze_and_match_fanout",
+            "description": normalize_text(description),
+            "correctedData": corrected_data,
+            "model": self.MODEL,
+            "templateVersion": self._template_version(
+                self._build_fanout_extraction_prompt(), self._build_fanout_use_case_rules_prompt(),
+                corpus_version, str(self.fanout_case_study_top_k)
+            )
+        }
+    
+    def _build_fanout_extraction_prompt(self) -> str:
+        """
+        Static instructions for the fan-out extraction call: company info,
+        employee mapping and salaries only, no use cases
+        """
+        return f"""
+        Analyze the company described at the end of this message. Do NOT suggest use cases yet.
         
         1. EXTRACT COMPANY INFO:
-        - Industry: MUST be one of these: {', '.join(STANDARDIZED_INDUSTRIES)}
+        - Industry: MUST be one of these: {', '.join(self.STANDARDIZED_INDUSTRIES)}
         - Total employees: Extract the exact number stated
         - Headquarters: Location if mentioned (e.g., "India", "US", etc.)
         - Key challenges: List the main pain points mentioned
@@ -1114,256 +1284,315 @@ Company Description:
         - Human Resources
         - Legal & Compliance
         - Customer Support
-        
-        CRITICAL MAPPING RULES:
-        - "software engineers" (200) → Product & Engineering
-        - "product managers and designers" (50) → Product & Engineering
-        - "data analysts and business intelligence team" (40) → Product & Engineering
-        - "customer success and support representatives" (180) → Customer Support
-        - "sales representatives" (120) → Sales
-        - "marketing professionals" (80) → Marketing
-        - "HR and recruiting staff" (30) → Human Resources
-        - "finance and accounting team" (25) → Finance & Accounting
-        - "legal and compliance officers" (20) → Legal & Compliance
-        - "executives and senior leadership" (15) → Executive/Leadership
-        - "other operations and administrative staff" (90) → Operations
         - ALL employees must be mapped, sum MUST equal total
         
-        3. CALCULATE SALARY ADJUSTMENTS:
-        Based on the headquarters location and industry, intelligently determine appropriate salary levels.
-        Consider:
-        - Cost of living in that specific region
-        - Average salary levels for THIS SPECIFIC INDUSTRY in that region
-        - Local purchasing power parity
-        - Economic development level
+        3. SET avgSalaryUSD FOR EACH FUNCTION:
+        Based on the headquarters location AND industry (cost of living, industry pay
+        levels, purchasing power). E.g. software engineers in Bangalore (IT) might earn
+        $24,000/year, doctors in Bangalore (Health Care) $40,000/year.
         
-        For example:
-        - Software engineers in Bangalore, India (IT industry) might earn $24,000/year (0.2x US)
-        - But doctors in Bangalore (Healthcare) might earn $40,000/year (0.3x US)
-        - Manufacturing workers in Poland earn differently than tech workers in Poland
-        
-        BE SPECIFIC to both location AND industry when setting avgSalaryUSD.
+        OUTPUT FORMAT:
+        Return a JSON object with:
+        - companyInfo: name, industry (from standard list), totalEmployees, headquarters, keyChallenges array
+        - businessFunctions: array of ALL 9 functions, each with id, name, employeeCount, avgSalaryUSD, relevanceScore
+        """
+    
+    def _build_fanout_use_case_rules_prompt(self) -> str:
+        """
+        Static instructions shared by every per-function use case call
+        """
+        return """
+        Suggest Claude AI use cases for ONE business function of the company described below.
         
-        4. FOR EACH OF THE 9 FUNCTIONS (even if 0 employees):
         Provide exactly 3 use cases with:
         - Name and description
-        - employeesUsing: ACTUAL NUMBER (not percentage!) of employees who would use this
+        - employeesUsing: ACTUAL NUMBER (not percentage!) of the function's employees who would use this
         - hoursPerWeek: CONSERVATIVE hours spent on this task (typically 2-10 hours, rarely over 15)
         - timeSavingsPercent: CONSERVATIVE 15-40% (be realistic - most tasks see 20-30% improvement)
         - complexity: Low/Medium/High
-        - For examples: YOU MUST ONLY USE COMPANIES FROM THE CASE STUDIES LIST PROVIDED AT THE BOTTOM
+        - examples: array with company, metric and caseStudyId
+        
+        Even if the function has 0 employees, still provide 3 use cases.
         
         CRITICAL: DO NOT MAKE UP COMPANY NAMES. DO NOT USE: GitHub, Replit, AppZen, Workiva, MindBridge, Kira Systems, Luminance, etc.
-        ONLY USE REAL COMPANIES FROM THE CASE STUDIES LIST AT THE BOTTOM OF THIS PROMPT
+        ONLY USE REAL COMPANIES FROM THE CASE STUDIES PROVIDED.
         
         OUTPUT FORMAT:
-        Return a JSON object with:
-        - companyInfo: name, industry (from standard list), totalEmployees, headquarters, keyChallenges array
-        - businessFunctions: array of ALL 9 functions, each with:
-          - id, name, employeeCount, avgSalaryUSD, relevanceScore
-          - useCases: array of 3 use cases, each with:
-            - id, name, description, employeesUsing (number), hoursPerWeek, timeSavingsPercent, complexity
-            - examples: array with company, metric, and caseStudyId
-            
-        For examples, ONLY use companies from the case studies list below.
-        Each example must have: company (exact name from list), metric (from their data), caseStudyId (their id)
+        Return a JSON object: {"useCases": [{"id", "name", "description", "employeesUsing", "hoursPerWeek", "timeSavingsPercent", "complexity", "examples": [{"company", "metric", "caseStudyId"}]}]}
+        """
+    
+    def _analyze_and_match_fanout(self, description: str, corrected_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Fan-out combined analysis (uncached): extract company info and the
+        employee mapping, then generate each function's use cases concurrently.
+        A failed function keeps its mapping with no use cases and is listed in
+        "failedFunctions" instead of failing the whole analysis.
+        """
+        try:
+            case_studies = self.case_study_store.all()
+        except Exception as e:
+            print(f"Continuing without case study examples: {e}")
+            case_studies = []
         
-        HERE ARE THE ONLY COMPANIES YOU CAN USE:
-        {', '.join([cs.get("companyName", cs.get("company", "")) for cs in case_studies])}
+        if corrected_data and isinstance(corrected_data.get('businessFunctions'), list):
+            # The user already verified the company info and employee mapping
+            company_info = corrected_data.get('companyInfo', {}) or {}
+            functions = [dict(f) for f in corrected_data['businessFunctions'] if isinstance(f, dict)]
+            for func in functions:
+                func.pop('useCases', None)
+                if 'avgSalaryUSD' not in func and 'adjustedSalaryUSD' in func:
+                    func['avgSalaryUSD'] = func['adjustedSalaryUSD']
+        else:
+            company_info, functions = self._fanout_extract(description, corrected_data)
+        
+        # Make sure all 9 functions are present, in the standard order. Name
+        # variants ("Sales and Marketing" for "Sales & Marketing") are matched
+        # to their standard name so they don't end up next to a placeholder
+        standard_names = {self._function_name_key(name): name for name in FUNCTION_QUERIES}
+        by_name = {}
+        for func in functions:
+            name = standard_names.get(self._function_name_key(func.get('name')), func.get('name'))
+            if name in by_name:
+                # Two entries for one function: keep the first, add up headcount
+                merged = by_name[name]
+                merged['employeeCount'] = (merged.get('employeeCount') or 0) + (func.get('employeeCount') or 0)
+                continue
+            by_name[name] = dict(func, name=name)
+        functions = [
+            by_name.pop(name, None) or {"id": re.sub(r'[^a-z]+', '-', name.lower()), "name": name,
+                                        "employeeCount": 0, "relevanceScore": 0}
+            for name in FUNCTION_QUERIES
+        ] + list(by_name.values())
+        
+        print(f"Generating use cases for {len(functions)} functions concurrently...")
+        with ThreadPoolExecutor(max_workers=max(1, self.fanout_workers)) as executor:
+            futures = [
+                executor.submit(in_context(self._fanout_use_cases), description, company_info, func, bool(case_studies))
+                for func in functions
+            ]
+            failed = []
+            truncated = False
+            for func, future in zip(functions, futures):
+                try:
+                    func['useCases'], function_truncated = future.result()
+                    truncated = truncated or function_truncated
+                except Exception as e:
+                    print(f"❌ Use case generation failed for {func.get('name')}: {e}")
+                    func['useCases'] = []
+                    failed.append(func.get('name'))
+        
+        result = {"companyInfo": company_info, "businessFunctions": functions}
+        if failed:
+            result["failedFunctions"] = failed
+        if truncated:
+            result["truncated"] = True
+        with span("validate"):
+            return self._validate_combined_result(result, case_studies)
+    
+    @staticmethod
+    def _function_name_key(name: Any) -> str:
+        """
+        Comparison key for business function names: case, punctuation and
+        "&" vs "and" are ignored
+        """
+        words = re.findall(r'[a-z0-9]+', str(name or '').lower().replace('&', ' and '))
+        return ' '.join(words)
+    
+    def _fanout_extract(self, description: str,
+                        corrected_data: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Extraction call of the fan-out analysis. Returns (companyInfo, functions).
+        """
+        company_prompt = f"""
+        COMPANY DESCRIPTION:
+        {description}
+        """
+        if corrected_data:
+            company_prompt += f"""
+        USER-VERIFIED DATA (takes precedence over the description):
+        {json.dumps(corrected_data, indent=2)}
+        """
+        company_prompt += """
+        RETURN ONLY VALID JSON. Include ALL 9 business functions.
+        """
         
-        FULL CASE STUDY DATA:
-        {json.dumps([{
-            "id": cs.get("id", ""),
-            "company": cs.get("companyName", cs.get("company", "")),
-            "businessFunctions": cs.get("businessFunctions", []),
-            "metrics": cs.get("results", {}).get("quantitativeMetrics", [])
-        } for cs in case_studies], indent=2)}
+        print("Making fan-out extraction request...")
+        response = self._create_message(
+            "fanout_extract",
+            model=self.MODEL,
+            max_tokens=2048,
+            system="You are a JSON-only response bot. Return ONLY valid JSON with no explanation.",
+            # The instructions are too short for prompt caching, so one plain block
+            messages=[{"role": "user", "content": self._build_fanout_extraction_prompt() + company_prompt}]
+        )
         
-        ABSOLUTE REQUIREMENTS FOR EXAMPLES:
-        1. ONLY use company names from the list above (e.g., TRY, Block, JetBrains, etc.)
-        2. ONLY use metrics from those specific companies
-        3. Use the correct caseStudyId (the "id" field from above)
-        4. NEVER make up companies like GitHub, Replit, PayPal, Stripe, etc. unless they're in the list
-        5. NEVER use generic descriptions like "Leading company" or "Major retailer"
-        6. If you can't find 3 relevant examples for a use case, use fewer examples rather than making them up
+        try:
+            parsed, _ = parse_json_response(response.content[0].text, allow_truncated=False)
+            if not isinstance(parsed, dict):
+                raise json.JSONDecodeError("Expected a JSON object", response.content[0].text, 0)
+        except json.JSONDecodeError:
+            record_parse_failure("fanout_extract")
+            raise
+        functions = [f for f in parsed.get('businessFunctions', []) or [] if isinstance(f, dict)]
+        return parsed.get('companyInfo', {}) or {}, functions
+    
+    def _fanout_use_cases(self, description: str, company_info: Dict[str, Any], func: Dict[str, Any],
+                          with_case_studies: bool) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Use case call for one business function of the fan-out analysis.
+        Returns (use cases, truncated).
+        """
+        name = func.get('name', '')
+        if with_case_studies:
+            terms = FUNCTION_QUERIES.get(name, name)
+            case_studies = self._select_case_studies(description, {name: terms}, self.fanout_case_study_top_k)
+            case_studies_prompt = self._build_combined_case_studies_prompt(case_studies)
+        else:
+            case_studies_prompt = ""
         
-        RETURN ONLY VALID JSON. Include ALL 9 business functions.
+        function_prompt = f"""
+        COMPANY:
+        {json.dumps(company_info, indent=2)}
+        
+        COMPANY DESCRIPTION:
+        {description}
+        
+        BUSINESS FUNCTION: {name}
+        - Employees: {func.get('employeeCount', 0)}
+        - Average salary (USD): {func.get('avgSalaryUSD', 'Not specified')}
+        
+        Use case ids must start with "{func.get('id', name)}-". RETURN ONLY VALID JSON.
         """
         
-        # Make the API call
-        print("Making combined analysis request...")
+        response = self._create_message(
+            "fanout_use_cases",
+            model=self.MODEL,
+            max_tokens=1500,
+            system="You are a JSON-only response bot. Return ONLY valid JSON with no explanation.",
+            # Shared rules are too short for prompt caching and the case studies
+            # differ per function, so nothing here is marked for caching
+            messages=[{"role": "user", "content": (
+                self._build_fanout_use_case_rules_prompt() + case_studies_prompt + function_prompt
+            )}]
+        )
+        
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=8192,  # Sonnet 4 can handle more complex output
-                system="You are a JSON-only response bot. Return ONLY valid JSON with no explanation.",
-                messages=[{"role": "user", "content": combined_prompt}]
-            )
-            
-            result = response.content[0].text
-            
-            # Clean the result in case it has markdown code blocks
-            cleaned_result = result.strip()
-            
-            # Find JSON block in the response
-            if "```json" in cleaned_result:
-                start_idx = cleaned_result.find("```json") + 7
-                end_idx = cleaned_result.find("```", start_idx)
-                if end_idx != -1:
-                    cleaned_result = cleaned_result[start_idx:end_idx].strip()
-            elif cleaned_result.startswith("```"):
-                cleaned_result = cleaned_result[3:]
-                if cleaned_result.endswith("```"):
-                    cleaned_result = cleaned_result[:-3]
-            
-            # Parse JSON
-            parsed = json.loads(cleaned_result)
-            
-            # Validate no fake companies
-            fake_companies = ["GitHub", "Replit", "AppZen", "Workiva", "MindBridge", "Kira Systems", "Luminance", "Freshdesk", "HubSpot", "Zendesk", "Asana", "Intercom", "Copy.ai", "Confluence", "GitBook"]
-            valid_companies = [cs.get("companyName", cs.get("company", "")) for cs in case_studies]
-            
-            for func in parsed.get('businessFunctions', []):
-                for use_case in func.get('useCases', []):
-                    for example in use_case.get('examples', []):
-                        company = example.get('company', '')
-                        if company and company not in valid_companies and company in fake_companies:
-                            print(f"❌ ERROR: Found fake company '{company}' - not in case studies!")
-                            print(f"Valid companies include: {', '.join(valid_companies[:10])}...")
-            
-            # Validate employee count
-            total_mapped = sum(f['employeeCount'] for f in parsed.get('businessFunctions', []))
-            total_stated = parsed.get('companyInfo', {}).get('totalEmployees', 0)
-            
-            if total_mapped != total_stated:
-                print(f"⚠️ WARNING: Mapped {total_mapped} employees but company states {total_stated}")
-            
-            # Validate we have all 9 functions
-            if len(parsed.get('businessFunctions', [])) != 9:
-                print(f"⚠️ WARNING: Expected 9 functions, got {len(parsed.get('businessFunctions', []))}")
-            
-            print(f"✅ Successfully analyzed company: {parsed.get('companyInfo', {}).get('name', 'Unknown')}")
-            print(f"   Industry: {parsed.get('companyInfo', {}).get('industry')}")
-            print(f"   Total Employees: {total_stated}")
-            print(f"   Headquarters: {parsed.get('companyInfo', {}).get('headquarters')}")
-            
-            return parsed
-            
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse matches as JSON: {e}")
-            print("Raw response (first 500 chars):", result[:500])
-            print("Attempting to fix and salvage JSON...")
-            
-            # Try to fix common JSON errors
-            try:
-                # Remove any trailing commas before closing brackets/braces
-                fixed_json = result.strip()
-                fixed_json = re.sub(r',\s*}', '}', fixed_json)
-                fixed_json = re.sub(r',\s*]', ']', fixed_json)
-                
-                # Try to parse the fixed JSON
-                matches = json.loads(fixed_json)
-                return matches
-            except:
-                pass
-            
-            # Try using regex to extract JSON-like structure
-            try:
-                import re
-                json_pattern = r'\{(?:[^{}]|(?:\{[^{}]*\}))*\}'
-                json_matches = re.findall(json_pattern, result, re.DOTALL)
-                if json_matches:
-                    for json_str in json_matches:
-                        try:
-                            matches = json.loads(json_str)
-                            if "businessFunctions" in matches or "useCases" in matches:
-                                return matches
-                        except:
-                            continue
-            except:
-                pass
-            
-            # Last resort: manually build valid JSON
-            try:
-                # Create a basic structure if parsing failed
-                fallback_response = {
-                    "businessFunctions": [{
-                        "id": "general",
-                        "name": "General Business Functions",
-                        "relevanceScore": 75,
-                        "whyRelevant": "Unable to parse specific recommendations, but Claude AI can benefit most knowledge workers",
-                        "examples": [],
-                        "targetRoles": [],
-                        "totalEmployeesAffected": 0,
-                        "estimatedROI": "$0",
-                        "estimatedImplementationCost": {
-                            "level": "Medium",
-                            "range": "$10,000 - $50,000"
-                        }
-                    }],
-                    "error": "Failed to parse Claude response completely",
-                    "partial_response": result[:200] + "..." # Include the start of the response
-                }
-                
-                return fallback_response
-            except Exception as e2:
-                print(f"Even fallback JSON creation failed: {e2}")
-                raise
-                
-        except Exception as e:
-            print(f"❌ Error in combined analysis: {e}")
-            if hasattr(e, 'response'):
-                print(f"   Response: {e.response}")
+            parsed, truncated = parse_json_response(response.content[0].text)
+        except json.JSONDecodeError:
+            record_parse_failure("fanout_use_cases")
             raise
+        if isinstance(parsed, dict):
+            use_cases = parsed.get('useCases', [])
+        else:
+            use_cases = parsed
+        if not isinstance(use_cases, list):
+            raise ValueError(f"Unexpected use case output for {name}")
+        if truncated:
+            print(f"⚠️ WARNING: Use cases for {name} were truncated, keeping {len(use_cases)}")
+        return [uc for uc in use_cases if isinstance(uc, dict)], truncated
+    
+    def _map_website_chunks(self, url: str, pages: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Map step for very large websites: extract notes from each content chunk
+        concurrently with the cheaper chunk model and merge them into the
+        content block for the website prompt (the reduce call). The notes of
+        all chunks together are capped at the content token budget, so the
+        reduce call reads no more than a packed single call would. Failed
+        chunks are skipped; returns None if every chunk failed.
+        """
+        chunks = chunk_pages(pages, self.content_token_budget, self.map_reduce_chunks)
+        if len(chunks) < 2:
+            return None
+        notes_tokens = max(256, min(1000, self.content_token_budget // len(chunks)))
+        
+        print(f"Reading {url} in {len(chunks)} chunks concurrently...")
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            futures = [executor.submit(in_context(self._website_chunk_notes), url, chunk, notes_tokens)
+                       for chunk in chunks]
+            notes = []
+            for index, future in enumerate(futures):
+                try:
+                    notes.append(future.result())
+                except Exception as e:
+                    print(f"❌ Notes for chunk {index + 1} of {url} failed: {e}")
+        if not notes:
+            return None
+        
+        home = pages[0]
+        meta = f"META DESCRIPTION: {home['metaDescription']}\n\n" if home.get("metaDescription") else ""
+        return (f"URL: {home['url']}\n\n{meta}"
+                f"The site was too large to include in full. These notes were extracted from "
+                f"{len(notes)} sections of its pages:\n"
+                f"{json.dumps(self._merge_website_notes(notes), indent=2)}\n\n")
     
-    def _scrape_website(self, url: str) -> str:
+    def _website_chunk_notes(self, url: str, chunk: str, max_tokens: int = 1000) -> Dict[str, Any]:
         """
-        Scrape content from a website
+        Notes call for one chunk of a large website
         """
+        prompt = f"""Extract company facts from this section of the website {url}.
+Only include what the text states; use null or [] when it says nothing.
+
+Return ONLY valid JSON in this format:
+{{
+  "companyName": "string or null",
+  "industry": "string or null",
+  "employees": "headcount or size as stated, or null",
+  "founded": "string or null",
+  "locations": ["headquarters, offices, markets"],
+  "products": ["product names and what they do"],
+  "services": ["services offered"],
+  "customers": ["target segments or named customers"],
+  "technologies": ["technologies or platforms mentioned"],
+  "businessModel": "string or null",
+  "otherFacts": ["other facts relevant to company size, operations or AI readiness"]
+}}
+
+WEBSITE SECTION:
+{chunk}"""
+        response = self._create_message(
+            "website_chunk_notes",
+            model=self.CHUNK_MODEL,
+            max_tokens=max_tokens,
+            system="You are a JSON-only response bot. Return ONLY valid JSON with no explanation.",
+            messages=[{"role": "user", "content": prompt}]
+        )
+        
         try:
-            # Add protocol if not present
-            if not url.startswith(('http://', 'https://')):
-                url = 'https://' + url
-                
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.extract()
-            
-            # Get text and clean it
-            text = soup.get_text(separator='\n')
-            
-            # Clean up text (remove extra whitespace)
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            # Extract meta description for additional context
-            meta_desc = ""
-            meta_tag = soup.find("meta", attrs={"name": "description"})
-            if meta_tag and "content" in meta_tag.attrs:
-                meta_desc = f"META DESCRIPTION: {meta_tag['content']}\n\n"
-            
-            # Extract key pages: About Us, Products, Services
-            about_links = soup.find_all("a", text=lambda t: t and any(x in t.lower() for x in ["about", "about us", "company"]))
-            
-            # Combine everything
-            full_content = f"URL: {url}\n\n{meta_desc}MAIN PAGE CONTENT:\n{text}\n\n"
-            
-            return full_content
-            
+            parsed, _ = parse_json_response(response.content[0].text)
+        except json.JSONDecodeError:
+            record_parse_failure("website_chunk_notes")
+            raise
+        if not isinstance(parsed, dict):
+            raise ValueError("Expected a JSON object")
+        return parsed
+    
+    @staticmethod
+    def _merge_website_notes(notes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Union the chunk notes field by field, keeping the first occurrence of
+        each distinct value
+        """
+        merged: Dict[str, List[Any]] = {}
+        for note in notes:
+            for field, value in note.items():
+                values = value if isinstance(value, list) else [value]
+                bucket = merged.setdefault(field, [])
+                for item in values:
+                    if item in (None, "", [], {}) or item in bucket:
+                        continue
+                    bucket.append(item)
+        return {field: values for field, values in merged.items() if values}
+    
+    def _scrape_website(self, url: str) -> List[Dict[str, Any]]:
+        """
+        Crawl a website: the home page plus its About/Products/Services/Careers
+        pages, or an empty list if the site cannot be fetched
+        """
+        try:
+            return self.crawler.crawl(url)
         except Exception as e:
             print(f"Error scraping {url}: {e}")
-            return ""
+            return []
     
     def _get_default_use_cases(self) -> Dict[str, Any]:
         """
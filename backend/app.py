@@ -8,13 +8,17 @@ Author: Luka
 Date: February 25, 2025
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import os
 import json
 import logging
+import hmac
 import re
+import threading
+import time
 from pathlib import Path
+import numpy as np
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -22,8 +26,15 @@ load_dotenv()
 
 # Import our analyzers
 from analyzers.company_analyzer import CompanyAnalyzer
+from utils.benchmark_service import get_benchmark_service
+from utils.case_study_store import get_case_study_store
+from utils.job_queue import JobQueue, QueueFullError
+from utils.memory import MemoryTracker
+from utils.profiler import ProfileStore, SamplingProfiler
+from utils import metrics, tracing
+from utils.roi_calculator import ROICalculator
+from utils.use_case_roi import recompute_roi
 # We'll implement these other modules later
-# from utils.roi_calculator import ROICalculator
 # from utils.use_case_matcher import UseCaseMatcher
 
 # Setup logging
@@ -71,6 +82,252 @@ except Exception as e:
     logger.error(f"Failed to initialize company analyzer: {e}")
     company_analyzer = None
 
+# Benchmarks are loaded once and shared by the benchmark and ROI endpoints
+benchmark_service = get_benchmark_service()
+
+try:
+    roi_calculator = ROICalculator(benchmark_service)
+except Exception as e:
+    logger.error(f"Failed to initialize ROI calculator: {e}")
+    roi_calculator = None
+
+# Bearer token for GET /api/metrics (the Prometheus "authorization" scrape
+# setting); the endpoint is disabled while METRICS_TOKEN is unset
+metrics_token = os.environ.get("METRICS_TOKEN", "")
+
+# Optional JSON-lines log of per-request stage timings, keyed by request id
+trace_log = None
+if os.environ.get("TRACE_LOG_PATH"):
+    try:
+        trace_log = tracing.TraceLog(os.environ["TRACE_LOG_PATH"])
+    except Exception as e:
+        logger.error(f"Failed to open trace log: {e}")
+
+# Admin-only features (request profiling) are disabled unless ADMIN_TOKEN is set
+admin_token = os.environ.get("ADMIN_TOKEN", "")
+profile_store = ProfileStore(
+    os.environ.get("PROFILE_DIR") or None,
+    max_files=int(os.environ.get("PROFILE_MAX_FILES", 50)),
+    max_age_seconds=float(os.environ.get("PROFILE_MAX_AGE_DAYS", 7)) * 24 * 3600
+)
+profile_interval = float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000
+# One profiled request at a time: the sampler walks every thread's stack
+profile_lock = threading.Lock()
+
+# Per-request peak memory and allocation sites via tracemalloc; off by default
+# because tracing slows down every allocation
+memory_tracker = MemoryTracker(frames=int(os.environ.get("TRACEMALLOC_FRAMES", 1)))
+# Upper bound on traceback frames per allocation set at runtime
+MAX_TRACEMALLOC_FRAMES = 100
+if os.environ.get("MEMORY_TRACKING", "").lower() in ("1", "true", "yes"):
+    memory_tracker.start()
+
+# Background jobs for long analyses, so a slow Claude call doesn't hold a request thread
+job_queue = None
+if company_analyzer:
+    try:
+        job_queue = JobQueue(
+            path=os.environ.get("JOB_DB_PATH"),
+            max_workers=int(os.environ.get("JOB_WORKERS", 2)),
+            max_pending=int(os.environ.get("JOB_MAX_PENDING", 50))
+        )
+        job_queue.register("analyze-and-match", lambda params: company_analyzer.analyze_and_match_combined(
+            params["description"], params.get("correctedData"), refresh=bool(params.get("refresh")),
+            fan_out=params.get("mode") == "fanout"
+        ))
+        job_queue.resume()
+    except Exception as e:
+        logger.error(f"Failed to initialize job queue: {e}")
+        job_queue = None
+
+
+@app.before_request
+def start_request_trace():
+    g.request_start = time.perf_counter()
+    g.trace = tracing.start_trace(request.headers.get("X-Request-ID") or None)
+    g.memory_token = memory_tracker.begin_request()
+
+
+def is_admin_request() -> bool:
+    """
+    True if the request carries the configured admin token in X-Admin-Token
+    """
+    supplied = request.headers.get("X-Admin-Token", "")
+    return bool(admin_token) and hmac.compare_digest(supplied.encode(), admin_token.encode())
+
+
+@app.before_request
+def start_request_profile():
+    """
+    Profile this request when an admin asks for it with an X-Profile: 1 header
+    or ?profile=1
+    """
+    if request.headers.get("X-Profile") != "1" and request.args.get("profile") != "1":
+        return
+    if not is_admin_request():
+        return
+    if not profile_lock.acquire(blocking=False):
+        logger.info("Profiling skipped: another request is being profiled")
+        return
+    route = request.url_rule.rule if request.url_rule else request.path
+    g.profile_name = profile_store.name_for(f"{request.method}-{route}-{g.trace.request_id}")
+    g.profiler = SamplingProfiler(interval=profile_interval).start()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Count the request and observe its latency under its route pattern, and
+    return the stage timings recorded so far as a Server-Timing header. For
+    streamed responses both cover the time until the stream starts.
+    """
+    start = getattr(g, "request_start", None)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    if start is not None:
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - start, route=route, method=request.method)
+
+    trace = getattr(g, "trace", None)
+    if trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["X-Request-ID"] = trace.request_id
+        g.response_status = response.status_code
+    if getattr(g, "profiler", None) is not None:
+        response.headers["X-Profile-Id"] = g.profile_name
+    token = getattr(g, "memory_token", None)
+    if token is not None:
+        _, peak = memory_tracker.peak_so_far(token)
+        response.headers["X-Memory-Peak"] = str(peak)
+    return response
+
+
+@app.teardown_request
+def finish_request_trace(exc):
+    """
+    Write the finished trace (including streamed work) to the trace log
+    """
+    trace = getattr(g, "trace", None)
+    if trace is not None and trace_log is not None and trace.spans:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        trace_log.write(trace, method=request.method, route=route, path=request.path,
+                        status=getattr(g, "response_status", 500), error=str(exc) if exc else None,
+                        memory=getattr(g, "memory", None))
+    tracing.end_trace()
+
+
+@app.teardown_request
+def finish_request_profile(exc):
+    """
+    Stop the profiler once the response (including a stream) is done and
+    save its collapsed stacks
+    """
+    profiler = getattr(g, "profiler", None)
+    if profiler is None:
+        return
+    try:
+        profiler.stop()
+        profile_store.save(g.profile_name, profiler)
+    except Exception as e:
+        logger.error(f"Failed to save profile: {e}")
+    finally:
+        g.profiler = None
+        profile_lock.release()
+
+
+@app.teardown_request
+def finish_request_memory(exc):
+    """
+    Record the request's peak memory once the response (including a stream)
+    is done. Runs before finish_request_trace, which logs it with the trace.
+    """
+    g.memory = memory_tracker.end_request(getattr(g, "memory_token", None))
+    g.memory_token = None
+    if g.memory is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.REQUEST_MEMORY_PEAK.observe(g.memory["peakBytes"], route=route,
+                                            overlapped=str(g.memory["overlapped"]).lower())
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Request, Claude latency, token and cost metrics in the Prometheus text
+    format. Requires "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    supplied = request.headers.get("Authorization", "")
+    if not metrics_token or not hmac.compare_digest(supplied.encode(), f"Bearer {metrics_token}".encode()):
+        return jsonify({"error": "Metrics token required"}), 403
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    Saved request profiles, newest first (admin only)
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    return jsonify({"profiles": profile_store.list()})
+
+
+@app.route('/api/admin/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """
+    Download a saved profile as collapsed stacks (admin only)
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    path = profile_store.path(name)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(path, mimetype="text/plain")
+
+
+@app.route('/api/admin/memory', methods=['GET'])
+def memory_snapshot():
+    """
+    Current and peak traced memory and the top allocation sites (admin only).
+    Query parameters: limit (default 25), group_by (lineno, filename or
+    traceback) and compare=1 to rank sites by growth since the previous call.
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    try:
+        snapshot = memory_tracker.snapshot(
+            limit=max(1, min(int(request.args.get("limit", 25)), 500)),
+            group_by=request.args.get("group_by", "lineno"),
+            compare=request.args.get("compare") == "1"
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(snapshot)
+
+
+@app.route('/api/admin/memory', methods=['POST'])
+def configure_memory_tracking():
+    """
+    Turn memory tracking on or off at runtime (admin only), e.g.
+    {"enabled": true, "frames": 10}
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    data = request.json or {}
+    if "enabled" not in data:
+        return jsonify({"error": "enabled is required"}), 400
+    frames = None
+    if data.get("frames") is not None:
+        try:
+            frames = int(data["frames"])
+        except (TypeError, ValueError):
+            return jsonify({"error": "frames must be an integer"}), 400
+        if not 1 <= frames <= MAX_TRACEMALLOC_FRAMES:
+            return jsonify({"error": f"frames must be between 1 and {MAX_TRACEMALLOC_FRAMES}"}), 400
+    if data["enabled"]:
+        memory_tracker.start(frames)
+    else:
+        memory_tracker.stop()
+    return jsonify({"enabled": memory_tracker.enabled, "frames": memory_tracker.frames})
+
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -82,7 +339,12 @@ def health_check():
         "api_key_configured": bool(api_key),
         "analyzers_ready": {
             "company_analyzer": company_analyzer is not None
-        }
+        },
+        "result_cache": company_analyzer.result_cache.stats() if company_analyzer and company_analyzer.result_cache else None,
+        "page_cache": company_analyzer.crawler.cache.stats() if company_analyzer and company_analyzer.crawler.cache else None,
+        "jobs": job_queue.stats() if job_queue else None,
+        "templates": {"version": company_analyzer.templates.version} if company_analyzer else None,
+        "benchmarks": {"version": benchmark_service.version, "source": benchmark_service.snapshot().source}
     })
 
 
@@ -102,7 +364,7 @@ def analyze_website():
     
     try:
         logger.info(f"Analyzing website: {url}")
-        analysis = company_analyzer.analyze_website(url)
+        analysis = company_analyzer.analyze_website(url, refresh=bool(data.get('refresh')))
         return jsonify(analysis)
     except Exception as e:
         logger.error(f"Error analyzing website {url}: {e}")
@@ -125,7 +387,7 @@ def analyze_description():
     
     try:
         logger.info(f"Analyzing company description")
-        analysis = company_analyzer.analyze_description(description)
+        analysis = company_analyzer.analyze_description(description, refresh=bool(data.get('refresh')))
         return jsonify(analysis)
     except Exception as e:
         logger.error(f"Error analyzing company description: {e}")
@@ -159,6 +421,7 @@ def match_use_cases():
 def analyze_and_match():
     """
     ONE endpoint that analyzes company AND returns use cases - no more context loss!
+    Pass "mode": "fanout" to generate each business function's use cases in parallel.
     """
     if not company_analyzer:
         return jsonify({"error": "Company analyzer not initialized"}), 500
@@ -168,51 +431,150 @@ def analyze_and_match():
         return jsonify({"error": "Company description is required"}), 400
         
     description = data['description']
-    corrected_data = data.get('correctedData', None)  # Optional corrected data from user review
+    try:
+        corrected_data = _corrected_data(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "correctedData must be a JSON object"}), 400
     
-    # Ensure corrected_data is either None or a dict
-    if corrected_data is not None and not isinstance(corrected_data, dict):
-        try:
-            # Try to parse if it's a JSON string
-            corrected_data = json.loads(corrected_data)
-        except:
-            return jsonify({"error": "correctedData must be a JSON object"}), 400
+    # Server-Sent Events mode: push each business function as soon as it is generated
+    if data.get('stream') is True or 'text/event-stream' in request.headers.get('Accept', ''):
+        return _stream_analyze_and_match(description, corrected_data, bool(data.get('refresh')))
     
     try:
         logger.info("Analyzing and matching company in ONE step")
-        result = company_analyzer.analyze_and_match_combined(description, corrected_data)
+        result = company_analyzer.analyze_and_match_combined(
+            description, corrected_data, refresh=bool(data.get('refresh')), fan_out=data.get('mode') == 'fanout'
+        )
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error in combined analysis: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+def _corrected_data(data):
+    """
+    Optional corrected data from user review: None, a dict, or a JSON string of one
+    """
+    corrected_data = data.get('correctedData', None)
+    if corrected_data is not None and not isinstance(corrected_data, dict):
+        # Try to parse if it's a JSON string
+        corrected_data = json.loads(corrected_data)
+        if not isinstance(corrected_data, dict):
+            raise ValueError("correctedData must be a JSON object")
+    return corrected_data
+
+
+@app.route('/api/jobs/analyze-and-match', methods=['POST'])
+def submit_analyze_and_match_job():
+    """
+    Queue a combined analysis and return its job id right away.
+    Poll GET /api/jobs/<job_id> for the result.
+    """
+    if not job_queue:
+        return jsonify({"error": "Job queue not initialized"}), 500
+        
+    data = request.json
+    if not data or 'description' not in data:
+        return jsonify({"error": "Company description is required"}), 400
+    
+    try:
+        corrected_data = _corrected_data(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "correctedData must be a JSON object"}), 400
+    
+    try:
+        job = job_queue.submit("analyze-and-match", {
+            "description": data['description'],
+            "correctedData": corrected_data,
+            "refresh": bool(data.get('refresh')),
+            "mode": data.get('mode')
+        })
+    except QueueFullError as e:
+        logger.warning(f"Rejected analysis job: {e}")
+        return jsonify({"error": "Too many analyses in progress, please retry shortly"}), 503, {"Retry-After": "30"}
+    except Exception as e:
+        logger.error(f"Error submitting analysis job: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    logger.info(f"Queued analysis job {job['id']}")
+    job["statusUrl"] = f"/api/jobs/{job['id']}"
+    return jsonify(job), 202, {"Location": job["statusUrl"]}
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Status of a background job, with its result or error once finished
+    """
+    if not job_queue:
+        return jsonify({"error": "Job queue not initialized"}), 500
+    
+    try:
+        job = job_queue.get(job_id)
+    except Exception as e:
+        logger.error(f"Error reading job {job_id}: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    if job is None:
+        return jsonify({"error": f"Job {job_id} not found"}), 404
+    return jsonify(job)
+
+
+def _sse_event(event, payload):
+    """
+    Format one Server-Sent Event
+    """
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _stream_analyze_and_match(description, corrected_data, refresh):
+    """
+    Stream the combined analysis as Server-Sent Events
+    """
+    def generate():
+        try:
+            logger.info("Streaming combined analysis")
+            for event, payload in company_analyzer.analyze_and_match_combined_stream(description, corrected_data, refresh=refresh):
+                yield _sse_event(event, payload)
+        except Exception as e:
+            logger.error(f"Error in streaming combined analysis: {e}")
+            yield _sse_event("error", {"error": str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so events arrive immediately
+        }
+    )
+
+
 @app.route('/api/benchmarks', methods=['GET'])
 def get_benchmarks():
     """
     Get benchmarks for ROI calculator
     """
     try:
-        # Try to load the simplified benchmarks file first
-        benchmarks_path = os.path.join(os.path.dirname(__file__), "data", "benchmarks", "simplified_benchmarks.json")
-        
-        # If that doesn't exist, try the detailed benchmarks file
-        if not os.path.exists(benchmarks_path):
-            benchmarks_path = os.path.join(os.path.dirname(__file__), "data", "benchmarks", "benchmarks.json")
-        
-        # If that doesn't exist either, try the default benchmarks
-        if not os.path.exists(benchmarks_path):
-            benchmarks_path = os.path.join(os.path.dirname(__file__), "data", "benchmarks", "default_benchmarks.json")
-        
-        # If none exist, return an error
-        if not os.path.exists(benchmarks_path):
+        snapshot = benchmark_service.snapshot()
+        if snapshot.source == "builtin":
+            # The built-in defaults back the ROI calculations, but the endpoint
+            # only serves benchmark data that exists on disk
             return jsonify({"error": "Benchmark data not available"}), 404
+
+        etag = f'"{snapshot.version}"'
+        if request.if_none_match.contains(snapshot.version):
+            return Response(status=304, headers={"ETag": etag})
         
-        # Load and return the benchmarks
-        with open(benchmarks_path, 'r') as f:
-            benchmarks = json.load(f)
-            
-        return jsonify(benchmarks)
+        return Response(
+            snapshot.body,
+            mimetype="application/json",
+            headers={
+                "ETag": etag,
+                "Cache-Control": "no-cache",  # Revalidate with If-None-Match
+                "X-Benchmarks-Source": snapshot.source
+            }
+        )
     except Exception as e:
         logger.error(f"Error retrieving benchmarks: {e}")
         return jsonify({"error": str(e)}), 500
@@ -237,23 +599,10 @@ def calculate_roi():
         industry = data.get('industry', 'Technology')
         use_case = data.get('useCase', 'Customer Service')
         
-        # Load benchmarks
-        benchmarks_path = os.path.join(os.path.dirname(__file__), "data", "benchmarks", "simplified_benchmarks.json")
-        
-        if not os.path.exists(benchmarks_path):
-            benchmarks_path = os.path.join(os.path.dirname(__file__), "data", "benchmarks", "default_benchmarks.json")
-        
-        if not os.path.exists(benchmarks_path):
-            return jsonify({"error": "Benchmark data not available"}), 500
-        
-        with open(benchmarks_path, 'r') as f:
-            benchmarks = json.load(f)
-        
-        # Get industry benchmarks
-        industry_data = benchmarks.get('industries', {}).get(industry, benchmarks.get('industries', {}).get('Other', {}))
-        
-        # Get use case benchmarks
-        use_case_data = benchmarks.get('use_cases', {}).get(use_case, benchmarks.get('use_cases', {}).get('Other', {}))
+        # Benchmarks with industry/use case fallbacks already resolved
+        snapshot = benchmark_service.snapshot()
+        industry_data = snapshot.industry(industry)
+        use_case_data = snapshot.use_case(use_case)
         
         # Calculate annual cost of current process
         weekly_hours = num_employees * hours_per_week
@@ -303,11 +652,7 @@ def calculate_roi():
         max_roi = ((annual_cost * (automation_level * max_savings) - implementation_cost) / implementation_cost) * 100
         
         # Get case studies for this industry and use case
-        related_case_studies = []
-        if 'case_studies' in benchmarks:
-            if industry in benchmarks['case_studies']:
-                if use_case in benchmarks['case_studies'][industry]:
-                    related_case_studies = benchmarks['case_studies'][industry][use_case]
+        related_case_studies = snapshot.case_studies(industry, use_case)
         
         # Return the results
         return jsonify({
@@ -321,7 +666,8 @@ def calculate_roi():
             "relatedCaseStudies": related_case_studies,
             "benchmarks": {
                 "industry": industry_data,
-                "useCase": use_case_data
+                "useCase": use_case_data,
+                "version": snapshot.version
             }
         })
     except Exception as e:
@@ -329,20 +675,229 @@ def calculate_roi():
         return jsonify({"error": str(e)}), 500
 
 
+# Upper bound on scenarios per batch request
+MAX_BATCH_SCENARIOS = int(os.environ.get("MAX_BATCH_SCENARIOS", 100000))
+
+
+def _json_array(values, decimals=2):
+    """
+    Round a NumPy array into a JSON list, with null for non-finite values
+    """
+    rounded = np.round(values, decimals)
+    return [float(v) if np.isfinite(v) else None for v in rounded.tolist()]
+
+
+def _scenario_columns(scenarios):
+    """
+    ROICalculator scenario columns present in a request body
+    """
+    return {
+        name: scenarios[name]
+        for name in ("employees", "hourly_rate", "hours_per_week", "automation_level", "industry", "use_case")
+        if name in scenarios
+    }
+
+
+@app.route('/api/calculate-roi/batch', methods=['POST'])
+def calculate_roi_batch():
+    """
+    Calculate ROI for many scenarios in one request.
+    Takes columnar arrays (employees, hourly_rate, hours_per_week,
+    automation_level, industry, use_case) and returns columnar results.
+    """
+    if not roi_calculator:
+        return jsonify({"error": "ROI calculator not initialized"}), 500
+    
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    scenarios = data.get('scenarios', data)
+    if not isinstance(scenarios, dict):
+        return jsonify({"error": "scenarios must be an object of columns"}), 400
+    
+    columns = _scenario_columns(scenarios)
+    lengths = {len(v) for v in columns.values() if isinstance(v, list)}
+    if lengths and max(lengths) > MAX_BATCH_SCENARIOS:
+        return jsonify({"error": f"At most {MAX_BATCH_SCENARIOS} scenarios per request"}), 400
+    
+    try:
+        result = roi_calculator.calculate_roi_batch(**columns)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error calculating batch ROI: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    def ranges(values, decimals=2):
+        return {key: _json_array(column, decimals) for key, column in values.items()}
+    
+    return jsonify({
+        "count": int(result["implementationCost"].size),
+        "costSavings": ranges(result["costSavings"]),
+        "implementationCost": _json_array(result["implementationCost"]),
+        "roi": ranges(result["roi"]),
+        "paybackPeriod": ranges(result["paybackPeriod"], 1),
+        "timeSavings": ranges(result["timeSavings"])
+    })
+
+
+# Upper bound on cells per sensitivity grid request
+MAX_GRID_CELLS = int(os.environ.get("MAX_GRID_CELLS", 1000000))
+
+
+@app.route('/api/calculate-roi/grid', methods=['POST'])
+def calculate_roi_grid():
+    """
+    ROI sensitivity grid (heatmap) over two or three parameters.
+    Takes "axes" in order, e.g. {"automation_level": {"min": 10, "max": 90,
+    "steps": 9}, "hourly_rate": [30, 50, 80]}, plus fixed values for the other
+    parameters. Grid values are returned as flat row-major arrays with "shape".
+    """
+    if not roi_calculator:
+        return jsonify({"error": "ROI calculator not initialized"}), 500
+    
+    data = request.json
+    if not data or not isinstance(data.get('axes'), dict):
+        return jsonify({"error": "axes must be an object of parameter ranges"}), 400
+    
+    axes = data['axes']
+    fixed = {name: value for name, value in _scenario_columns(data).items() if name not in axes}
+    try:
+        cells = 1
+        for name, spec in axes.items():
+            cells *= int(spec.get('steps', 10)) if isinstance(spec, dict) else len(spec)
+        if cells > MAX_GRID_CELLS:
+            return jsonify({"error": f"Grid must not exceed {MAX_GRID_CELLS} cells"}), 400
+        grid = roi_calculator.calculate_roi_grid(axes, **fixed)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error calculating ROI grid: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    def ranges(values, decimals=2):
+        return {key: _json_array(column.ravel(), decimals) for key, column in values.items()}
+    
+    return jsonify({
+        "axes": [{"name": axis["name"], "values": _json_array(axis["values"], 4)} for axis in grid["axes"]],
+        "shape": list(grid["shape"]),
+        "order": "row-major",
+        "costSavings": ranges(grid["costSavings"]),
+        "implementationCost": _json_array(grid["implementationCost"].ravel()),
+        "roi": ranges(grid["roi"]),
+        "paybackPeriod": ranges(grid["paybackPeriod"], 1),
+        "timeSavings": ranges(grid["timeSavings"])
+    })
+
+
+# Upper bound on scenarios x samples per simulation request
+MAX_SIMULATION_DRAWS = int(os.environ.get("MAX_SIMULATION_DRAWS", 10000000))
+
+
+@app.route('/api/calculate-roi/simulate', methods=['POST'])
+def simulate_roi():
+    """
+    Monte Carlo ROI simulation over the benchmark min/median/max ranges.
+    Takes the same columns as /api/calculate-roi/batch plus samples,
+    distribution ("pert" or "triangular"), percentiles and seed, and returns
+    P5/P50/P95 (or the requested percentiles) per scenario. Only the time
+    savings range is sampled ("sampled" in the response); the benchmark
+    cost_savings ranges are not used and costs are point values.
+    """
+    if not roi_calculator:
+        return jsonify({"error": "ROI calculator not initialized"}), 500
+    
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    scenarios = data.get('scenarios', data)
+    if not isinstance(scenarios, dict):
+        return jsonify({"error": "scenarios must be an object of columns"}), 400
+    
+    columns = _scenario_columns(scenarios)
+    samples = data.get('samples', 10000)
+    percentiles = data.get('percentiles', [5, 50, 95])
+    count = max([len(v) for v in columns.values() if isinstance(v, list)] or [1])
+    try:
+        if count * int(samples) > MAX_SIMULATION_DRAWS:
+            return jsonify({"error": f"scenarios x samples must not exceed {MAX_SIMULATION_DRAWS}"}), 400
+        result = roi_calculator.simulate_roi(
+            **columns,
+            samples=samples,
+            distribution=data.get('distribution', 'pert'),
+            percentiles=percentiles,
+            seed=data.get('seed')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error simulating ROI: {e}")
+        return jsonify({"error": str(e)}), 500
+    
+    labels = [f"p{p:g}" for p in result["percentiles"]]
+    
+    def by_percentile(values, decimals=2):
+        return {label: _json_array(values[:, i], decimals) for i, label in enumerate(labels)}
+    
+    return jsonify({
+        "count": int(result["implementationCost"].size),
+        "samples": int(samples),
+        "distribution": data.get('distribution', 'pert'),
+        "sampled": result["sampled"],
+        "implementationCost": _json_array(result["implementationCost"]),
+        "costSavings": by_percentile(result["costSavings"]),
+        "roi": by_percentile(result["roi"]),
+        "paybackPeriod": by_percentile(result["paybackPeriod"], 1),
+        "timeSavings": by_percentile(result["timeSavings"])
+    })
+
+
+@app.route('/api/recalculate-roi', methods=['POST'])
+def recalculate_roi():
+    """
+    Recompute ROI figures of a previous analysis after the user edits employee
+    counts, salaries, hours or time savings - no Claude call needed
+    """
+    data = request.json
+    if not data or not isinstance(data.get('result'), dict):
+        return jsonify({"error": "Previous analysis result is required"}), 400
+    
+    edits = data.get('edits') or {}
+    if not isinstance(edits, dict):
+        return jsonify({"error": "edits must be a JSON object"}), 400
+    
+    try:
+        return jsonify(recompute_roi(data['result'], edits))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error recalculating ROI: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/api/case-studies', methods=['GET'])
 def get_case_studies():
     """
     Get all case studies from all_120_case_studies.json
-    """
-    case_studies_path = os.path.join(os.path.dirname(__file__), "data", "case_studies", "all_120_case_studies.json")
     
+    Optional query parameters narrow the list using the store's indexes:
+    industry, region, companySize, function
+    """
     try:
-        # Load all case studies
-        with open(case_studies_path, 'r') as f:
-            all_case_studies = json.load(f)
+        # Served from the shared in-memory store (reloaded when the file changes)
+        snapshot = get_case_study_store().snapshot()
+        
+        filters = {
+            "industry": request.args.get('industry'),
+            "region": request.args.get('region'),
+            "company_size": request.args.get('companySize'),
+            "business_function": request.args.get('function'),
+        }
+        if any(filters.values()):
+            return jsonify({"case_studies": snapshot.filter(**filters)})
         
         # Return the full list
-        return jsonify({"case_studies": all_case_studies})
+        return jsonify({"case_studies": snapshot.case_studies})
     except FileNotFoundError:
         return jsonify({"message": "Case studies file not found"}), 404
     except Exception as e:
@@ -359,28 +914,11 @@ def get_case_study(case_id):
     if not re.match(r'^[a-zA-Z0-9_-]+$', case_id):
         return jsonify({"error": "Invalid case study ID"}), 400
     
-    case_studies_path = os.path.join(os.path.dirname(__file__), "data", "case_studies", "all_120_case_studies.json")
-    
     try:
-        # Load all case studies
-        with open(case_studies_path, 'r') as f:
-            all_case_studies = json.load(f)
-        
-        # Find the specific case study by ID
-        for cs in all_case_studies:
-            if cs.get('id') == case_id:
-                return jsonify(cs)
-        
-        # If not found, try with underscore/hyphen variations
-        case_id_variants = [
-            case_id.replace('_', '-'),
-            case_id.replace('-', '_')
-        ]
-        
-        for variant in case_id_variants:
-            for cs in all_case_studies:
-                if cs.get('id') == variant:
-                    return jsonify(cs)
+        # Id index lookup, including underscore/hyphen variations
+        cs = get_case_study_store().get(case_id)
+        if cs is not None:
+            return jsonify(cs)
         
         # If we get here, the case study wasn't found
         return jsonify({"error": f"Case study '{case_id}' not found"}), 404
@@ -505,5 +1043,11 @@ if __name__ == '__main__':
     os.makedirs(os.path.join(os.path.dirname(__file__), "data", "templates"), exist_ok=True)
     os.makedirs(os.path.join(os.path.dirname(__file__), "data", "benchmarks"), exist_ok=True)
     
+    # Extraction worker processes are started by a forkserver, which imports
+    # the main module; this one starts the analyzer and job queue on import,
+    # so the development server extracts pages inline instead
+    if company_analyzer:
+        company_analyzer.crawler.extract_processes = 0
+    
     # Start the server
     app.run(debug=True, host='0.0.0.0', port=5001)
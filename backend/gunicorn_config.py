@@ -9,7 +9,10 @@ bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
 
 # Worker processes
 workers = 1  # Keep it simple for now
-worker_class = "sync"
+# Threaded worker so identical in-flight analyses can be coalesced and a long
+# Claude call doesn't block every other request
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
 
 # Timeout - increased to 5 minutes for Anthropic API calls
 timeout = 300  # 5 minutes
@@ -0,0 +1,9 @@
+"""
+Test configuration: the backend modules import each other as top-level
+packages (utils.*, analyzers.*), as they do when app.py runs from backend/.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
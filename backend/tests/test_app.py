@@ -0,0 +1,57 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_metrics_require_the_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(app_module, "metrics_token", "")
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer "}).status_code == 403
+
+    monkeypatch.setattr(app_module, "metrics_token", "secret")
+    assert client.get("/api/metrics").status_code == 403
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+    response = client.get("/api/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert "# TYPE http_requests_total counter" in response.get_data(as_text=True)
+
+
+def test_responses_carry_server_timing_and_request_id(client):
+    response = client.get("/api/health", headers={"X-Request-ID": "abc123"})
+
+    assert response.headers["X-Request-ID"] == "abc123"
+    assert "total;dur=" in response.headers["Server-Timing"]
+
+
+@pytest.fixture
+def admin(client, monkeypatch):
+    monkeypatch.setattr(app_module, "admin_token", "admin-secret")
+    yield {"X-Admin-Token": "admin-secret"}
+    app_module.memory_tracker.stop()
+
+
+@pytest.mark.parametrize("frames", ["abc", -1, 0, 101, 10 ** 9, [1]])
+def test_memory_tracking_rejects_invalid_frames(client, admin, frames):
+    response = client.post("/api/admin/memory", json={"enabled": True, "frames": frames}, headers=admin)
+
+    assert response.status_code == 400
+    assert "frames" in response.get_json()["error"]
+    assert not app_module.memory_tracker.enabled
+
+
+def test_memory_tracking_can_be_turned_on_and_off(client, admin):
+    assert client.post("/api/admin/memory", json={"enabled": True}).status_code == 403
+
+    response = client.post("/api/admin/memory", json={"enabled": True, "frames": 5}, headers=admin)
+    assert response.get_json() == {"enabled": True, "frames": 5}
+    assert client.get("/api/admin/memory?limit=3", headers=admin).status_code == 200
+    assert client.get("/api/admin/memory?limit=abc", headers=admin).status_code == 400
+
+    response = client.post("/api/admin/memory", json={"enabled": False}, headers=admin)
+    assert response.get_json()["enabled"] is False
@@ -0,0 +1,37 @@
+import json
+import os
+
+from utils.benchmark_service import BenchmarkService, DEFAULT_TIME_SAVINGS
+
+
+def test_builtin_defaults_when_no_file(tmp_path):
+    snapshot = BenchmarkService(str(tmp_path), check_interval=0).snapshot()
+
+    assert snapshot.source == "builtin"
+    assert "Technology" in snapshot.industries
+
+
+def test_loads_file_and_picks_up_changes(tmp_path):
+    path = tmp_path / "benchmarks.json"
+    path.write_text(json.dumps({"industries": {"Other": {"time_savings": {"median": 0.2}}}}))
+    service = BenchmarkService(str(tmp_path), check_interval=0)
+
+    first = service.snapshot()
+    assert first.source == "benchmarks.json"
+    assert first.resolve("Retail", "Unknown")[2] == {"median": 0.2}
+
+    path.write_text(json.dumps({"industries": {}}))
+    os.utime(path, ns=(0, 0))
+    second = service.snapshot()
+    assert second.version != first.version
+    assert second.resolve("Retail", "Unknown")[2] == DEFAULT_TIME_SAVINGS
+
+
+def test_broken_file_keeps_last_good_snapshot(tmp_path):
+    path = tmp_path / "benchmarks.json"
+    path.write_text(json.dumps({"industries": {}}))
+    service = BenchmarkService(str(tmp_path), check_interval=0)
+    good = service.snapshot()
+
+    path.write_text("{not json")
+    assert service.snapshot() is good
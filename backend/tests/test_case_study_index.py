@@ -0,0 +1,87 @@
+import pytest
+
+from utils.case_study_index import CaseStudyIndex, query_text, tokenize
+
+CASE_STUDIES = [
+    {
+        "id": "bank",
+        "industry": "Financial Services",
+        "businessFunctions": [{"function": "Finance & Accounting", "useCaseTypes": ["Financial analysis"],
+                               "rolesAffected": ["Analysts"]}],
+        "implementation": {"useCases": ["Invoice review", "Audit preparation"]},
+        "results": {"quantitativeMetrics": [{"metric": "Audit time", "value": "50%", "context": "reduction"}]},
+    },
+    {
+        "id": "helpdesk",
+        "industry": "Software",
+        "businessFunctions": [{"function": "Customer Support", "useCaseTypes": ["Ticket triage"],
+                               "rolesAffected": ["Support agents"]}],
+        "implementation": {"useCases": ["Chat support"]},
+    },
+    {
+        "id": "devtools",
+        "industry": "Software",
+        "businessFunctions": [{"function": "Product & Engineering", "useCaseTypes": ["Code generation"]}],
+        "implementation": {"useCases": ["Coding assistant", "Documentation"]},
+    },
+    # Malformed entries are indexed without failing
+    {"id": "empty"},
+    {"id": "odd", "businessFunctions": ["not a dict"], "implementation": "text", "results": None},
+]
+
+FUNCTIONS = {
+    "Finance & Accounting": "finance accounting audit invoice",
+    "Customer Support": "customer support ticket chat",
+    "Product & Engineering": "software code documentation",
+}
+
+
+@pytest.fixture
+def index():
+    return CaseStudyIndex(CASE_STUDIES)
+
+
+def test_tokenize():
+    assert tokenize("The Agents are reviewing Invoices & P&L, and business") == [
+        "agent", "reviewing", "invoice", "p&l", "business"
+    ]
+
+
+def test_query_text_flattens_analysis():
+    analysis = {"companyInfo": {"name": "Acme", "employees": 50, "remote": True}, "tags": ["a", {"b": "c"}]}
+    assert query_text(analysis) == "Acme 50 a c"
+
+
+def test_search_ranks_matching_case_studies(index):
+    results = index.search("support tickets for our agents", top_k=5)
+
+    assert [cs["id"] for _, cs in results] == ["helpdesk"]
+    assert results[0][0] > 0
+
+
+def test_search_respects_top_k_and_ignores_unknown_terms(index):
+    assert len(index.search("software", top_k=1)) == 1
+    assert index.search("zzz unknownterm", top_k=5) == []
+
+
+def test_scores_of_empty_index():
+    assert CaseStudyIndex([]).scores("anything") == []
+    assert CaseStudyIndex([]).select_for_functions("anything", 3, FUNCTIONS) == []
+
+
+def test_select_covers_every_function_in_corpus_order(index):
+    selected = index.select_for_functions("Acme is a bank", top_k=1, functions=FUNCTIONS)
+
+    assert [cs["id"] for cs in selected] == ["bank", "helpdesk", "devtools"]
+
+
+def test_company_text_breaks_ties_within_a_function():
+    twins = [
+        {"id": "retail", "industry": "Retail", "businessFunctions": [{"function": "Customer Support"}]},
+        {"id": "airline", "industry": "Airline", "businessFunctions": [{"function": "Customer Support"}]},
+    ]
+    index = CaseStudyIndex(twins)
+    functions = {"Customer Support": "customer support"}
+
+    assert [cs["id"] for cs in index.select_for_functions("an airline", 1, functions)] == ["airline"]
+    assert [cs["id"] for cs in index.select_for_functions("a retail chain", 1, functions)] == ["retail"]
@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+from utils.case_study_store import CaseStudyStore
+
+CASE_STUDIES = [
+    {"id": "acme_corp", "industry": "Retail", "region": "Europe", "companySize": "Enterprise",
+     "businessFunctions": [{"function": "Customer Support"}, {"function": "customer support"}]},
+    {"id": "beta-labs", "industry": "retail", "region": "North America",
+     "businessFunctions": [{"function": "Sales"}, "not a dict"]},
+    {"id": "gamma", "industry": "Healthcare", "region": "Europe", "businessFunctions": None},
+]
+
+
+def _write(path, case_studies, mtime_ns=None):
+    path.write_text(json.dumps(case_studies))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "case_studies.json"
+    _write(path, CASE_STUDIES)
+    return path
+
+
+def test_lookup_by_id_tolerates_separator_variants(corpus):
+    store = CaseStudyStore(str(corpus))
+
+    assert store.get("acme_corp")["id"] == "acme_corp"
+    assert store.get("acme-corp")["id"] == "acme_corp"
+    assert store.get("beta_labs")["id"] == "beta-labs"
+    assert store.get("missing") is None
+
+
+def test_filter_is_case_insensitive_and_combines_attributes(corpus):
+    snapshot = CaseStudyStore(str(corpus)).snapshot()
+
+    assert [cs["id"] for cs in snapshot.filter(industry="RETAIL")] == ["acme_corp", "beta-labs"]
+    assert [cs["id"] for cs in snapshot.filter(industry="retail", region="europe")] == ["acme_corp"]
+    assert [cs["id"] for cs in snapshot.filter(business_function="customer support")] == ["acme_corp"]
+    assert snapshot.filter(industry="Retail", company_size="Startup") == []
+    assert len(snapshot.filter()) == 3
+
+
+def test_reloads_only_on_content_change(corpus):
+    store = CaseStudyStore(str(corpus), check_interval=0)
+    first = store.snapshot()
+
+    # Touched but unchanged: same snapshot
+    _write(corpus, CASE_STUDIES, mtime_ns=1)
+    assert store.snapshot() is first
+
+    _write(corpus, CASE_STUDIES[:1], mtime_ns=2)
+    second = store.snapshot()
+    assert second is not first
+    assert second.version != first.version
+    assert len(second) == 1
+
+
+def test_check_interval_limits_reloads(corpus):
+    store = CaseStudyStore(str(corpus), check_interval=3600)
+    first = store.snapshot()
+
+    _write(corpus, CASE_STUDIES[:1], mtime_ns=1)
+    assert store.snapshot() is first
+
+
+def test_broken_file_keeps_last_good_snapshot(corpus):
+    store = CaseStudyStore(str(corpus), check_interval=0)
+    good = store.snapshot()
+
+    corpus.write_text("[{not json")
+    assert store.snapshot() is good
+    corpus.unlink()
+    assert store.snapshot() is good
+
+
+def test_first_load_errors(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        CaseStudyStore(str(tmp_path / "missing.json")).snapshot()
+
+    path = tmp_path / "object.json"
+    path.write_text("{}")
+    with pytest.raises(ValueError, match="JSON array"):
+        CaseStudyStore(str(path)).snapshot()
+
+
+def test_derived_values_are_built_once_per_snapshot(corpus):
+    store = CaseStudyStore(str(corpus), check_interval=0)
+    builds = []
+
+    def build(snapshot):
+        builds.append(snapshot.version)
+        return len(snapshot)
+
+    assert store.snapshot().derived("count", build) == 3
+    assert store.snapshot().derived("count", build) == 3
+    assert len(builds) == 1
+
+    _write(corpus, CASE_STUDIES[:2], mtime_ns=1)
+    assert store.snapshot().derived("count", build) == 2
+    assert len(builds) == 2
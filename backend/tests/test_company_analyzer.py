@@ -0,0 +1,331 @@
+import json
+import threading
+import time
+
+import pytest
+
+from analyzers.company_analyzer import CompanyAnalyzer
+from utils.result_cache import ResultCache
+
+FUNCTIONS = ["Executive/Leadership", "Sales", "Marketing", "Product & Engineering", "Operations",
+             "Finance & Accounting", "Human Resources", "Legal & Compliance", "Customer Support"]
+
+
+def _combined_response():
+    return {
+        "companyInfo": {"name": "Acme", "industry": "Information Technology", "totalEmployees": 90,
+                        "headquarters": "US"},
+        "businessFunctions": [
+            {"id": name.lower(), "name": name, "employeeCount": 10, "avgSalaryUSD": 100000, "useCases": []}
+            for name in FUNCTIONS
+        ],
+    }
+
+
+class _Usage:
+    input_tokens = 100
+    output_tokens = 50
+    cache_creation_input_tokens = 0
+    cache_read_input_tokens = 0
+
+
+class _Message:
+    def __init__(self, text):
+        self.content = [type("Block", (), {"type": "text", "text": text})()]
+        self.usage = _Usage()
+        self.stop_reason = "end_turn"
+
+
+class _Stream:
+    def __init__(self, message):
+        self.message = message
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        yield self.message.content[0].text
+
+    def get_final_message(self):
+        return self.message
+
+
+class _Messages:
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        self.streamed = 0
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return _Message(self.respond(kwargs))
+
+    def stream(self, **kwargs):
+        self.requests.append(kwargs)
+        self.streamed += 1
+        return _Stream(_Message(self.respond(kwargs)))
+
+
+class FakeClient:
+    """
+    Records every Claude request and answers with a canned JSON response
+    """
+
+    def __init__(self, respond=None):
+        self.messages = _Messages(respond or (lambda kwargs: json.dumps(_combined_response())))
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("RESULT_CACHE_TTL", "0")
+    monkeypatch.setenv("PAGE_CACHE_TTL", "0")
+    monkeypatch.delenv("CASE_STUDY_TOP_K", raising=False)
+    analyzer = CompanyAnalyzer()
+    analyzer.client = FakeClient()
+    return analyzer
+
+
+def _company_analysis(name, headquarters):
+    return {
+        "companyInfo": {"name": name, "industry": {"primary": "Retail"}, "geography": {"headquarters": headquarters}},
+        "employeeRoles": {"totalEmployees": {"count": 40},
+                          "roleDistribution": [{"role": "Support agents", "count": 40}]},
+    }
+
+
+def _content(request):
+    return request["messages"][0]["content"]
+
+
+def test_matching_prompt_caches_the_static_prefix(analyzer):
+    analyzer.client = FakeClient(lambda kwargs: '{"businessFunctions": []}')
+    analyzer.match_use_cases(_company_analysis("Acme Retail", "Germany"))
+    analyzer.match_use_cases(_company_analysis("Zenith Stores", "India"))
+    first, second = (_content(request) for request in analyzer.client.messages.requests)
+
+    assert first[0]["cache_control"] == {"type": "ephemeral"}
+    # Byte-identical prefix across companies, company data only after it
+    assert first[0]["text"] == second[0]["text"]
+    assert "Acme Retail" not in first[0]["text"]
+    assert "Acme Retail" in first[-1]["text"]
+    assert "Zenith Stores" in second[-1]["text"]
+    assert all("cache_control" not in block for block in first[1:])
+
+
+def test_combined_prompt_caches_the_static_prefix(analyzer):
+    analyzer.analyze_and_match_combined("Acme sells shoes with 90 employees in Berlin")
+    analyzer.analyze_and_match_combined("Zenith builds payroll software in Mumbai")
+    first, second = (_content(request) for request in analyzer.client.messages.requests)
+
+    assert first[0]["cache_control"] == {"type": "ephemeral"}
+    assert first[0]["text"] == second[0]["text"]
+    assert "Berlin" not in first[0]["text"] and "Berlin" in first[-1]["text"]
+    assert "Mumbai" in second[-1]["text"]
+
+
+def test_corrected_data_prompt_is_not_split(analyzer):
+    analyzer.analyze_and_match_combined("Acme", corrected_data=_combined_response())
+    content = _content(analyzer.client.messages.requests[0])
+
+    assert isinstance(content, str)
+
+
+# Shortest prompt prefix Claude Sonnet will cache
+MIN_CACHEABLE_TOKENS = 1024
+
+
+def _min_tokens(text):
+    # Conservative: English prose averages about 4 characters per token
+    return len(text) // 4
+
+
+def test_cached_prefix_is_long_enough_to_cache(analyzer):
+    analyzer.client = FakeClient(lambda kwargs: '{"businessFunctions": []}')
+    analyzer.match_use_cases(_company_analysis("Acme Retail", "Germany"))
+    analyzer.analyze_and_match_combined("Acme sells shoes with 90 employees in Berlin")
+
+    for request in analyzer.client.messages.requests:
+        cached = [block for block in _content(request) if "cache_control" in block]
+        assert len(cached) == 1
+        assert _min_tokens(cached[0]["text"]) >= MIN_CACHEABLE_TOKENS
+
+
+def test_retrieval_is_off_by_default(analyzer):
+    assert analyzer.case_study_top_k == 0
+    corpus = analyzer.case_study_store.snapshot().case_studies
+    assert analyzer._select_case_studies("A software company with support agents") is corpus
+
+
+def test_retrieval_sends_the_selection_after_the_cached_rules(analyzer):
+    analyzer.case_study_top_k = 2
+    analyzer.analyze_and_match_combined("Acme runs a support desk for software customers")
+    content = _content(analyzer.client.messages.requests[0])
+
+    assert len(content) == 3
+    assert "cache_control" in content[0] and "cache_control" not in content[1]
+    assert "Acme" in content[2]["text"]
+
+
+def test_combined_analysis_is_served_from_the_result_cache(analyzer, tmp_path):
+    analyzer.result_cache = ResultCache(str(tmp_path / "results.db"))
+
+    first = analyzer.analyze_and_match_combined("Acme  sells shoes")
+    second = analyzer.analyze_and_match_combined("Acme sells shoes\n")
+    assert second == first
+    assert len(analyzer.client.messages.requests) == 1
+
+    # refresh skips the lookup; other input is another key
+    analyzer.analyze_and_match_combined("Acme sells shoes", refresh=True)
+    analyzer.analyze_and_match_combined("Acme sells boots")
+    assert len(analyzer.client.messages.requests) == 3
+
+
+def test_failed_analyses_are_not_cached(analyzer, tmp_path):
+    analyzer.result_cache = ResultCache(str(tmp_path / "results.db"))
+    analyzer.client = FakeClient(lambda kwargs: "Sorry, I cannot help with that.")
+
+    analyzer.analyze_and_match_combined("Acme sells shoes")
+    analyzer.analyze_and_match_combined("Acme sells shoes")
+    assert len(analyzer.client.messages.requests) == 2
+
+
+def _wait_for_waiters(analyzer, count):
+    (call,) = analyzer.single_flight._calls.values()
+    while len(call.done._cond._waiters) < count:
+        time.sleep(0.01)
+
+
+def test_identical_concurrent_analyses_share_one_claude_call(analyzer):
+    release = threading.Event()
+
+    def respond(kwargs):
+        release.wait(5)
+        return json.dumps(_combined_response())
+
+    analyzer.client = FakeClient(respond)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(analyzer.analyze_and_match_combined("Acme")))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while not analyzer.client.messages.requests:
+        time.sleep(0.01)
+    # Let the leader answer once both other callers wait on its call
+    _wait_for_waiters(analyzer, 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(analyzer.client.messages.requests) == 1
+    assert len(results) == 3 and results[0] == results[1] == results[2]
+
+
+def test_stream_reports_functions_then_the_full_result(analyzer):
+    events = list(analyzer.analyze_and_match_combined_stream("Acme"))
+    names = [event for event, _ in events]
+
+    assert names[0] == "start" and names[-1] == "done"
+    assert names.count("companyInfo") == 1
+    assert names.count("businessFunction") == len(FUNCTIONS)
+    assert [payload["function"]["name"] for event, payload in events if event == "businessFunction"] == FUNCTIONS
+    assert len(events[-1][1]["result"]["businessFunctions"]) == len(FUNCTIONS)
+
+
+def test_stream_joins_an_in_flight_blocking_analysis(analyzer):
+    analyzer.STREAM_KEEPALIVE_SECONDS = 0.01
+    release = threading.Event()
+
+    def respond(kwargs):
+        release.wait(5)
+        return json.dumps(_combined_response())
+
+    analyzer.client = FakeClient(respond)
+    blocking = []
+    leader = threading.Thread(target=lambda: blocking.append(analyzer.analyze_and_match_combined("Acme")))
+    leader.start()
+    while not analyzer.client.messages.requests:
+        time.sleep(0.01)
+
+    events = []
+    for event, payload in analyzer.analyze_and_match_combined_stream("Acme"):
+        events.append((event, payload))
+        if event == "progress":
+            release.set()
+    leader.join(5)
+
+    assert len(analyzer.client.messages.requests) == 1
+    assert events[0] == ("start", {"cached": False, "shared": True})
+    assert events[-1][0] == "done" and events[-1][1]["shared"]
+    assert events[-1][1]["result"] == blocking[0]
+    assert sum(1 for event, _ in events if event == "businessFunction") == len(FUNCTIONS)
+
+
+def test_stream_leader_disconnect_releases_waiting_callers(analyzer):
+    stream = analyzer.analyze_and_match_combined_stream("Acme")
+    assert next(stream)[0] == "start"
+
+    errors = []
+
+    def follow():
+        try:
+            analyzer.analyze_and_match_combined("Acme")
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    _wait_for_waiters(analyzer, 1)
+    stream.close()
+    follower.join(5)
+
+    assert errors == ["The analysis was cancelled before it finished"]
+    assert analyzer.single_flight.in_flight() == 0
+
+
+def _fanout_respond(extracted):
+    def respond(kwargs):
+        if "BUSINESS FUNCTION:" in _content(kwargs):
+            return json.dumps({"useCases": []})
+        return json.dumps({"companyInfo": {"name": "Acme"}, "businessFunctions": extracted})
+    return respond
+
+
+def test_fanout_requests_are_not_marked_for_caching(analyzer):
+    analyzer.client = FakeClient(_fanout_respond([{"name": name, "employeeCount": 10} for name in FUNCTIONS]))
+    analyzer.analyze_and_match_combined("Acme runs a support desk", fan_out=True)
+    requests = analyzer.client.messages.requests
+
+    assert len(requests) == 1 + len(FUNCTIONS)
+    assert all(isinstance(_content(request), str) for request in requests)
+
+
+def test_fanout_matches_function_name_variants(analyzer):
+    extracted = [
+        {"name": "Product and Engineering", "employeeCount": 30},
+        {"name": "customer support", "employeeCount": 12},
+        {"name": "Customer Support", "employeeCount": 3},
+        {"name": "Finance and Accounting", "employeeCount": 5},
+        {"name": "Research", "employeeCount": 4},
+    ]
+    analyzer.client = FakeClient(_fanout_respond(extracted))
+    result = analyzer.analyze_and_match_combined("Acme builds robots", fan_out=True)
+    functions = {f["name"]: f for f in result["businessFunctions"]}
+
+    assert [f["name"] for f in result["businessFunctions"]] == FUNCTIONS + ["Research"]
+    assert functions["Product & Engineering"]["employeeCount"] == 30
+    assert functions["Customer Support"]["employeeCount"] == 15
+    assert functions["Finance & Accounting"]["employeeCount"] == 5
+    assert functions["Sales"]["employeeCount"] == 0
+
+
+def test_blocking_analyses_are_not_streamed(analyzer):
+    analyzer.analyze_and_match_combined("Acme")
+    analyzer.match_use_cases(_company_analysis("Acme Retail", "Germany"))
+
+    assert len(analyzer.client.messages.requests) == 2
+    assert analyzer.client.messages.streamed == 0
@@ -0,0 +1,55 @@
+import re
+
+import pytest
+
+from utils.content_extraction import SECTION_OVERHEAD_TOKENS, chunk_pages, estimate_tokens, pack_pages
+
+
+def _site(pages=4, paragraphs=40):
+    return [
+        {"url": f"https://acme.com/{index}", "kind": "MAIN" if index == 0 else "ABOUT",
+         "text": "\n".join(f"Paragraph {index}-{number}: Acme has offices in {number} cities and sells "
+                           f"software products to customers. " * (1 + number % 5)
+                           for number in range(paragraphs))}
+        for index in range(pages)
+    ]
+
+
+def _paragraphs(chunks):
+    return [line for chunk in chunks for line in chunk.split("\n")
+            if line and " PAGE CONTENT (" not in line]
+
+
+def test_pack_pages_keeps_order_and_budget():
+    packed, stats = pack_pages(_site(), 1500)
+
+    assert stats["selectedTokens"] <= 1500
+    assert stats["selectedParagraphs"] < stats["paragraphs"]
+    for page in packed:
+        numbers = [int(n) for n in re.findall(r"Paragraph \d+-(\d+):", page["text"])]
+        assert numbers == sorted(numbers)
+
+
+def test_small_site_fits_in_chunks_whole():
+    site = _site(pages=2, paragraphs=5)
+    chunks = chunk_pages(site, 2000, 6)
+
+    expected = [line.strip() for page in site for line in page["text"].split("\n")]
+    assert _paragraphs(chunks) == expected
+
+
+@pytest.mark.parametrize("chunk_tokens, max_chunks", [(300, 2), (500, 3), (800, 6), (1500, 4)])
+def test_large_site_chunks_hold_the_packed_selection(chunk_tokens, max_chunks):
+    site = _site(pages=6, paragraphs=60)
+    chunks = chunk_pages(site, chunk_tokens, max_chunks)
+
+    assert 1 <= len(chunks) <= max_chunks
+    for chunk in chunks:
+        paragraphs = chunk.strip().split("\n")
+        headers = sum(1 for line in paragraphs if " PAGE CONTENT (" in line)
+        body = sum(estimate_tokens(line) + 1 for line in paragraphs if " PAGE CONTENT (" not in line)
+        assert body + headers * SECTION_OVERHEAD_TOKENS <= chunk_tokens
+    # Everything packed for the chunks is in them: nothing cut from the end
+    usable = chunk_tokens - estimate_tokens("x" * 800) - SECTION_OVERHEAD_TOKENS
+    packed, _ = pack_pages(site, max(1, usable) * max_chunks)
+    assert _paragraphs(chunks) == [line for page in packed for line in page["text"].split("\n") if line]
@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from utils.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, QueueFullError
+
+
+@pytest.fixture
+def queues(tmp_path):
+    created = []
+
+    def make(**kwargs):
+        queue = JobQueue(str(tmp_path / "jobs.db"), **kwargs)
+        created.append(queue)
+        return queue
+
+    yield make
+    for queue in created:
+        queue.shutdown(wait=True)
+
+
+def _wait_for(queue, job_id, statuses=(SUCCEEDED, FAILED)):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def test_runs_jobs_and_stores_results(queues):
+    queue = queues()
+    queue.register("double", lambda params: {"value": params["n"] * 2})
+
+    job = queue.submit("double", {"n": 21})
+    assert job["status"] in (QUEUED, RUNNING, SUCCEEDED)
+
+    done = _wait_for(queue, job["id"])
+    assert done["status"] == SUCCEEDED
+    assert done["result"] == {"value": 42}
+    assert done["startedAt"] is not None and done["finishedAt"] is not None
+
+
+def test_failed_and_unserializable_jobs(queues):
+    queue = queues()
+    queue.register("boom", lambda params: 1 / 0)
+    queue.register("object", lambda params: object())
+
+    assert "division by zero" in _wait_for(queue, queue.submit("boom", {})["id"])["error"]
+    unserializable = _wait_for(queue, queue.submit("object", {})["id"])
+    assert unserializable["status"] == FAILED
+    assert "not JSON serializable" in unserializable["error"]
+
+
+def test_unknown_kind_and_missing_job(queues):
+    queue = queues()
+
+    with pytest.raises(ValueError, match="Unknown job kind"):
+        queue.submit("nope", {})
+    assert queue.get("missing") is None
+
+
+def test_max_pending_rejects_new_jobs(queues):
+    queue = queues(max_workers=1, max_pending=2)
+    release = threading.Event()
+    queue.register("wait", lambda params: release.wait(5))
+
+    first = queue.submit("wait", {})
+    second = queue.submit("wait", {})
+    with pytest.raises(QueueFullError):
+        queue.submit("wait", {})
+
+    release.set()
+    _wait_for(queue, first["id"])
+    _wait_for(queue, second["id"])
+    # Finished jobs no longer count against the limit
+    _wait_for(queue, queue.submit("wait", {})["id"])
+
+
+def test_resume_requeues_interrupted_jobs(queues, tmp_path):
+    old = queues(max_workers=1)
+    release = threading.Event()
+    old.register("work", lambda params: release.wait(5))
+    running = old.submit("work", {"n": 1})
+    queued = old.submit("work", {"n": 2})
+    _wait_for(old, running["id"], (RUNNING,))
+    # Simulate a crash: leave the jobs queued/running in the table, plus one
+    # of a kind the new process does not handle
+    with sqlite3.connect(str(tmp_path / "jobs.db")) as conn:
+        conn.execute("INSERT INTO jobs (id, kind, status, params, created_at) VALUES ('legacy', 'gone', ?, '{}', 0)",
+                     (QUEUED,))
+
+    new = queues()
+    results = []
+    new.register("work", lambda params: results.append(params["n"]) or params["n"])
+    assert new.resume() == 2
+
+    assert _wait_for(new, running["id"])["result"] == 1
+    assert _wait_for(new, queued["id"])["result"] == 2
+    legacy = new.get("legacy")
+    assert legacy["status"] == FAILED and "No handler" in legacy["error"]
+    release.set()
+
+
+def test_a_job_is_claimed_only_once(queues):
+    queue = queues(max_workers=4)
+    calls = []
+    queue.register("count", lambda params: calls.append(1))
+    job = queue.submit("count", {})
+    _wait_for(queue, job["id"])
+
+    # A duplicate run of a job that is no longer queued does nothing
+    queue._run(job["id"])
+    queue.resume()
+    time.sleep(0.05)
+    assert len(calls) == 1
+
+
+def test_finished_jobs_are_purged_after_retention(queues):
+    queue = queues(retention_seconds=0.01)
+    queue.register("noop", lambda params: None)
+    job = queue.submit("noop", {})
+    _wait_for(queue, job["id"])
+
+    time.sleep(0.05)
+    queue.submit("noop", {})
+    assert queue.get(job["id"]) is None
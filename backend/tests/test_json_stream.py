@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from utils.json_stream import IncrementalJSONParser, parse_json_response
+
+RESPONSE = {
+    "companyInfo": {"name": "Acme", "totalEmployees": 50},
+    "businessFunctions": [
+        {"name": "Sales", "useCases": [{"id": "emails"}]},
+        {"name": "Marketing", "useCases": []},
+    ],
+}
+
+
+def _feed_in_chunks(parser, text, size):
+    completed = []
+    for i in range(0, len(text), size):
+        completed.extend(parser.feed(text[i:i + size]))
+    return completed
+
+
+@pytest.mark.parametrize("size", [1, 7, 10000])
+def test_reports_containers_as_they_complete(size):
+    text = "```json\n" + json.dumps(RESPONSE, indent=2) + "\n```"
+    parser = IncrementalJSONParser()
+
+    completed = _feed_in_chunks(parser, text, size)
+    paths = [path for path, _ in completed]
+
+    assert paths.index(("companyInfo",)) < paths.index(("businessFunctions", 0))
+    assert (("businessFunctions", 1), RESPONSE["businessFunctions"][1]) in completed
+    assert completed[-1] == ((), RESPONSE)
+    assert not parser.truncated
+    assert parser.finish() == RESPONSE
+
+
+def test_comments_and_trailing_commas():
+    text = """{
+      // model commentary
+      "a": [1, 2, 3,],
+      "b": {"c": "http://example.com//path",},
+    }"""
+    value, truncated = parse_json_response(text)
+
+    assert value == {"a": [1, 2, 3], "b": {"c": "http://example.com//path"}}
+    assert not truncated
+
+
+def test_escaped_quotes_and_braces_in_strings():
+    value, _ = parse_json_response('{"text": "say \\"hi\\" {not a brace]"}')
+    assert value == {"text": 'say "hi" {not a brace]'}
+
+
+@pytest.mark.parametrize("cut, expected", [
+    # Inside a string: the open member is dropped
+    ('{"a": 1, "b": "unfinish', {"a": 1}),
+    # Dangling key
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1, "b":', {"a": 1}),
+    # Unfinished number
+    ('{"a": [1, 2, 3', {"a": [1, 2]}),
+    # Open nested container with no complete member yet
+    ('{"a": [1], "b": {"c": ', {"a": [1]}),
+    # Trailing comma at the cut
+    ('{"a": [{"x": 1}, {"x": 2},', {"a": [{"x": 1}, {"x": 2}]}),
+])
+def test_truncated_response_is_repaired(cut, expected):
+    value, truncated = parse_json_response(cut)
+
+    assert truncated
+    assert value == expected
+
+
+def test_truncated_response_keeps_complete_functions():
+    text = json.dumps(RESPONSE)
+    cut = text[:text.index('{"name": "Marketing"') + 12]
+    value, truncated = parse_json_response(cut)
+
+    assert truncated
+    assert value["companyInfo"] == RESPONSE["companyInfo"]
+    assert value["businessFunctions"] == RESPONSE["businessFunctions"][:1]
+
+
+def test_truncated_response_rejected_when_not_allowed():
+    with pytest.raises(json.JSONDecodeError, match="truncated"):
+        parse_json_response('{"a": [1, 2', allow_truncated=False)
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "```json\n```"])
+def test_no_json_value(text):
+    with pytest.raises(json.JSONDecodeError):
+        parse_json_response(text)
+
+
+def test_text_after_top_level_value_is_ignored():
+    parser = IncrementalJSONParser()
+    parser.feed('[1, 2]\n\nHope this helps! {"x": 1}')
+
+    assert parser.done
+    assert parser.finish() == [1, 2]
+
+
+def test_comment_split_across_chunks():
+    parser = IncrementalJSONParser()
+    _feed_in_chunks(parser, '{"a": 1, /', 100)
+    _feed_in_chunks(parser, '/ note\n "b": 2}', 100)
+
+    assert parser.finish() == {"a": 1, "b": 2}
@@ -0,0 +1,68 @@
+import pytest
+
+from utils.memory import MemoryTracker
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def tracker():
+    tracker = MemoryTracker()
+    tracker.start()
+    yield tracker
+    tracker.stop()
+
+
+def test_sequential_requests_are_not_overlapped(tracker):
+    first = tracker.begin_request()
+    data = bytearray(5 * MB)
+    del data
+    first_usage = tracker.end_request(first)
+
+    second = tracker.begin_request()
+    second_usage = tracker.end_request(second)
+
+    assert not first_usage["overlapped"] and not second_usage["overlapped"]
+    assert first_usage["peakBytes"] >= 5 * MB
+    assert first_usage["retainedBytes"] < MB
+    # The peak was reset for the second request
+    assert second_usage["peakBytes"] < MB
+
+
+def test_concurrent_requests_are_flagged_as_overlapped(tracker):
+    outer = tracker.begin_request()
+    inner = tracker.begin_request()
+    inner_usage = tracker.end_request(inner)
+    outer_usage = tracker.end_request(outer)
+
+    # The inner request started while the outer one ran; the outer one saw
+    # another request start before it finished
+    assert inner_usage["overlapped"]
+    assert outer_usage["overlapped"]
+
+    alone = tracker.end_request(tracker.begin_request())
+    assert not alone["overlapped"]
+
+
+def test_tracking_off():
+    tracker = MemoryTracker()
+    tracker.stop()
+
+    assert not tracker.enabled
+    assert tracker.begin_request() is None
+    assert tracker.end_request(None) is None
+    with pytest.raises(ValueError, match="not enabled"):
+        tracker.snapshot()
+
+
+def test_snapshot_groups_allocation_sites(tracker):
+    kept = [bytearray(64 * 1024) for _ in range(16)]
+    snapshot = tracker.snapshot(limit=5)
+    again = tracker.snapshot(limit=5, compare=True)
+
+    assert len(snapshot["top"]) <= 5 and snapshot["currentBytes"] > 0
+    assert not snapshot["comparedToPrevious"] and again["comparedToPrevious"]
+    assert all("sizeDiff" in site for site in again["top"])
+    with pytest.raises(ValueError, match="group_by"):
+        tracker.snapshot(group_by="module")
+    del kept
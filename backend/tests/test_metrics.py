@@ -0,0 +1,62 @@
+import pytest
+
+from utils import metrics
+from utils.metrics import Counter, Histogram, Registry
+
+
+class _Usage:
+    input_tokens = 1000
+    output_tokens = 200
+    cache_creation_input_tokens = 0
+    cache_read_input_tokens = 10000
+
+
+class _Response:
+    usage = _Usage()
+
+
+def test_counter_exposition():
+    registry = Registry()
+    counter = registry.register(Counter("jobs_total", "Jobs by kind", ["kind"]))
+    counter.inc(kind="a")
+    counter.inc(2.5, kind='say "hi"\n')
+
+    assert registry.render() == (
+        "# HELP jobs_total Jobs by kind\n"
+        "# TYPE jobs_total counter\n"
+        'jobs_total{kind="a"} 1\n'
+        'jobs_total{kind="say \\"hi\\"\\n"} 2.5\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1)))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, route="/x")
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 2',
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 3.65',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_claude_call_tokens_and_cost():
+    model = "claude-3-5-haiku-test"
+    usage = metrics.record_claude_call(model, "test", 1.5, _Response())
+
+    # 1000 x $0.80 + 10000 x $0.08 (cache read) + 200 x $4, per million
+    assert usage["costUSD"] == pytest.approx(0.0024)
+    assert metrics.CLAUDE_TOKENS.value(model=model, type="cache_read") == 10000
+    assert metrics.CLAUDE_COST.value(model=model) == pytest.approx(0.0024)
+    assert metrics.CLAUDE_REQUESTS.value(model=model, operation="test", outcome="ok") == 1
+    # Not streamed: no time to first token
+    assert f'model="{model}"' not in "\n".join(metrics.CLAUDE_TTFT.render())
+
+
+def test_unknown_model_has_no_cost():
+    assert metrics.record_claude_call("other-model", "test", 0.1, _Response())["costUSD"] is None
+    assert metrics.record_claude_call("other-model", "test", 0.1, outcome="error") == {}
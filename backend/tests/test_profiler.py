@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from utils.profiler import ProfileStore, SamplingProfiler
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def _profile(seconds=0.05):
+    profiler = SamplingProfiler(interval=0.001).start()
+    _busy(seconds)
+    profiler.stop()
+    return profiler
+
+
+def _store_file(store, name, age_seconds):
+    store.directory.mkdir(parents=True, exist_ok=True)
+    path = store.directory / name
+    path.write_text("request;main 1\n")
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_sampler_roots_the_request_thread_at_request():
+    profiler = _profile()
+
+    assert profiler.samples > 0
+    lines = profiler.collapsed().splitlines()
+    assert any(line.startswith("request;") and "_busy (test_profiler.py" in line for line in lines)
+    counts = [int(line.rsplit(" ", 1)[1]) for line in lines]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_name_for_sanitizes_the_label(tmp_path):
+    name = ProfileStore(str(tmp_path)).name_for("POST-/api/analyze/../x?y=1")
+
+    assert name.endswith(".collapsed")
+    assert "/" not in name and "?" not in name
+    assert "-POST-_api_analyze_.._x_y_1.collapsed" in name
+
+
+@pytest.mark.parametrize("name", [
+    "../secret.collapsed", "sub/dir.collapsed", "/etc/passwd.collapsed", "profile.txt", "missing.collapsed",
+])
+def test_path_rejects_unknown_and_unsafe_names(tmp_path, name):
+    store = ProfileStore(str(tmp_path / "profiles"))
+    (tmp_path / "secret.collapsed").write_text("outside")
+    _store_file(store, "profile.txt", 0)
+
+    assert store.path(name) is None
+
+
+def test_path_returns_stored_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    path = _store_file(store, "a.collapsed", 0)
+
+    assert store.path("a.collapsed") == path
+
+
+def test_save_keeps_the_newest_max_files(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=2, max_age_seconds=0)
+    for index, age in enumerate((30, 20, 10)):
+        _store_file(store, f"old-{index}.collapsed", age)
+
+    store.save("new.collapsed", _profile(0.01))
+
+    assert [profile["name"] for profile in store.list()] == ["new.collapsed", "old-2.collapsed"]
+
+
+def test_save_removes_profiles_past_the_max_age(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=10, max_age_seconds=3600)
+    _store_file(store, "stale.collapsed", 7200)
+    _store_file(store, "recent.collapsed", 60)
+    unrelated = _store_file(store, "notes.txt", 7200)
+
+    store.save("new.collapsed", _profile(0.01))
+
+    assert sorted(profile["name"] for profile in store.list()) == ["new.collapsed", "recent.collapsed"]
+    assert unrelated.exists()
@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+
+import utils.result_cache as result_cache
+from utils.result_cache import ResultCache, make_cache_key, normalize_text, normalize_url
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(result_cache, "time", clock)
+    return clock
+
+
+def test_key_ignores_whitespace_and_key_order():
+    first = make_cache_key({"operation": "analyze", "description": normalize_text("  Acme\n makes   shoes ")})
+    second = make_cache_key({"description": normalize_text("Acme makes shoes"), "operation": "analyze"})
+
+    assert first == second
+    assert first != make_cache_key({"operation": "analyze", "description": "Acme makes boots"})
+    assert make_cache_key({"model": "a"}) != make_cache_key({"model": "b"})
+
+
+@pytest.mark.parametrize("url", [
+    "acme.com", "https://ACME.com/", "https://acme.com#about", "  https://acme.com  ",
+])
+def test_normalize_url(url):
+    assert normalize_url(url) == "https://acme.com"
+
+
+def test_normalize_url_keeps_path_and_query():
+    assert normalize_url("http://Acme.com/About/?lang=en") == "http://acme.com/About?lang=en"
+
+
+def test_round_trip_and_stats(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.db"))
+
+    assert cache.get("k") is None
+    cache.set("k", {"companyInfo": {"name": "Acme"}})
+    assert cache.get("k") == {"companyInfo": {"name": "Acme"}}
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hitRate"] == 0.5
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.db"), ttl_seconds=60)
+    cache.set("k", {"v": 1})
+
+    clock.now += 59
+    assert cache.get("k") == {"v": 1}
+    # Reading does not extend the lifetime
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.db"), max_entries=2)
+    cache.set("a", {"v": "a"})
+    clock.now += 1
+    cache.set("b", {"v": "b"})
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", {"v": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "a"}
+    assert cache.get("c") == {"v": "c"}
+
+
+def test_shared_between_instances(tmp_path, clock):
+    path = str(tmp_path / "results.db")
+    ResultCache(path).set("k", {"v": 1})
+
+    assert ResultCache(path).get("k") == {"v": 1}
+
+
+def test_storage_errors_are_misses(tmp_path, clock):
+    path = tmp_path / "results.db"
+    cache = ResultCache(str(path))
+    cache.set("k", {"v": 1})
+    with sqlite3.connect(str(path)) as conn:
+        conn.execute("UPDATE results SET value = 'not json'")
+
+    assert cache.get("k") is None
+    # Values that cannot be serialized are skipped
+    cache.set("bad", {"v": object()})
+    assert cache.get("bad") is None
@@ -0,0 +1,183 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils.benchmark_service import BenchmarkService
+from utils.roi_calculator import ROICalculator
+
+BENCHMARKS = {
+    "industries": {
+        "Technology": {"time_savings": {"median": 0.4, "min": 0.2, "max": 0.6, "count": 10}},
+        "Other": {"time_savings": {"median": 0.3, "min": 0.1, "max": 0.5, "count": 5}},
+    },
+    "use_cases": {
+        "Software Development": {"time_savings": {"median": 0.5, "min": 0.3, "max": 0.7, "count": 4}},
+        "Other": {},
+    },
+    "case_studies": {},
+}
+
+
+@pytest.fixture
+def calculator(tmp_path):
+    (tmp_path / "benchmarks.json").write_text(json.dumps(BENCHMARKS))
+    return ROICalculator(BenchmarkService(str(tmp_path)))
+
+
+SCENARIOS = [
+    {"employees": 10, "hourly_rate": 50, "hours_per_week": 10, "automation_level": 30,
+     "industry": "Technology", "use_case": "Customer Service"},
+    {"employees": 250, "hourly_rate": 80, "hours_per_week": 20, "automation_level": 90,
+     "industry": "Retail", "use_case": "Software Development"},
+    {"employees": 3.7, "hourly_rate": 20, "hours_per_week": 5, "automation_level": 50,
+     "industry": "Unknown", "use_case": "Unknown"},
+    {"employees": 5, "hourly_rate": 50, "hours_per_week": 0, "automation_level": 30,
+     "industry": "Technology", "use_case": "Content Creation"},
+]
+
+
+def test_batch_matches_calculate_roi(calculator):
+    columns = {name: [scenario[name] for scenario in SCENARIOS] for name in SCENARIOS[0]}
+    batch = calculator.calculate_roi_batch(**columns)
+
+    for i, scenario in enumerate(SCENARIOS):
+        single = calculator.calculate_roi(scenario)
+        assert batch["implementationCost"][i] == pytest.approx(single["implementationCost"]["value"])
+        for metric in ("costSavings", "roi", "timeSavings", "paybackPeriod"):
+            for level in ("min", "median", "max"):
+                expected = single[metric][level]
+                decimals = 1 if metric == "paybackPeriod" else 2
+                assert round(float(batch[metric][level][i]), decimals) == pytest.approx(expected), (i, metric, level)
+
+
+def test_batch_broadcasts_scalars(calculator):
+    batch = calculator.calculate_roi_batch(employees=[10, 20, 30], hourly_rate=50)
+
+    assert batch["implementationCost"].shape == (3,)
+    # Technology / Customer Service: 11000 x 0.8, 12000 x 0.8, 13000 x 0.8
+    np.testing.assert_allclose(batch["implementationCost"], [8800, 9600, 10400])
+
+
+def test_batch_zero_savings_has_infinite_payback(calculator):
+    batch = calculator.calculate_roi_batch(hours_per_week=[0, 10])
+
+    assert np.isinf(batch["paybackPeriod"]["median"][0])
+    assert np.isfinite(batch["paybackPeriod"]["median"][1])
+
+
+def test_batch_caps_time_savings(calculator):
+    batch = calculator.calculate_roi_batch(automation_level=100, use_case="Software Development")
+
+    # 0.7 x 2 would be 140%
+    assert batch["timeSavings"]["max"][0] == pytest.approx(90)
+
+
+@pytest.mark.parametrize("columns", [
+    {"employees": [1, 2], "hourly_rate": [1, 2, 3]},
+    {"employees": [[1, 2]]},
+])
+def test_batch_rejects_mismatched_columns(calculator, columns):
+    with pytest.raises(ValueError, match="one-dimensional and of equal length"):
+        calculator.calculate_roi_batch(**columns)
+
+
+def test_simulation_is_reproducible_with_seed(calculator):
+    first = calculator.simulate_roi(employees=[10, 50], samples=2000, seed=7)
+    second = calculator.simulate_roi(employees=[10, 50], samples=2000, seed=7)
+
+    np.testing.assert_array_equal(first["costSavings"], second["costSavings"])
+    assert first["costSavings"].shape == (2, 3)
+    assert first["sampled"] == ["timeSavings"]
+
+
+@pytest.mark.parametrize("distribution", ["pert", "triangular"])
+def test_simulated_percentiles_stay_within_benchmark_range(calculator, distribution):
+    result = calculator.simulate_roi(employees=10, automation_level=50, samples=20000,
+                                     distribution=distribution, percentiles=(0, 50, 100), seed=1)
+    batch = calculator.calculate_roi_batch(employees=10, automation_level=50)
+    low, median, high = result["timeSavings"][0]
+
+    # Technology / Customer Service: 20% to 60%, mode 40%
+    assert batch["timeSavings"]["min"][0] <= low <= median <= high <= batch["timeSavings"]["max"][0]
+    assert median == pytest.approx(40, abs=2)
+
+
+def test_simulated_payback_mirrors_savings(calculator):
+    result = calculator.simulate_roi(employees=10, samples=5000, percentiles=(5, 95), seed=3)
+    cost = result["implementationCost"][0]
+    (p5_savings, p95_savings), (p5_payback, p95_payback) = result["costSavings"][0], result["paybackPeriod"][0]
+
+    # The fast payback (P5) comes from the high savings (P95)
+    assert p5_payback == pytest.approx(cost / p95_savings * 12)
+    assert p95_payback == pytest.approx(cost / p5_savings * 12)
+
+
+def test_simulation_without_spread_is_deterministic(tmp_path):
+    flat = {"industries": {"Other": {"time_savings": {"median": 0.3, "min": 0.3, "max": 0.3}}}}
+    (tmp_path / "benchmarks.json").write_text(json.dumps(flat))
+    calculator = ROICalculator(BenchmarkService(str(tmp_path)))
+
+    result = calculator.simulate_roi(automation_level=50, samples=100)
+    np.testing.assert_allclose(result["timeSavings"], [[30, 30, 30]])
+
+
+def test_simulation_zero_savings_has_infinite_payback(calculator):
+    result = calculator.simulate_roi(hours_per_week=0, samples=100, seed=1)
+    assert np.isinf(result["paybackPeriod"]).all()
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"distribution": "normal"}, "distribution"),
+    ({"samples": 0}, "samples"),
+    ({"percentiles": (5, 150)}, "percentiles"),
+])
+def test_simulation_rejects_invalid_options(calculator, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        calculator.simulate_roi(**kwargs)
+
+
+def test_grid_matches_batch(calculator):
+    grid = calculator.calculate_roi_grid(
+        {"employees": [10, 20, 30], "hourly_rate": {"min": 20, "max": 100, "steps": 5}},
+        hours_per_week=8, use_case="Software Development"
+    )
+
+    assert grid["shape"] == (3, 5)
+    assert [axis["name"] for axis in grid["axes"]] == ["employees", "hourly_rate"]
+    np.testing.assert_allclose(grid["axes"][1]["values"], [20, 40, 60, 80, 100])
+    # Cell (i, j) is the scenario with the i-th employees and j-th hourly rate
+    single = calculator.calculate_roi_batch(employees=20, hourly_rate=80, hours_per_week=8,
+                                            use_case="Software Development")
+    assert grid["roi"]["median"][1, 3] == pytest.approx(single["roi"]["median"][0])
+    assert grid["implementationCost"].shape == (3, 5)
+
+
+def test_three_axis_grid(calculator):
+    grid = calculator.calculate_roi_grid({
+        "employees": [10, 20],
+        "hours_per_week": [5, 10, 15],
+        "automation_level": {"min": 10, "max": 90, "steps": 4},
+    })
+
+    assert grid["shape"] == (2, 3, 4)
+    assert grid["costSavings"]["max"].shape == (2, 3, 4)
+    # Savings rise along every axis
+    savings = grid["costSavings"]["median"]
+    assert (np.diff(savings, axis=0) > 0).all()
+    assert (np.diff(savings, axis=1) > 0).all()
+    assert (np.diff(savings, axis=2) >= 0).all()
+
+
+@pytest.mark.parametrize("axes, fixed, message", [
+    ({"employees": [1]}, {}, "two or three axes"),
+    ({"employees": [1], "hourly_rate": [1], "hours_per_week": [1], "automation_level": [1]}, {}, "two or three axes"),
+    ({"employees": [1], "industry": ["Retail"]}, {}, "cannot be a grid axis"),
+    ({"employees": [1], "headcount": [1]}, {}, "Unknown parameter"),
+    ({"employees": [1], "hourly_rate": [1]}, {"hours_per_week": [1, 2]}, "single value"),
+    ({"employees": [1], "hourly_rate": {"min": 1}}, {}, "numeric min, max and steps"),
+    ({"employees": [], "hourly_rate": [1]}, {}, "at least one value"),
+])
+def test_grid_rejects_invalid_axes(calculator, axes, fixed, message):
+    with pytest.raises(ValueError, match=message):
+        calculator.calculate_roi_grid(axes, **fixed)
@@ -0,0 +1,177 @@
+import threading
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+class _CountingEvent:
+    """
+    Stands in for a call's done event and counts the callers waiting on it,
+    so a test can let the leader finish only once its followers have joined
+    """
+
+    def __init__(self, event):
+        self._event = event
+        self._lock = threading.Lock()
+        self.waiting = 0
+
+    def wait(self, timeout=None):
+        with self._lock:
+            self.waiting += 1
+        return self._event.wait(timeout)
+
+    def set(self):
+        self._event.set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait_for_followers(self, count):
+        while True:
+            with self._lock:
+                if self.waiting >= count:
+                    return
+
+
+def _count_waiters(flight, key):
+    while True:
+        with flight._lock:
+            call = flight._calls.get(key)
+            if call is not None:
+                call.done = _CountingEvent(call.done)
+                return call.done
+
+
+def _start_followers(flight, key, count, results):
+    def follow():
+        try:
+            results.append(flight.do(key, lambda: pytest.fail("follower must not run fn")))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=follow) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def _join(threads, results, count):
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == count
+
+
+def _start_leader(flight, key, fn, results):
+    release = threading.Event()
+
+    def lead():
+        def run():
+            release.wait(5)
+            return fn()
+        try:
+            results.append(flight.do(key, run))
+        except Exception as e:
+            results.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    return leader, release, _count_waiters(flight, key)
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def compute():
+        calls.append(1)
+        return {"value": [1, 2]}
+
+    leader, release, done = _start_leader(flight, "k", compute, results)
+    threads = _start_followers(flight, "k", 3, results)
+    done.wait_for_followers(3)
+    release.set()
+    _join([leader] + threads, results, 4)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    # Each follower gets its own copy
+    values = [value for value, _ in results]
+    assert all(value == {"value": [1, 2]} for value in values)
+    assert len({id(value) for value in values}) == 4
+    assert flight.in_flight() == 0
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    error = RuntimeError("boom")
+    results = []
+
+    def fail():
+        raise error
+
+    leader, release, done = _start_leader(flight, "k", fail, results)
+    threads = _start_followers(flight, "k", 2, results)
+    done.wait_for_followers(2)
+    release.set()
+    _join([leader] + threads, results, 3)
+
+    assert results == [error, error, error]
+    assert flight.in_flight() == 0
+
+
+def test_leader_exception_releases_the_key():
+    flight = SingleFlight()
+
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("bad")))
+
+    assert flight.in_flight() == 0
+    assert flight.do("k", lambda: 42) == (42, False)
+
+
+def test_keys_are_independent():
+    flight = SingleFlight()
+    results = []
+
+    leader, release, _ = _start_leader(flight, "a", lambda: "a", results)
+    assert flight.do("b", lambda: "b") == ("b", False)
+    assert flight.in_flight() == 1
+    release.set()
+    _join([leader], results, 1)
+    assert results == [("a", False)]
+
+
+def test_begin_returns_the_in_flight_call():
+    flight = SingleFlight()
+    first, leader = flight.begin("k")
+    second, follower_is_leader = flight.begin("k")
+
+    assert leader and not follower_is_leader
+    assert second is first
+    assert not flight.wait(second, timeout=0.01)
+
+    flight.finish("k", first, {"done": True})
+    assert flight.wait(second, timeout=0.01)
+    assert flight.result(second) == {"done": True}
+    assert flight.result(second) is not first.result
+    assert flight.begin("k")[1]
+
+
+def test_finished_error_is_raised_to_waiters():
+    flight = SingleFlight()
+    call, _ = flight.begin("k")
+    done = _count_waiters(flight, "k")
+    results = []
+    threads = _start_followers(flight, "k", 2, results)
+    done.wait_for_followers(2)
+
+    flight.finish("k", call, error=RuntimeError("cancelled"))
+    _join(threads, results, 2)
+
+    assert [str(error) for error in results] == ["cancelled", "cancelled"]
+
+    with pytest.raises(RuntimeError, match="cancelled"):
+        flight.result(call)
+    assert flight.in_flight() == 0
@@ -0,0 +1,104 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from bs4 import BeautifulSoup
+
+from utils.site_crawler import SiteCrawler, _remove_boilerplate, extract_page
+
+
+def _nested_page(depth: int, paragraphs: int) -> str:
+    body = "".join(
+        f'<p class="c{i}">Acme employs {i} people in Berlin. <a href="/p{i}">More</a></p>'
+        for i in range(paragraphs)
+    )
+    menu = "<ul>" + "".join(f'<li><a href="/m{i}">Menu item {i}</a></li>' for i in range(10)) + "</ul>"
+    return "<html><body>" + '<div class="wrap">' * depth + body + menu + "</div>" * depth + "</body></html>"
+
+
+def test_extract_page_keeps_content_and_drops_boilerplate():
+    html = """
+    <html><head><meta name="description" content="Widgets for everyone"></head><body>
+      <nav><a href="/about">About</a></nav>
+      <div class="cookie-banner">We use cookies</div>
+      <main>
+        <h1>Acme</h1>
+        <p>Acme has <b>250 employees</b> in Berlin.</p>
+        <ul><li><a href="/a">One</a></li><li><a href="/b">Two</a></li><li><a href="/c">Three</a></li></ul>
+      </main>
+      <footer>Copyright</footer>
+    </body></html>
+    """
+    page = extract_page(html, "https://acme.test")
+
+    assert page["text"].split("\n") == ["Acme", "Acme has 250 employees in Berlin."]
+    assert page["metaDescription"] == "Widgets for everyone"
+    assert ("/about", "About") in page["links"]
+
+
+def test_link_density_keeps_lists_with_prose():
+    html = ("<html><body><ul>"
+            + "".join(f'<li><a href="/{i}">Case {i}</a> cut support costs by 40% for a 500 person team</li>'
+                      for i in range(4))
+            + "</ul></body></html>")
+    assert len(extract_page(html, "https://acme.test")["text"].split("\n")) == 4
+
+
+def test_boilerplate_removal_is_linear_on_deeply_nested_pages():
+    # Regression: a Tag.__getattr__ subtree search per element made this
+    # O(elements x depth); 3000 levels took several seconds
+    html = _nested_page(depth=3000, paragraphs=50)
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, "html.parser")
+    parse_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _remove_boilerplate(soup)
+    boilerplate_seconds = time.perf_counter() - start
+
+    assert boilerplate_seconds < max(5 * parse_seconds, 0.5)
+    text = extract_page(html, "https://acme.test")["text"]
+    assert "Acme employs 49 people in Berlin. More" in text
+    assert "Menu item" not in text
+
+
+class _DripHandler(BaseHTTPRequestHandler):
+    """
+    Sends a 100 KB page a few bytes at a time, each well within the socket timeout
+    """
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", "100000")
+        self.end_headers()
+        try:
+            for _ in range(100):
+                self.wfile.write(b"<p>x</p>")
+                self.wfile.flush()
+                time.sleep(0.1)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def drip_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _DripHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_crawl_deadline_applies_while_reading_the_body(drip_server):
+    crawler = SiteCrawler(deadline_seconds=1, request_timeout=5, extract_processes=0)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        crawler.crawl(drip_server)
+    assert time.monotonic() - start < 2.5
+    crawler.shutdown()
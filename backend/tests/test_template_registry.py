@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from utils.template_registry import (TEMPLATE_FIELDS, TemplateError, TemplateRegistry,
+                                     get_template_registry, validate_template)
+
+FIELDS = {"website.txt": {"url", "content"}, "description.txt": {"description"}}
+
+
+def _write(directory, name, text, mtime_ns=None):
+    path = directory / name
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        # Force a visible change even on coarse filesystem timestamps
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    _write(tmp_path, "website.txt", 'Analyze {url}:\n{content}\nReply as {{"name": "..."}}')
+    _write(tmp_path, "description.txt", "Analyze: {description}")
+    return tmp_path
+
+
+def test_loads_and_formats_templates(template_dir):
+    registry = TemplateRegistry(str(template_dir), FIELDS)
+
+    website = registry.get("website.txt")
+    assert website.format(url="https://acme.com", content="Hi") == \
+        'Analyze https://acme.com:\nHi\nReply as {"name": "..."}'
+    assert len(website.version) == 12
+    assert registry.version == registry.snapshot().version
+
+
+def test_reloads_changed_template(template_dir):
+    registry = TemplateRegistry(str(template_dir), FIELDS, check_interval=0)
+    before = registry.snapshot()
+
+    _write(template_dir, "description.txt", "Describe: {description}", mtime_ns=1)
+    after = registry.snapshot()
+
+    assert after.version != before.version
+    assert after.get("description.txt").text == "Describe: {description}"
+    # Only the edited template changes version
+    assert after.get("website.txt").version == before.get("website.txt").version
+
+
+def test_check_interval_limits_reloads(template_dir):
+    registry = TemplateRegistry(str(template_dir), FIELDS, check_interval=3600)
+    before = registry.snapshot()
+
+    _write(template_dir, "description.txt", "Describe: {description}", mtime_ns=1)
+    assert registry.snapshot() is before
+
+
+@pytest.mark.parametrize("text", [
+    "Analyze {description} and return {\"json\": true}",  # undoubled literal braces
+    "Analyze the company",                                # missing placeholder
+    "Analyze {description",                               # unbalanced brace
+])
+def test_broken_edit_keeps_last_good_templates(template_dir, text):
+    registry = TemplateRegistry(str(template_dir), FIELDS, check_interval=0)
+    good = registry.snapshot()
+
+    _write(template_dir, "description.txt", text, mtime_ns=1)
+    assert registry.snapshot() is good
+
+    # Fixing the file is picked up again
+    _write(template_dir, "description.txt", "Fixed: {description}", mtime_ns=2)
+    assert registry.get("description.txt").text == "Fixed: {description}"
+
+
+def test_deleted_template_keeps_last_good_templates(template_dir):
+    registry = TemplateRegistry(str(template_dir), FIELDS, check_interval=0)
+    good = registry.snapshot()
+
+    (template_dir / "website.txt").unlink()
+    assert registry.snapshot() is good
+
+
+def test_first_load_raises(template_dir):
+    _write(template_dir, "description.txt", "No placeholder")
+    with pytest.raises(TemplateError, match="missing placeholders: description"):
+        TemplateRegistry(str(template_dir), FIELDS).snapshot()
+
+    with pytest.raises(OSError):
+        TemplateRegistry(str(template_dir / "missing"), FIELDS).snapshot()
+
+
+@pytest.mark.parametrize("text, message", [
+    ("{url} {content} {extra}", "unknown placeholders 'extra'"),
+    ("{url} {content} {0}", "unknown placeholders '0'"),
+    ("{url}", "missing placeholders: content"),
+    ("{url} {content", "not a valid format string"),
+    ("{url} {content} }", "not a valid format string"),
+])
+def test_validate_template_errors(text, message):
+    with pytest.raises(TemplateError, match=message):
+        validate_template("t.txt", text, {"url", "content"})
+
+
+def test_attribute_and_index_placeholders_count_as_their_field():
+    validate_template("t.txt", "{url.host} {content[0]}", {"url", "content"})
+
+
+def test_bundled_templates_are_valid():
+    snapshot = get_template_registry().snapshot()
+    assert set(snapshot.templates) == set(TEMPLATE_FIELDS)
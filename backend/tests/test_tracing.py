@@ -0,0 +1,71 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import tracing
+from utils.tracing import TraceLog, add_timing, current_trace, in_context, span, start_trace
+
+
+@pytest.fixture
+def trace():
+    trace = start_trace("req-1")
+    yield trace
+    tracing.end_trace()
+
+
+def test_spans_are_recorded_in_the_current_trace(trace):
+    with span("scrape", url="https://acme.com"):
+        pass
+    add_timing("claude-ttft", 0.25, operation="analyze")
+
+    assert current_trace() is trace
+    assert [entry["name"] for entry in trace.spans] == ["scrape", "claude-ttft"]
+    assert trace.spans[0]["attrs"] == {"url": "https://acme.com"}
+    assert trace.spans[1]["durationMs"] == 250
+
+
+def test_server_timing_sums_repeated_stages(trace):
+    trace.add("claude", trace.start, 0.5)
+    trace.add("parse", trace.start, 0.01)
+    trace.add("claude", trace.start, 0.25)
+
+    header = trace.server_timing()
+    assert header.startswith('claude;desc="2 calls";dur=750.0, parse;dur=10.0, total;dur=')
+    assert re.fullmatch(r"[^,]+(, [^,]+)*", header)
+
+
+def test_spans_from_worker_threads_join_the_request_trace(trace):
+    def work(name):
+        with span(name):
+            return current_trace()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(in_context(work), name) for name in ("a", "b")]
+        traces = [future.result() for future in futures]
+
+    assert traces == [trace, trace]
+    assert sorted(entry["name"] for entry in trace.spans) == ["a", "b"]
+
+
+def test_span_without_a_trace_still_times_the_stage():
+    tracing.end_trace()
+    with span("untraced"):
+        pass
+    add_timing("untraced-ttft", 0.1)
+
+    assert current_trace() is None
+    assert 'stage="untraced"' in "\n".join(tracing.STAGE_LATENCY.render())
+
+
+def test_trace_log_writes_json_lines(trace, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    with span("prompt"):
+        pass
+    TraceLog(str(path)).write(trace, route="/api/analyze", status=200)
+
+    (record,) = [json.loads(line) for line in path.read_text().splitlines()]
+    assert record["requestId"] == "req-1"
+    assert record["route"] == "/api/analyze" and record["status"] == 200
+    assert [entry["name"] for entry in record["spans"]] == ["prompt"]
@@ -0,0 +1,163 @@
+import pytest
+
+from utils.use_case_roi import apply_use_case_roi, recompute_roi
+
+
+def _combined_result():
+    # Shape of analyze_and_match_combined output
+    return {
+        "companyInfo": {"name": "Acme", "totalEmployees": 120},
+        "businessFunctions": [
+            {
+                "id": "marketing",
+                "name": "Marketing",
+                "employeeCount": 20,
+                "avgSalaryUSD": 90000,
+                "useCases": [
+                    {"id": "blog", "name": "Blog drafts", "employeesUsing": 10, "hoursPerWeek": 5,
+                     "timeSavingsPercent": 30},
+                    {"id": "ads", "name": "Ad copy", "employeesUsing": 4, "hoursPerWeek": 2,
+                     "timeSavingsPercent": 50},
+                ],
+            },
+            {
+                "id": "customer-support",
+                "name": "Customer Support",
+                "employeeCount": 100,
+                "useCases": [{"id": "triage", "name": "Ticket triage", "employeesUsing": 30}],
+            },
+        ],
+    }
+
+
+def _matching_result():
+    # Shape of match_use_cases output
+    return {
+        "businessFunctions": [
+            {
+                "id": "sales",
+                "name": "Sales",
+                "totalEmployees": 10,
+                "targetRoles": [{"role": "Sales Representative"}],
+                "useCases": [
+                    {"id": "emails", "hoursPerWeek": 4, "timeSavingsPercent": 25, "complexityWeeks": 2},
+                    {"id": "research", "hoursPerWeek": 2, "timeSavingsPercent": 50, "complexityWeeks": 1},
+                ],
+            }
+        ]
+    }
+
+
+def _use_case(result, function_id, use_case_id):
+    function = next(f for f in result["businessFunctions"] if f["id"] == function_id)
+    return next(u for u in function["useCases"] if u["id"] == use_case_id)
+
+
+def test_combined_roi_matches_results_page():
+    # UseCaseMatchesV2: employeesUsing x hours x 52 x savings x salary / 2000
+    # Blog drafts: 10 x 5 x 52 x 0.30 x 90000 / 2000 = 35100
+    result = recompute_roi(_combined_result(), {})
+
+    assert _use_case(result, "marketing", "blog")["annualROI"] == 35100
+    # Ad copy: 4 x 2 x 52 x 0.50 x 45 = 9360
+    assert _use_case(result, "marketing", "ads")["annualROI"] == 9360
+    # No salary: the page's Customer Support default of $20/h, and its 5 hours
+    # and 20% defaults: 30 x 5 x 52 x 0.20 x 20 = 31200
+    assert _use_case(result, "customer-support", "triage")["annualROI"] == 31200
+
+
+def test_combined_quick_win_score_needs_complexity():
+    original = _combined_result()
+    original["businessFunctions"][0]["useCases"][0]["quickWinScore"] = 999
+    original["businessFunctions"][0]["useCases"][1]["complexityWeeks"] = 2
+    result = recompute_roi(original, {})
+
+    # No complexity estimate: no score rather than one against a made-up week
+    assert "quickWinScore" not in _use_case(result, "marketing", "blog")
+    assert "quickWinScore" not in _use_case(result, "customer-support", "triage")
+    # 9360 / (2 x 1000)
+    assert _use_case(result, "marketing", "ads")["quickWinScore"] == 4
+
+
+def test_adjusted_salary_is_kept_separate_from_average():
+    edits = {"businessFunctions": [{"id": "marketing", "adjustedSalaryUSD": 100000}]}
+    result = recompute_roi(_combined_result(), edits)
+
+    marketing = result["businessFunctions"][0]
+    assert marketing["avgSalaryUSD"] == 90000
+    assert marketing["adjustedSalaryUSD"] == 100000
+    # 10 x 5 x 52 x 0.30 x 50 = 39000
+    assert _use_case(result, "marketing", "blog")["annualROI"] == 39000
+
+
+def test_employees_using_edit():
+    edits = {"businessFunctions": [{"id": "marketing", "useCases": [{"id": "blog", "employeesUsing": 20}]}]}
+    result = recompute_roi(_combined_result(), edits)
+
+    assert _use_case(result, "marketing", "blog")["employeesUsing"] == 20
+    assert _use_case(result, "marketing", "blog")["annualROI"] == 70200
+
+
+def test_employee_count_edit_updates_company_total():
+    edits = {"businessFunctions": [{"name": "Customer Support", "employeeCount": 150}]}
+    result = recompute_roi(_combined_result(), edits)
+
+    assert result["companyInfo"]["totalEmployees"] == 170
+
+
+def test_recompute_does_not_modify_input():
+    original = _combined_result()
+    recompute_roi(original, {"businessFunctions": [{"id": "marketing", "adjustedSalaryUSD": 1}]})
+    assert original == _combined_result()
+
+
+def test_match_use_cases_math_is_unchanged():
+    # 4h x 25% x 50 weeks x $50/h (Sales default) x 10 employees = 25000
+    matches = apply_use_case_roi(_matching_result())
+    sales = matches["businessFunctions"][0]
+
+    assert [u["id"] for u in sales["useCases"]] == ["research", "emails"]
+    assert _use_case(matches, "sales", "emails")["annualROI"] == 25000
+    assert _use_case(matches, "sales", "emails")["quickWinScore"] == 12
+    assert _use_case(matches, "sales", "research")["quickWinScore"] == 25
+    assert sales["totalApplicableHours"] == 6
+    assert sales["totalApplicablePercent"] == 15
+    assert sales["targetRoles"][0]["category"] == "productivity"
+
+
+def test_match_use_cases_ignores_combined_fields():
+    # employeeCount/avgSalaryUSD are not read on the matching path
+    matches = _matching_result()
+    function = matches["businessFunctions"][0]
+    del function["totalEmployees"]
+    del function["targetRoles"]
+    function["employeeCount"] = 10
+    function["avgSalaryUSD"] = 200000
+
+    apply_use_case_roi(matches)
+    assert all(u["annualROI"] == 0 for u in function["useCases"])
+
+
+def test_recompute_matching_result_with_adjusted_salary():
+    edits = {"businessFunctions": [{"id": "sales", "adjustedSalaryUSD": 200000}]}
+    result = recompute_roi(_matching_result(), edits)
+
+    # 4h x 25% x 50 weeks x $100/h x 10 employees
+    assert _use_case(result, "sales", "emails")["annualROI"] == 50000
+
+
+@pytest.mark.parametrize("edits, message", [
+    ({"businessFunctions": [{"id": "legal"}]}, "Unknown business function"),
+    ({"businessFunctions": [{"id": "marketing", "useCases": [{"id": "nope"}]}]}, "Unknown use case"),
+    ({"businessFunctions": [{"id": "marketing", "employeeCount": -1}]}, "must not be negative"),
+    ({"businessFunctions": [{"id": "marketing", "adjustedSalaryUSD": "lots"}]}, "must be a number"),
+    ({"businessFunctions": [{"id": "marketing", "employeeCount": True}]}, "must be a number"),
+])
+def test_invalid_edits(edits, message):
+    with pytest.raises(ValueError, match=message):
+        recompute_roi(_combined_result(), edits)
+
+
+def test_result_without_business_functions():
+    with pytest.raises(ValueError):
+        recompute_roi({"useCases": []}, {})
@@ -0,0 +1,276 @@
+"""
+Benchmark service for the Claude Use Case Explorer.
+Loads the ROI benchmark data once per process, precomputes the industry and
+use case fallback tables, and reloads when the file on disk changes.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BENCHMARKS_DIR = Path(__file__).parent.parent / "data" / "benchmarks"
+
+# Files tried in order; the built-in defaults below are used if none exists
+BENCHMARK_FILES = ("simplified_benchmarks.json", "benchmarks.json", "default_benchmarks.json")
+
+DEFAULT_TIME_SAVINGS = {"median": 0.3, "min": 0.15, "max": 0.5}
+
+_BUILTIN_BENCHMARKS = {
+    "industries": {
+        "Technology": {
+            "time_savings": {"median": 0.4, "min": 0.2, "max": 0.6, "count": 10},
+            "cost_savings": {"median": 0.3, "min": 0.1, "max": 0.5, "count": 8},
+            "productivity": {"median": 0.35, "min": 0.15, "max": 0.6, "count": 12},
+            "quality": {"median": 0.25, "min": 0.1, "max": 0.4, "count": 6}
+        },
+        "Financial Services": {
+            "time_savings": {"median": 0.35, "min": 0.15, "max": 0.5, "count": 8},
+            "cost_savings": {"median": 0.25, "min": 0.1, "max": 0.4, "count": 7},
+            "productivity": {"median": 0.3, "min": 0.1, "max": 0.5, "count": 9},
+            "quality": {"median": 0.2, "min": 0.1, "max": 0.35, "count": 5}
+        },
+        "Healthcare": {
+            "time_savings": {"median": 0.3, "min": 0.1, "max": 0.5, "count": 6},
+            "cost_savings": {"median": 0.2, "min": 0.1, "max": 0.35, "count": 5},
+            "productivity": {"median": 0.25, "min": 0.1, "max": 0.4, "count": 7},
+            "quality": {"median": 0.3, "min": 0.15, "max": 0.5, "count": 8}
+        },
+        "Retail": {
+            "time_savings": {"median": 0.35, "min": 0.15, "max": 0.55, "count": 7},
+            "cost_savings": {"median": 0.3, "min": 0.1, "max": 0.5, "count": 6},
+            "productivity": {"median": 0.3, "min": 0.1, "max": 0.45, "count": 8},
+            "quality": {"median": 0.25, "min": 0.1, "max": 0.4, "count": 4}
+        },
+        "Other": {
+            "time_savings": {"median": 0.3, "min": 0.1, "max": 0.5, "count": 20},
+            "cost_savings": {"median": 0.25, "min": 0.1, "max": 0.45, "count": 18},
+            "productivity": {"median": 0.3, "min": 0.1, "max": 0.5, "count": 25},
+            "quality": {"median": 0.2, "min": 0.05, "max": 0.35, "count": 15}
+        }
+    },
+    "use_cases": {
+        "Customer Service": {
+            "time_savings": {"median": 0.45, "min": 0.2, "max": 0.7, "count": 15},
+            "cost_savings": {"median": 0.35, "min": 0.15, "max": 0.6, "count": 12},
+            "automation": {"median": 0.7, "min": 0.4, "max": 0.9, "count": 10}
+        },
+        "Knowledge Management": {
+            "time_savings": {"median": 0.4, "min": 0.2, "max": 0.6, "count": 12},
+            "productivity": {"median": 0.35, "min": 0.15, "max": 0.55, "count": 10}
+        },
+        "Content Creation": {
+            "time_savings": {"median": 0.5, "min": 0.3, "max": 0.7, "count": 8},
+            "productivity": {"median": 0.4, "min": 0.2, "max": 0.6, "count": 6}
+        },
+        "Software Development": {
+            "time_savings": {"median": 0.3, "min": 0.15, "max": 0.5, "count": 10},
+            "productivity": {"median": 0.25, "min": 0.1, "max": 0.45, "count": 8}
+        },
+        "Research & Analysis": {
+            "time_savings": {"median": 0.35, "min": 0.2, "max": 0.55, "count": 7},
+            "quality": {"median": 0.3, "min": 0.15, "max": 0.5, "count": 6}
+        },
+        "Other": {
+            "time_savings": {"median": 0.3, "min": 0.1, "max": 0.5, "count": 25},
+            "productivity": {"median": 0.25, "min": 0.1, "max": 0.4, "count": 20}
+        }
+    },
+    "case_studies": {
+        "Technology": {
+            "Customer Service": [
+                {"company": "Asana", "url": "https://www.anthropic.com/customers/asana"},
+                {"company": "Intercom", "url": "https://www.anthropic.com/customers/intercom"},
+                {"company": "Notion", "url": "https://www.anthropic.com/customers/notion"}
+            ],
+            "Content Creation": [
+                {"company": "Copy AI", "url": "https://www.anthropic.com/customers/copy-ai"},
+                {"company": "Tome", "url": "https://www.anthropic.com/customers/tome"}
+            ]
+        },
+        "Financial Services": {
+            "Knowledge Management": [
+                {"company": "Coinbase", "url": "https://www.anthropic.com/customers/coinbase"}
+            ]
+        }
+    }
+}
+
+
+def default_benchmarks() -> Dict[str, Any]:
+    """
+    Built-in benchmark data used when no benchmark file is available
+    """
+    return copy.deepcopy(_BUILTIN_BENCHMARKS)
+
+
+class BenchmarkSnapshot:
+    """
+    Immutable view of one version of the benchmark data.
+
+    Industry and use case lookups fall back to "Other" (also for entries that
+    are present but empty), and the time savings benchmark for a pair comes
+    from the use case, then the industry, then DEFAULT_TIME_SAVINGS. The
+    serialized JSON body is built once for /api/benchmarks.
+    """
+
+    def __init__(self, benchmarks: Dict[str, Any], version: str, source: str):
+        self.benchmarks = benchmarks
+        self.version = version
+        self.source = source
+
+        industries = benchmarks.get("industries", {}) or {}
+        use_cases = benchmarks.get("use_cases", {}) or {}
+        self._other_industry = industries.get("Other", {}) or {}
+        self._other_use_case = use_cases.get("Other", {}) or {}
+        self.industries = {name: data or self._other_industry for name, data in industries.items()}
+        self.use_cases = {name: data or self._other_use_case for name, data in use_cases.items()}
+        self._case_studies = benchmarks.get("case_studies", {}) or {}
+
+        self._resolved: Dict[Tuple[str, str], Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]] = {}
+        for industry in list(self.industries) + [None]:
+            for use_case in list(self.use_cases) + [None]:
+                self._resolved[(industry, use_case)] = self._resolve(industry, use_case)
+
+        self.body = json.dumps(benchmarks).encode("utf-8")
+
+    def industry(self, name: str) -> Dict[str, Any]:
+        return self.industries.get(name, self._other_industry)
+
+    def use_case(self, name: str) -> Dict[str, Any]:
+        return self.use_cases.get(name, self._other_use_case)
+
+    def resolve(self, industry: str, use_case: str) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Return (industry data, use case data, time savings data) with fallbacks
+        applied; unknown names share the precomputed "Other" entries
+        """
+        key = (industry if industry in self.industries else None,
+               use_case if use_case in self.use_cases else None)
+        return self._resolved[key]
+
+    def case_studies(self, industry: str, use_case: str) -> List[Dict[str, Any]]:
+        return (self._case_studies.get(industry) or {}).get(use_case, [])
+
+    def _resolve(self, industry: Optional[str], use_case: Optional[str]):
+        industry_data = self.industry(industry)
+        use_case_data = self.use_case(use_case)
+        if use_case_data and "time_savings" in use_case_data:
+            time_savings_data = use_case_data["time_savings"]
+        elif industry_data and "time_savings" in industry_data:
+            time_savings_data = industry_data["time_savings"]
+        else:
+            time_savings_data = None
+        return industry_data, use_case_data, time_savings_data or DEFAULT_TIME_SAVINGS
+
+
+class BenchmarkService:
+    """
+    Process-wide, thread-safe holder of the current benchmark snapshot.
+
+    The benchmark files are stat()ed at most once every `check_interval`
+    seconds. A change in which file is active, or in its mtime or size, is
+    confirmed by content hash before the snapshot is rebuilt and swapped.
+    """
+
+    def __init__(self, directory: Optional[str] = None, check_interval: float = 2.0):
+        self.directory = Path(directory or DEFAULT_BENCHMARKS_DIR)
+        self.check_interval = check_interval
+        self._snapshot: Optional[BenchmarkSnapshot] = None
+        self._stat_key = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> BenchmarkSnapshot:
+        """
+        Return the current snapshot, reloading it if the benchmark files have
+        changed. A broken file keeps serving the last good snapshot (or the
+        built-in defaults if nothing has loaded yet).
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._last_check < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._last_check < self.check_interval:
+                return self._snapshot
+            try:
+                self._reload_if_changed()
+            except Exception as e:
+                logger.error(f"Error reloading benchmarks from {self.directory}: {e}")
+                if self._snapshot is None:
+                    self._snapshot = self._builtin_snapshot()
+            finally:
+                self._last_check = time.monotonic()
+            return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self.snapshot().version
+
+    def _active_file(self) -> Optional[Tuple[Path, os.stat_result]]:
+        for name in BENCHMARK_FILES:
+            path = self.directory / name
+            try:
+                return path, path.stat()
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _reload_if_changed(self):
+        active = self._active_file()
+        if active is None:
+            if self._snapshot is None or self._stat_key is not None:
+                self._snapshot = self._builtin_snapshot()
+                self._stat_key = None
+                logger.info("No benchmark file found, using built-in benchmarks")
+            return
+
+        path, stat = active
+        stat_key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if self._snapshot is not None and stat_key == self._stat_key:
+            return
+
+        raw = path.read_bytes()
+        version = hashlib.sha256(path.name.encode("utf-8") + b"\x00" + raw).hexdigest()[:16]
+        if self._snapshot is not None and version == self._snapshot.version:
+            # Touched but not modified
+            self._stat_key = stat_key
+            return
+
+        benchmarks = json.loads(raw)
+        if not isinstance(benchmarks, dict):
+            raise ValueError(f"{path.name} must contain a JSON object")
+
+        self._snapshot = BenchmarkSnapshot(benchmarks, version, path.name)
+        self._stat_key = stat_key
+        logger.info(f"Loaded benchmarks from {path.name} (version {version})")
+
+    @staticmethod
+    def _builtin_snapshot() -> BenchmarkSnapshot:
+        benchmarks = default_benchmarks()
+        raw = json.dumps(benchmarks, sort_keys=True).encode("utf-8")
+        return BenchmarkSnapshot(benchmarks, hashlib.sha256(b"builtin\x00" + raw).hexdigest()[:16], "builtin")
+
+
+_default_service: Optional[BenchmarkService] = None
+_default_service_lock = threading.Lock()
+
+
+def get_benchmark_service() -> BenchmarkService:
+    """
+    Return the shared service for the bundled benchmark directory
+    """
+    global _default_service
+    if _default_service is None:
+        with _default_service_lock:
+            if _default_service is None:
+                _default_service = BenchmarkService(os.environ.get("BENCHMARKS_DIR") or None)
+    return _default_service
@@ -0,0 +1,190 @@
+"""
+Case study retrieval index for the Claude Use Case Explorer.
+A small in-process BM25 inverted index over the case study corpus, used to
+send only the most relevant case studies for each business function to Claude.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Search terms for each of the 9 standardized business functions. These are
+# combined with the company text when ranking case studies per function.
+FUNCTION_QUERIES = {
+    "Executive/Leadership": "executive leadership strategy strategic decision support management board planning insights",
+    "Sales": "sales revenue business development account executives proposals rfp crm leads deals prospecting",
+    "Marketing": "marketing content creation campaigns brand copywriting social media seo creative communications",
+    "Product & Engineering": "product engineering software development developers code coding documentation testing devops data science it security",
+    "Operations": "operations supply chain procurement workflow automation process logistics administration reporting",
+    "Finance & Accounting": "finance accounting financial analysis reporting fp&a invoices audit budgeting treasury",
+    "Human Resources": "human resources hr recruiting hiring onboarding training learning employees people operations",
+    "Legal & Compliance": "legal compliance contracts regulatory risk review policy documents due diligence",
+    "Customer Support": "customer support service success tickets helpdesk chat agents inquiries resolution",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9&]+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or our that the their this to was were will with
+we you your they them not no can more most other such than then these those also about over per via using use used
+""".split())
+
+# Field weights are applied as term-frequency multipliers
+_FIELD_WEIGHTS = {
+    "industry": 2,
+    "function": 3,
+    "useCaseTypes": 2,
+    "rolesAffected": 2,
+    "useCases": 1,
+    "metrics": 1,
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase, split on non-alphanumerics, drop stopwords and strip plurals
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.strip("&")
+        if not token or token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _strings(value: Any) -> Iterable[str]:
+    """
+    Yield every string nested inside a JSON-like value
+    """
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield str(value)
+
+
+def query_text(value: Any) -> str:
+    """
+    Flatten a description string or an analysis dict into query text
+    """
+    return " ".join(_strings(value))
+
+
+class CaseStudyIndex:
+    """
+    BM25 index over industry, business functions (function, useCaseTypes,
+    rolesAffected), implementation.useCases and results.quantitativeMetrics.
+    """
+
+    def __init__(self, case_studies: List[Dict[str, Any]], k1: float = 1.2, b: float = 0.75):
+        self.case_studies = case_studies
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._doc_lengths: List[int] = []
+
+        for doc_id, cs in enumerate(case_studies):
+            term_counts = Counter()
+            for field, text in self._fields(cs):
+                weight = _FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    term_counts[token] += weight
+            self._doc_lengths.append(sum(term_counts.values()))
+            for term, count in term_counts.items():
+                self._postings[term].append((doc_id, count))
+
+        n_docs = len(case_studies)
+        self._avg_length = (sum(self._doc_lengths) / n_docs) if n_docs else 0.0
+        self._idf = {
+            term: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    @staticmethod
+    def _fields(cs: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+        if cs.get("industry"):
+            yield "industry", str(cs["industry"])
+        for business_function in cs.get("businessFunctions", []) or []:
+            if not isinstance(business_function, dict):
+                continue
+            if business_function.get("function"):
+                yield "function", str(business_function["function"])
+            yield "useCaseTypes", query_text(business_function.get("useCaseTypes", []))
+            yield "rolesAffected", query_text(business_function.get("rolesAffected", []))
+        implementation = cs.get("implementation") or {}
+        if isinstance(implementation, dict):
+            yield "useCases", query_text(implementation.get("useCases", []))
+        results = cs.get("results") or {}
+        if isinstance(results, dict):
+            for metric in results.get("quantitativeMetrics", []) or []:
+                if isinstance(metric, dict):
+                    yield "metrics", " ".join(str(metric.get(key, "")) for key in ("metric", "value", "context"))
+
+    def scores(self, query: str) -> List[float]:
+        """
+        BM25 score of every case study (in corpus order) for the query
+        """
+        scores = [0.0] * len(self.case_studies)
+        if not self.case_studies:
+            return scores
+        for term, query_count in Counter(tokenize(query)).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / self._avg_length)
+                scores[doc_id] += query_count * idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, top_k: int) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Return up to top_k (score, case study) pairs with a positive score
+        """
+        ranked = sorted(
+            ((score, doc_id) for doc_id, score in enumerate(self.scores(query)) if score > 0),
+            key=lambda pair: (-pair[0], pair[1])
+        )
+        return [(score, self.case_studies[doc_id]) for score, doc_id in ranked[:top_k]]
+
+    def select_for_functions(self, company_query: str, top_k: int,
+                             functions: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """
+        Pick the top_k case studies for each business function and return their
+        union in corpus order.
+
+        Each function is ranked by its own terms, boosted by how well the case
+        study matches the company text, so the selection covers every function
+        while still favouring studies close to the company.
+        """
+        functions = functions or FUNCTION_QUERIES
+        company_scores = self.scores(company_query) if company_query else [0.0] * len(self.case_studies)
+        company_max = max(company_scores, default=0.0) or 1.0
+
+        selected = set()
+        for terms in functions.values():
+            function_scores = self.scores(terms)
+            function_max = max(function_scores, default=0.0)
+            if function_max <= 0:
+                continue
+            ranked = sorted(
+                (
+                    (function_scores[doc_id] / function_max + 0.5 * company_scores[doc_id] / company_max, doc_id)
+                    for doc_id in range(len(self.case_studies))
+                    if function_scores[doc_id] > 0
+                ),
+                key=lambda pair: (-pair[0], pair[1])
+            )
+            selected.update(doc_id for _, doc_id in ranked[:top_k])
+
+        return [self.case_studies[doc_id] for doc_id in sorted(selected)]
@@ -0,0 +1,195 @@
+"""
+Case study store for the Claude Use Case Explorer.
+Keeps the case study corpus in memory with lookup indexes and reloads it
+when the JSON file on disk changes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CASE_STUDIES_PATH = Path(__file__).parent.parent / "data" / "case_studies" / "all_120_case_studies.json"
+
+
+class CaseStudySnapshot:
+    """
+    Immutable view of one version of the case study corpus.
+
+    A new snapshot is built on every reload, so callers can keep a reference
+    for the duration of a request without seeing a half-updated corpus.
+    """
+
+    def __init__(self, case_studies: List[Dict[str, Any]], version: str, mtime: float):
+        self.case_studies = case_studies
+        self.version = version
+        self.mtime = mtime
+
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_industry: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_region: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_company_size: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_function: Dict[str, List[Dict[str, Any]]] = {}
+
+        for cs in case_studies:
+            case_id = cs.get("id")
+            if case_id and case_id not in self.by_id:
+                self.by_id[case_id] = cs
+
+            self._add(self.by_industry, cs.get("industry"), cs)
+            self._add(self.by_region, cs.get("region"), cs)
+            self._add(self.by_company_size, cs.get("companySize"), cs)
+
+            seen_functions = set()
+            for business_function in cs.get("businessFunctions", []) or []:
+                name = business_function.get("function") if isinstance(business_function, dict) else None
+                if name and name.lower() not in seen_functions:
+                    seen_functions.add(name.lower())
+                    self._add(self.by_function, name, cs)
+
+        # Derived values (e.g. serialized prompt sections) keyed by the caller
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.Lock()
+
+    @staticmethod
+    def _add(index: Dict[str, List[Dict[str, Any]]], key: Optional[str], cs: Dict[str, Any]):
+        if not key or not isinstance(key, str):
+            return
+        index.setdefault(key.strip().lower(), []).append(cs)
+
+    def __len__(self) -> int:
+        return len(self.case_studies)
+
+    def get(self, case_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a case study by id, tolerating underscore/hyphen variations
+        """
+        cs = self.by_id.get(case_id)
+        if cs is not None:
+            return cs
+        for variant in (case_id.replace('_', '-'), case_id.replace('-', '_')):
+            cs = self.by_id.get(variant)
+            if cs is not None:
+                return cs
+        return None
+
+    def filter(self, industry: Optional[str] = None, region: Optional[str] = None,
+               company_size: Optional[str] = None, business_function: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return case studies matching all of the given attributes (case-insensitive)
+        """
+        candidates = None
+        for index, value in ((self.by_industry, industry), (self.by_region, region),
+                             (self.by_company_size, company_size), (self.by_function, business_function)):
+            if not value:
+                continue
+            matches = index.get(value.strip().lower(), [])
+            if candidates is None:
+                candidates = matches
+            else:
+                ids = {id(cs) for cs in matches}
+                candidates = [cs for cs in candidates if id(cs) in ids]
+        return list(self.case_studies if candidates is None else candidates)
+
+    def derived(self, key: str, build):
+        """
+        Return a value computed from this snapshot, building it once on first use
+        """
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = build(self)
+            return self._derived[key]
+
+
+class CaseStudyStore:
+    """
+    Process-wide, thread-safe holder of the current case study snapshot.
+
+    The file is stat()ed at most once every `check_interval` seconds. When its
+    mtime or size changes the content hash is compared, and only a real change
+    triggers a re-parse and an atomic swap of the snapshot.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 2.0):
+        self.path = str(path or DEFAULT_CASE_STUDIES_PATH)
+        self.check_interval = check_interval
+        self._snapshot: Optional[CaseStudySnapshot] = None
+        self._stat_key = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> CaseStudySnapshot:
+        """
+        Return the current snapshot, reloading it if the file has changed.
+
+        Raises FileNotFoundError if the corpus has never been loaded and the
+        file does not exist. After a successful load, a missing or broken file
+        keeps serving the last good snapshot.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._last_check < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._last_check < self.check_interval:
+                return self._snapshot
+            try:
+                self._reload_if_changed()
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                logger.error(f"Error reloading case studies from {self.path}: {e}")
+            finally:
+                self._last_check = time.monotonic()
+            return self._snapshot
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self.snapshot().case_studies
+
+    def get(self, case_id: str) -> Optional[Dict[str, Any]]:
+        return self.snapshot().get(case_id)
+
+    def _reload_if_changed(self):
+        stat = os.stat(self.path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if self._snapshot is not None and stat_key == self._stat_key:
+            return
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        version = hashlib.sha256(raw).hexdigest()[:16]
+
+        if self._snapshot is not None and version == self._snapshot.version:
+            # Touched but not modified
+            self._stat_key = stat_key
+            return
+
+        case_studies = json.loads(raw)
+        if not isinstance(case_studies, list):
+            raise ValueError("Case studies file must contain a JSON array")
+
+        self._snapshot = CaseStudySnapshot(case_studies, version, stat.st_mtime)
+        self._stat_key = stat_key
+        logger.info(f"Loaded {len(case_studies)} case studies (version {version})")
+
+
+_default_store: Optional[CaseStudyStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_case_study_store() -> CaseStudyStore:
+    """
+    Return the shared store for the bundled case study corpus
+    """
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = CaseStudyStore(os.environ.get("CASE_STUDIES_PATH") or None)
+    return _default_store
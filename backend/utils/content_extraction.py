@@ -0,0 +1,214 @@
+"""
+Website content selection for the Claude Use Case Explorer.
+Ranks the paragraphs of crawled pages by how much company information they
+carry (headcount, locations, products, industry) and packs the best of them
+into an input-token budget for the website analysis prompt, or splits large
+sites into chunks for map-reduce analysis.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Tuple
+
+# Rough characters per token for English web copy (errs on the high side)
+CHARS_PER_TOKEN = 3.5
+
+# Paragraphs longer than this are split at sentence boundaries before ranking
+MAX_PARAGRAPH_CHARS = 800
+
+# Tokens reserved per included page for its section header
+SECTION_OVERHEAD_TOKENS = 20
+
+# Information signals and their weights
+SIGNALS = [
+    # Headcount
+    (re.compile(r"\b\d[\d,.]*\s*(?:k\s*)?\+?\s*(?:employees|people|staff|team members|professionals|engineers|"
+                r"colleagues|experts|specialists)\b|\bteam of\s+\d|\bheadcount\b", re.IGNORECASE), 5.0),
+    # Locations
+    (re.compile(r"\b(?:headquarter(?:s|ed)|hq|offices?|based in|located in|locations?|countries|cities|"
+                r"worldwide|globally|global presence|regions?)\b", re.IGNORECASE), 3.0),
+    # Industry and positioning
+    (re.compile(r"\b(?:industry|industries|sector|market|founded|established|since (?:19|20)\d\d|mission|"
+                r"we help|we are|leading|leader|provider|specializ(?:e|es|ing)|focused on)\b", re.IGNORECASE), 2.5),
+    # Products and services
+    (re.compile(r"\b(?:products?|platform|solutions?|services?|software|saas|apps?|tools?|offer(?:s|ing)?|"
+                r"customers?|clients?|partners?)\b", re.IGNORECASE), 2.0),
+    # Figures: money, percentages, scale
+    (re.compile(r"[$€£]\s?\d|\b\d+(?:\.\d+)?\s?(?:%|million|billion|bn\b|m\b)", re.IGNORECASE), 1.5),
+]
+
+PAGE_WEIGHTS = {"MAIN": 1.0, "ABOUT": 1.3, "PRODUCTS": 1.1, "SERVICES": 1.1, "CAREERS": 0.9}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate Claude token count of a text
+    """
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def score_paragraph(paragraph: str) -> float:
+    """
+    Information score of one paragraph: weighted signal matches plus a bonus
+    for real prose; short fragments (menu labels, buttons) are discounted
+    """
+    score = sum(weight for pattern, weight in SIGNALS if pattern.search(paragraph))
+    words = len(paragraph.split())
+    score += min(words, 60) / 30
+    if words < 4:
+        score *= 0.3
+    return score
+
+
+def _split_paragraph(paragraph: str) -> List[str]:
+    if len(paragraph) <= MAX_PARAGRAPH_CHARS:
+        return [paragraph]
+    parts = []
+    current = ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > MAX_PARAGRAPH_CHARS:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(sentence[:MAX_PARAGRAPH_CHARS])
+            sentence = sentence[MAX_PARAGRAPH_CHARS:]
+        if current and len(current) + 1 + len(sentence) > MAX_PARAGRAPH_CHARS:
+            parts.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _candidates(pages: List[Dict[str, Any]]) -> Tuple[List[Tuple[float, int, int, int, str]], int]:
+    """
+    Scored paragraphs of all pages as (score, tokens, page index, position,
+    paragraph), plus their total tokens
+    """
+    seen: Dict[str, int] = {}
+    for page in pages:
+        for paragraph in set(page.get("text", "").split("\n")):
+            key = paragraph.strip().lower()
+            if key:
+                seen[key] = seen.get(key, 0) + 1
+
+    candidates = []
+    emitted = set()
+    total_tokens = 0
+    for page_index, page in enumerate(pages):
+        weight = PAGE_WEIGHTS.get(page.get("kind"), 1.0)
+        position = 0
+        for line in page.get("text", "").split("\n"):
+            key = line.strip().lower()
+            if not key or key in emitted:
+                continue
+            emitted.add(key)
+            repeated = seen.get(key, 0) > 1
+            for paragraph in _split_paragraph(line.strip()):
+                tokens = estimate_tokens(paragraph) + 1
+                total_tokens += tokens
+                score = score_paragraph(paragraph) * weight
+                if repeated:
+                    score *= 0.3
+                candidates.append((score, tokens, page_index, position, paragraph))
+                position += 1
+    return candidates, total_tokens
+
+
+def pack_pages(pages: List[Dict[str, Any]], token_budget: int) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Select the highest-scoring paragraphs of the crawled pages that fit in
+    token_budget and return (pages, stats).
+
+    The returned pages are copies whose text holds only the selected
+    paragraphs, in their original order; sub-pages with nothing selected are
+    dropped. Paragraphs repeated across pages (taglines, footers that survived
+    extraction) are kept once, at their first occurrence, with a lower score.
+    """
+    candidates, total_tokens = _candidates(pages)
+
+    budget = token_budget
+    selected = []
+    pages_used = set()
+    for candidate in sorted(candidates, key=lambda c: (-c[0], c[2], c[3])):
+        score, tokens, page_index, _, _ = candidate
+        cost = tokens + (0 if page_index in pages_used else SECTION_OVERHEAD_TOKENS)
+        if cost > budget:
+            continue
+        budget -= cost
+        pages_used.add(page_index)
+        selected.append(candidate)
+
+    by_page: Dict[int, List[Tuple[int, str]]] = {}
+    for _, _, page_index, position, paragraph in selected:
+        by_page.setdefault(page_index, []).append((position, paragraph))
+
+    packed = []
+    for page_index, page in enumerate(pages):
+        chosen = sorted(by_page.get(page_index, []))
+        if not chosen and page_index > 0:
+            continue
+        packed_page = dict(page)
+        packed_page["text"] = "\n".join(paragraph for _, paragraph in chosen)
+        packed.append(packed_page)
+
+    stats = {
+        "paragraphs": len(candidates),
+        "selectedParagraphs": len(selected),
+        "totalTokens": total_tokens,
+        "selectedTokens": token_budget - budget
+    }
+    return packed, stats
+
+
+def chunk_pages(pages: List[Dict[str, Any]], chunk_tokens: int, max_chunks: int) -> List[str]:
+    """
+    Split the crawled pages into at most max_chunks text chunks of about
+    chunk_tokens each, in page order, for map-reduce analysis. If the site
+    has more text than fits, the highest-scoring paragraphs are kept; text
+    is never cut from the end.
+    """
+    # Leave room for the space lost at chunk boundaries (at most one paragraph)
+    usable = max(1, chunk_tokens - estimate_tokens("x" * MAX_PARAGRAPH_CHARS) - SECTION_OVERHEAD_TOKENS)
+    budget = usable * max(1, max_chunks)
+    while True:
+        packed, _ = pack_pages(pages, budget)
+        chunks = _split_chunks(packed, chunk_tokens)
+        if len(chunks) <= max_chunks:
+            return chunks
+        # The reserve above should make this unreachable; if it is not
+        # enough, pack less rather than drop the last chunks
+        budget = budget * max_chunks // len(chunks)
+
+
+def _split_chunks(packed: List[Dict[str, Any]], chunk_tokens: int) -> List[str]:
+    chunks = []
+    sections: List[Tuple[Dict[str, Any], List[str]]] = []
+    size = 0
+    for page in packed:
+        for paragraph in page["text"].split("\n"):
+            if not paragraph:
+                continue
+            tokens = estimate_tokens(paragraph) + 1
+            if sections and size + tokens > chunk_tokens:
+                chunks.append(_format_sections(sections))
+                sections, size = [], 0
+            if not sections or sections[-1][0] is not page:
+                sections.append((page, []))
+                size += SECTION_OVERHEAD_TOKENS
+            sections[-1][1].append(paragraph)
+            size += tokens
+    if sections:
+        chunks.append(_format_sections(sections))
+    return chunks
+
+
+def _format_sections(sections: List[Tuple[Dict[str, Any], List[str]]]) -> str:
+    return "".join(
+        f"{page.get('kind', 'MAIN')} PAGE CONTENT ({page['url']}):\n" + "\n".join(paragraphs) + "\n\n"
+        for page, paragraphs in sections
+    )
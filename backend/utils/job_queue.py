@@ -0,0 +1,215 @@
+"""
+Background job queue for the Claude Use Case Explorer.
+Runs long analyses on a bounded thread pool and records every job in SQLite,
+so clients can poll for the result and queued work survives a restart.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_PATH = Path(__file__).parent.parent / "data" / "jobs" / "jobs.sqlite3"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while max_pending jobs are already waiting
+    """
+
+
+class JobQueue:
+    """
+    Thread pool plus a SQLite job table.
+
+    Handlers are registered per job kind and called with the job's params
+    dict; their return value is stored as the job result. On start-up, jobs
+    left queued or running by a previous process are put back on the queue,
+    so this assumes a single process owns the job table (gunicorn workers = 1).
+    Finished jobs are purged after retention_seconds.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_workers: int = 2, max_pending: int = 50,
+                 retention_seconds: float = 24 * 3600):
+        self.path = str(path or DEFAULT_JOB_PATH)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                "params TEXT NOT NULL, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any]], Any]):
+        """
+        Register the function that runs jobs of this kind
+        """
+        self._handlers[kind] = handler
+
+    def resume(self) -> int:
+        """
+        Re-queue jobs interrupted by a restart. Call after registering handlers.
+        Returns the number of jobs resumed.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (QUEUED, RUNNING)
+            )
+            rows = conn.execute(
+                "SELECT id, kind FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+
+        resumed = 0
+        for job_id, kind in rows:
+            if kind not in self._handlers:
+                self._finish(job_id, FAILED, error=f"No handler for job kind '{kind}'")
+                continue
+            self._executor.submit(self._run, job_id)
+            resumed += 1
+        if resumed:
+            logger.info(f"Resumed {resumed} queued jobs")
+        return resumed
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record a new job and schedule it. Raises QueueFullError if too many
+        jobs are already waiting.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            with self._connect() as conn:
+                self._purge(conn, now)
+                pending = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+                ).fetchone()[0]
+                if pending >= self.max_pending:
+                    raise QueueFullError(f"{pending} jobs are already pending")
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, status, params, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, kind, QUEUED, json.dumps(params), now)
+                )
+
+        self._executor.submit(self._run, job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the job's status (and result or error once finished), or None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, result, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, kind, status, result, error, created_at, started_at, finished_at = row
+            job = {
+                "id": job_id,
+                "kind": kind,
+                "status": status,
+                "createdAt": created_at,
+                "startedAt": started_at,
+                "finishedAt": finished_at
+            }
+            if status == QUEUED:
+                job["position"] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?", (QUEUED, created_at)
+                ).fetchone()[0]
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Job counts by status plus the pool limits
+        """
+        try:
+            with self._connect() as conn:
+                counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        except sqlite3.Error:
+            counts = None
+        return {"jobs": counts, "maxWorkers": self.max_workers, "maxPending": self.max_pending}
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id: str):
+        # Claim the job; if another run already took it there is nothing to do
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, time.time(), job_id, QUEUED)
+            ).rowcount
+            row = conn.execute("SELECT kind, params FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not claimed or row is None:
+            return
+
+        kind, params = row
+        try:
+            result = self._handlers[kind](json.loads(params))
+            self._finish(job_id, SUCCEEDED, result=result)
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            self._finish(job_id, FAILED, error=str(e))
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None):
+        try:
+            payload = json.dumps(result) if result is not None else None
+        except (TypeError, ValueError) as e:
+            status, payload, error = FAILED, None, f"Result is not JSON serializable: {e}"
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (status, payload, error, time.time(), job_id)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record result of job {job_id}: {e}")
+
+    def _purge(self, conn, now: float):
+        if self.retention_seconds:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (SUCCEEDED, FAILED, now - self.retention_seconds)
+            )
@@ -0,0 +1,264 @@
+"""
+Incremental JSON parsing for Claude responses.
+Scans model output as it arrives, reports each nested object or array as soon
+as it is complete, and can repair a truncated response without rescanning it.
+"""
+
+import json
+from bisect import bisect_left
+from typing import Any, List, Optional, Tuple, Union
+
+PathPart = Union[str, int]
+
+
+class _Container:
+    __slots__ = ("kind", "start", "key", "index", "pending_key", "last_good")
+
+    def __init__(self, kind: str, start: int, key: Optional[PathPart]):
+        self.kind = kind            # "{" or "["
+        self.start = start          # offset of the opening bracket in the buffer
+        self.key = key              # key/index of this container in its parent
+        self.index = 0              # current element index (arrays only)
+        self.pending_key = None     # last object key seen (objects only)
+        self.last_good = start + 1  # offset just after the last complete member
+
+
+class IncrementalJSONParser:
+    """
+    Streaming scanner for a single top-level JSON value.
+
+    Text before the first "{" or "[" (e.g. a ```json fence) and after the
+    top-level value is ignored. Every character is examined once. Along the
+    way the scanner records what a plain json.loads would choke on in model
+    output - // comments and trailing commas - and leaves them out when
+    decoding.
+
+    When a container at depth <= max_depth closes, its value is returned from
+    feed() as a (path, value) pair, e.g. (("businessFunctions", 2), {...}) for
+    the third business function. finish() returns the whole value, closing a
+    truncated response at the last complete member of each open container.
+    """
+
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.buffer = ""
+        self.root: Any = None
+        self.done = False
+
+        self._pos = 0
+        self._started = False
+        self._root_start = -1
+        self._stack: List[_Container] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_comma = -1
+        # Sorted, non-overlapping (start, end) spans to drop when decoding
+        self._skips: List[Tuple[int, int]] = []
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple[PathPart, ...], Any]]:
+        """
+        Add a chunk of output and return the containers completed by it
+        """
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        length = len(buffer)
+        pos = self._pos
+
+        while pos < length and not self.done:
+            char = buffer[pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string_end(pos)
+                pos += 1
+                continue
+
+            if not self._started:
+                if char in "{[":
+                    self._started = True
+                    self._root_start = pos
+                else:
+                    pos += 1
+                    continue
+
+            if char in " \t\r\n":
+                pos += 1
+                continue
+
+            if char == "/":
+                # // line comment; wait for more input if we can't tell yet
+                if pos + 1 >= length:
+                    break
+                if buffer[pos + 1] == "/":
+                    end = buffer.find("\n", pos)
+                    if end == -1:
+                        break
+                    self._skips.append((pos, end))
+                    pos = end
+                    continue
+
+            if char == ",":
+                if self._stack:
+                    top = self._stack[-1]
+                    top.last_good = pos
+                    if top.kind == "[":
+                        top.index += 1
+                    else:
+                        top.pending_key = None
+                self._last_comma = pos
+                pos += 1
+                continue
+
+            if char in "}]" and self._last_comma != -1:
+                # Trailing comma before a closing bracket
+                self._skips.append((self._last_comma, self._last_comma + 1))
+            self._last_comma = -1
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in "{[":
+                self._stack.append(_Container(char, pos, self._child_key()))
+            elif char in "}]":
+                if self._stack:
+                    container = self._stack.pop()
+                    depth = len(self._stack)
+                    if self._stack:
+                        self._stack[-1].last_good = pos + 1
+                    if depth <= self.max_depth or depth == 0:
+                        value = self._decode(container.start, pos + 1)
+                        if depth == 0:
+                            self.root = value
+                            self.done = True
+                        if value is not None:
+                            completed.append((self._path(container), value))
+            pos += 1
+
+        self._pos = pos
+        return completed
+
+    @property
+    def depth(self) -> int:
+        return len(self._stack)
+
+    @property
+    def truncated(self) -> bool:
+        """
+        True if input started a JSON value that never closed
+        """
+        return self._started and not self.done
+
+    def finish(self) -> Any:
+        """
+        Return the parsed top-level value.
+
+        A complete value is decoded as-is (once). A truncated one is cut back to
+        the last complete member of each open container and closed, using only
+        the state tracked during scanning. Returns None if no value was found
+        or it cannot be decoded.
+        """
+        if not self._started:
+            return None
+        if self.done:
+            return self.root
+
+        # Cut back to the innermost open container's last complete member. Any
+        # partial member (open string, dangling key, unfinished number) after
+        # that point is dropped, as are open containers with no complete
+        # member yet; the remaining containers are closed in order.
+        depth = len(self._stack)
+        while depth > 1 and self._stack[depth - 1].last_good == self._stack[depth - 1].start + 1:
+            depth -= 1
+        open_containers = self._stack[:depth]
+        closers = "".join("}" if c.kind == "{" else "]" for c in reversed(open_containers))
+        text = self._text(self._root_start, open_containers[-1].last_good).rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+        return self._loads(text + closers)
+
+    def _child_key(self) -> Optional[PathPart]:
+        if not self._stack:
+            return None
+        parent = self._stack[-1]
+        if parent.kind == "[":
+            return parent.index
+        return parent.pending_key
+
+    def _on_string_end(self, end: int):
+        if not self._stack:
+            return
+        top = self._stack[-1]
+        if top.kind == "{" and top.pending_key is None:
+            # A string directly inside an object with no pending key is a key
+            raw = self.buffer[self._string_start:end + 1]
+            key = self._loads(raw)
+            top.pending_key = key if isinstance(key, str) else raw[1:-1]
+        else:
+            top.last_good = end + 1
+
+    def _path(self, container: _Container) -> Tuple[PathPart, ...]:
+        keys = [c.key for c in self._stack[1:]]
+        if self._stack:
+            keys.append(container.key)
+        return tuple(keys)
+
+    def _text(self, start: int, end: int) -> str:
+        """
+        Buffer slice with comment and trailing-comma spans removed
+        """
+        first = bisect_left(self._skips, (start, -1))
+        if first >= len(self._skips) or self._skips[first][0] >= end:
+            return self.buffer[start:end]
+        parts = []
+        cursor = start
+        for skip_start, skip_end in self._skips[first:]:
+            if skip_start >= end:
+                break
+            parts.append(self.buffer[cursor:skip_start])
+            cursor = min(skip_end, end)
+        parts.append(self.buffer[cursor:end])
+        return "".join(parts)
+
+    def _decode(self, start: int, end: int) -> Any:
+        return self._loads(self._text(start, end))
+
+    @staticmethod
+    def _loads(text: str) -> Any:
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+
+def parse_json_response(text: str, allow_truncated: bool = True) -> Tuple[Any, bool]:
+    """
+    Parse a complete model response in one pass.
+
+    Returns (value, truncated). Raises json.JSONDecodeError if no JSON value can
+    be recovered, or if the response was truncated and allow_truncated is False.
+    """
+    parser = IncrementalJSONParser(max_depth=0)
+    parser.feed(text)
+    return finish_json_response(parser, allow_truncated)
+
+
+def finish_json_response(parser: IncrementalJSONParser, allow_truncated: bool = True) -> Tuple[Any, bool]:
+    """
+    Finish a parser that has been fed a whole response, with the same
+    semantics as parse_json_response
+    """
+    if parser.truncated and not allow_truncated:
+        raise json.JSONDecodeError("Response JSON is truncated", parser.buffer, len(parser.buffer))
+    value = parser.finish()
+    if value is None:
+        # Surface the decoder's own error message for logging
+        json.loads(parser.buffer.strip() or "null")
+        raise json.JSONDecodeError("No JSON value found in response", parser.buffer, 0)
+    return value, parser.truncated
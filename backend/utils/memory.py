@@ -0,0 +1,148 @@
+"""
+Memory accounting for the Claude Use Case Explorer.
+Uses tracemalloc to measure the peak Python memory allocated while handling
+each request and to report the top allocation sites on demand.
+"""
+
+import linecache
+import logging
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Allocations made by the tracing machinery itself
+_IGNORED_FILES = [
+    tracemalloc.__file__,
+    linecache.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+]
+
+
+class MemoryTracker:
+    """
+    Per-request peak memory on top of tracemalloc's process-wide counters.
+
+    tracemalloc keeps one peak for the whole process, so the peak is reset
+    only when no other request is in flight. A request that overlapped
+    another one reports the peak of everything that ran meanwhile and is
+    flagged as overlapped.
+    """
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._starts = 0
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: Optional[int] = None):
+        """
+        Start tracing allocations. Adds CPU and memory overhead to every
+        allocation, more with more frames per traceback. frames only takes
+        effect if tracing isn't already running.
+        """
+        if not tracemalloc.is_tracing():
+            if frames:
+                self.frames = frames
+            tracemalloc.start(self.frames)
+            logger.info(f"Memory tracking started ({self.frames} frames per allocation)")
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._last_snapshot = None
+            logger.info("Memory tracking stopped")
+
+    def begin_request(self) -> Optional[Dict[str, Any]]:
+        """
+        Mark the start of a request. Returns a token for end_request, or None
+        when tracking is off.
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        with self._lock:
+            if self._in_flight == 0:
+                tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            token = {"baseline": current, "starts": self._starts, "overlapped": self._in_flight > 0}
+            self._in_flight += 1
+            self._starts += 1
+        return token
+
+    def peak_so_far(self, token: Dict[str, Any]) -> Tuple[int, int]:
+        """
+        (current, peak) bytes above the request's starting point so far
+        """
+        if not tracemalloc.is_tracing():
+            return 0, 0
+        current, peak = tracemalloc.get_traced_memory()
+        return current - token["baseline"], max(0, peak - token["baseline"])
+
+    def end_request(self, token: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Peak bytes allocated above the request's starting point, or None
+        """
+        if token is None:
+            return None
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            overlapped = token["overlapped"] or self._starts != token["starts"] + 1
+            if not tracemalloc.is_tracing():
+                return None
+            current, peak = tracemalloc.get_traced_memory()
+        return {
+            "peakBytes": max(0, peak - token["baseline"]),
+            "retainedBytes": current - token["baseline"],
+            "overlapped": overlapped
+        }
+
+    def snapshot(self, limit: int = 25, group_by: str = "lineno", compare: bool = False) -> Dict[str, Any]:
+        """
+        Current and peak traced memory plus the top allocation sites. With
+        compare, sites are ranked by growth since the previous snapshot.
+        group_by is "lineno", "filename" or "traceback".
+        """
+        if not tracemalloc.is_tracing():
+            raise ValueError("Memory tracking is not enabled")
+        if group_by not in ("lineno", "filename", "traceback"):
+            raise ValueError("group_by must be lineno, filename or traceback")
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FILES]
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        previous, self._last_snapshot = self._last_snapshot, snapshot
+
+        if compare and previous is not None:
+            stats = snapshot.compare_to(previous, group_by)[:limit]
+            top = [dict(self._site(stat.traceback, stat.size, stat.count),
+                        sizeDiff=stat.size_diff, countDiff=stat.count_diff) for stat in stats]
+        else:
+            stats = snapshot.statistics(group_by)[:limit]
+            top = [self._site(stat.traceback, stat.size, stat.count) for stat in stats]
+
+        return {
+            "currentBytes": current,
+            "peakBytes": peak,
+            "framesPerTrace": tracemalloc.get_traceback_limit(),
+            "groupBy": group_by,
+            "comparedToPrevious": bool(compare and previous is not None),
+            "top": top
+        }
+
+    @staticmethod
+    def _site(traceback: tracemalloc.Traceback, size: int, count: int) -> Dict[str, Any]:
+        # Oldest frame first, like a Python traceback; the allocation is last
+        frames: List[str] = [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+        site = {"site": frames[-1] if frames else "?", "size": size, "count": count}
+        if len(frames) > 1:
+            site["traceback"] = frames
+        return site
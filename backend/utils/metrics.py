@@ -0,0 +1,243 @@
+"""
+Metrics for the Claude Use Case Explorer.
+In-process counters and histograms (HTTP routes, Claude calls, token usage and
+estimated cost, parse failures) rendered in the Prometheus text format for
+/api/metrics.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; Claude calls and full analyses run from a second to a few minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# Bytes; peak Python allocations per request, 256 KB to 1 GB
+MEMORY_BUCKETS = tuple(2 ** power for power in range(18, 31))
+
+# USD per million input/output tokens by model prefix. Cache writes are billed
+# at 1.25x and cache reads at 0.1x the input rate.
+MODEL_PRICES = {
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-opus-4": (15.0, 75.0),
+}
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with optional labels
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Ordered collection of metrics rendered together
+    """
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route, method and status", ["route", "method", "status"]))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["route", "method"]))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "analysis_stage_duration_seconds", "Latency of request stages (scrape, prompt, claude, parse, ...)", ["stage"]))
+CLAUDE_REQUESTS = REGISTRY.register(Counter(
+    "claude_requests_total", "Claude API calls by model, operation and outcome", ["model", "operation", "outcome"]))
+CLAUDE_LATENCY = REGISTRY.register(Histogram(
+    "claude_request_duration_seconds", "Time spent waiting on Claude API calls", ["model", "operation"]))
+CLAUDE_TTFT = REGISTRY.register(Histogram(
+    "claude_time_to_first_token_seconds", "Time from sending a streamed Claude request to its first output token",
+    ["model", "operation"]))
+CLAUDE_TOKENS = REGISTRY.register(Counter(
+    "claude_tokens_total", "Claude tokens by model and type (input, output, cache_write, cache_read)",
+    ["model", "type"]))
+CLAUDE_COST = REGISTRY.register(Counter(
+    "claude_estimated_cost_usd_total", "Estimated Claude spend in USD at list prices", ["model"]))
+PARSE_FAILURES = REGISTRY.register(Counter(
+    "claude_parse_failures_total", "Claude responses that could not be parsed as JSON", ["operation"]))
+REQUEST_MEMORY_PEAK = REGISTRY.register(Histogram(
+    "http_request_memory_peak_bytes",
+    "Peak Python memory allocated during a request (when memory tracking is on); overlapped=true samples "
+    "include concurrent requests", ["route", "overlapped"], buckets=MEMORY_BUCKETS))
+
+
+def model_price(model: str) -> Optional[Tuple[float, float]]:
+    for prefix, price in MODEL_PRICES.items():
+        if model.startswith(prefix):
+            return price
+    return None
+
+
+def record_claude_call(model: str, operation: str, seconds: float, response: Any = None,
+                       outcome: str = "ok", first_token_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Record one Claude call: latency, time to first token, outcome and, if the
+    response carries usage, token counts and estimated cost. Returns the
+    usage summary.
+    """
+    CLAUDE_REQUESTS.inc(model=model, operation=operation, outcome=outcome)
+    CLAUDE_LATENCY.observe(seconds, model=model, operation=operation)
+    if first_token_seconds is not None:
+        CLAUDE_TTFT.observe(first_token_seconds, model=model, operation=operation)
+
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    tokens = {
+        "input": getattr(usage, "input_tokens", 0) or 0,
+        "output": getattr(usage, "output_tokens", 0) or 0,
+        "cache_write": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+        "cache_read": getattr(usage, "cache_read_input_tokens", 0) or 0,
+    }
+    for kind, count in tokens.items():
+        if count:
+            CLAUDE_TOKENS.inc(count, model=model, type=kind)
+
+    cost = None
+    price = model_price(model)
+    if price is not None:
+        input_price, output_price = price
+        cost = (tokens["input"] * input_price
+                + tokens["cache_write"] * input_price * CACHE_WRITE_MULTIPLIER
+                + tokens["cache_read"] * input_price * CACHE_READ_MULTIPLIER
+                + tokens["output"] * output_price) / 1_000_000
+        CLAUDE_COST.inc(cost, model=model)
+
+    logger.info(
+        f"Claude {operation} ({model}): {seconds:.2f}s"
+        + (f" (first token {first_token_seconds:.2f}s)" if first_token_seconds is not None else "")
+        + f", {tokens['input']} in, {tokens['output']} out, "
+        f"{tokens['cache_write']} cache write, {tokens['cache_read']} cache read"
+        + (f", ~${cost:.4f}" if cost is not None else "")
+    )
+    return {**tokens, "costUSD": cost}
+
+
+def record_parse_failure(operation: str):
+    PARSE_FAILURES.inc(operation=operation)
+
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format (version 0.0.4)
+    """
+    return REGISTRY.render()
@@ -0,0 +1,169 @@
+"""
+HTTP page cache for the Claude Use Case Explorer.
+Keeps the extracted text of crawled pages in SQLite together with their
+ETag/Last-Modified validators, so repeat analyses of the same site revalidate
+with a conditional GET instead of re-downloading and re-parsing every page.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from utils.result_cache import normalize_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_CACHE_PATH = Path(__file__).parent.parent / "data" / "cache" / "pages.sqlite3"
+
+
+class PageCache:
+    """
+    SQLite-backed cache of extracted pages keyed by normalized URL.
+
+    Entries younger than ttl_seconds are served as-is. Older entries are kept
+    and returned with their validators so the caller can send a conditional
+    GET; a 304 marks them fresh again via touch(). The total stored size is
+    capped at max_bytes by evicting the least recently used pages.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 24 * 3600,
+                 max_bytes: int = 50 * 1024 * 1024):
+        self.path = str(path or DEFAULT_PAGE_CACHE_PATH)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, page TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "size INTEGER NOT NULL, fetched_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def count(self, outcome: str):
+        """
+        Record a lookup outcome: "hit", "revalidated" or "miss"
+        """
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "revalidated":
+                self.revalidated += 1
+            else:
+                self.misses += 1
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Return {"page", "etag", "lastModified", "fresh"} for a cached URL, or
+        None. Stale entries are returned with fresh=False for revalidation.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT page, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                    (normalize_url(url),)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (now, normalize_url(url)))
+            page, etag, last_modified, fetched_at = row
+            return {
+                "page": json.loads(page),
+                "etag": etag,
+                "lastModified": last_modified,
+                "fresh": not self.ttl_seconds or now - fetched_at <= self.ttl_seconds
+            }
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Page cache read failed: {e}")
+            return None
+
+    def set(self, url: str, page: Dict[str, Any], etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """
+        Store an extracted page, then evict least recently used pages until
+        the cache fits in max_bytes
+        """
+        now = time.time()
+        try:
+            payload = json.dumps(page)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO pages (url, page, etag, last_modified, size, fetched_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (normalize_url(url), payload, etag, last_modified, len(payload.encode("utf-8")), now, now)
+                )
+                self._evict(conn)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Page cache write failed: {e}")
+
+    def touch(self, url: str):
+        """
+        Mark a page fresh after a 304 Not Modified
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?",
+                    (now, now, normalize_url(url))
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Page cache write failed: {e}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk pages from least to most recently used until enough is freed
+        excess = total - self.max_bytes
+        doomed = []
+        for url, size in conn.execute("SELECT url, size FROM pages ORDER BY last_access"):
+            if excess <= 0:
+                break
+            doomed.append((url,))
+            excess -= size
+        conn.executemany("DELETE FROM pages WHERE url = ?", doomed)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Lookup counters for this process plus the current entries and size
+        """
+        try:
+            with self._connect() as conn:
+                entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl_seconds
+        }
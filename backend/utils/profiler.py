@@ -0,0 +1,155 @@
+"""
+Sampling profiler for the Claude Use Case Explorer.
+Profiles a single request on demand by sampling Python stacks from a
+background thread, and keeps the results as collapsed stacks (the input
+format of flamegraph.pl and speedscope) in a directory with a retention limit.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent / "data" / "profiles"
+
+# Innermost frames of threads that are idle in a pool or queue; not sampled
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of running threads every interval seconds until
+    stopped. The profiled thread's stacks are rooted at "request"; other busy
+    threads (e.g. executor workers doing the request's fan-out calls) are
+    rooted at their thread name. Idle pool threads are skipped.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._start
+        return self.stacks
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if thread_id != self.thread_id and (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                root = "request" if thread_id == self.thread_id else names.get(thread_id, f"thread-{thread_id}")
+                stack.append(root)
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """
+        One "frame;frame;... count" line per distinct stack, most frequent first
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """
+    Directory of collapsed-stack profiles keeping at most max_files, and none
+    older than max_age_seconds
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_files: int = 50,
+                 max_age_seconds: float = 7 * 24 * 3600):
+        self.directory = Path(directory or DEFAULT_PROFILE_DIR)
+        self.max_files = max_files
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+
+    def name_for(self, label: str) -> str:
+        """
+        File name for a new profile: UTC timestamp plus a sanitized label
+        """
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        return f"{stamp}-{_SAFE_NAME.sub('_', label).strip('_')[:80]}.collapsed"
+
+    def save(self, name: str, profiler: SamplingProfiler):
+        """
+        Write a profile and apply the retention limits
+        """
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            (self.directory / name).write_text(profiler.collapsed())
+            self._prune()
+        logger.info(f"Saved profile {name}: {profiler.samples} samples over {profiler.duration:.2f}s")
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = []
+        for path in self._files():
+            stat = path.stat()
+            profiles.append({"name": path.name, "bytes": stat.st_size, "createdAt": stat.st_mtime})
+        return profiles
+
+    def path(self, name: str) -> Optional[Path]:
+        """
+        Path of a stored profile, or None for unknown or unsafe names
+        """
+        if name != os.path.basename(name) or not name.endswith(".collapsed"):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def _files(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        files = [path for path in self.directory.glob("*.collapsed") if path.is_file()]
+        return sorted(files, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def _prune(self):
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds else None
+        for index, path in enumerate(self._files()):
+            if index >= self.max_files or (cutoff is not None and path.stat().st_mtime < cutoff):
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.error(f"Failed to remove old profile {path.name}: {e}")
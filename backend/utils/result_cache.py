@@ -0,0 +1,164 @@
+"""
+Persistent result cache for the Claude Use Case Explorer.
+Stores finished Claude analyses in SQLite so that re-running the same company
+is served from disk instead of another model call.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / "data" / "cache" / "results.sqlite3"
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize free text for cache keys: trim and collapse whitespace
+    """
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for cache keys: default scheme, lowercase host, no fragment
+    or trailing slash
+    """
+    url = (url or "").strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Hash JSON-serializable key parts into a stable cache key
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite-backed key/value cache for JSON results with TTL and LRU eviction.
+
+    Every operation opens its own short-lived connection, so the cache can be
+    shared by threads and by several gunicorn workers. Storage errors are
+    logged and treated as cache misses; they never fail an analysis.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1000, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = str(path or DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached value for key, or None if missing or expired
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._count(False)
+                    return None
+                value, created_at = row
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._count(False)
+                    return None
+                conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+            self._count(True)
+            return json.loads(value)
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Result cache read failed: {e}")
+            self._count(False)
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """
+        Store a value, then drop expired entries and the least recently used
+        entries beyond max_entries
+        """
+        now = time.time()
+        try:
+            payload = json.dumps(value)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, now, now)
+                )
+                if self.ttl_seconds:
+                    conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,))
+                conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.error(f"Result cache write failed: {e}")
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters for this process plus the current number of entries
+        """
+        try:
+            with self._connect() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds
+        }
@@ -0,0 +1,98 @@
+"""
+Single-flight call coalescing for the Claude Use Case Explorer.
+Concurrent calls with the same key share one execution of the underlying
+function instead of each starting their own Claude request.
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time within this process.
+
+    The first caller for a key executes the function; callers arriving while
+    it runs block until it finishes and receive a copy of its result (or the
+    same exception). Once the call completes the key is released, so later
+    callers start a new call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Execute fn for key, or wait for the in-flight execution.
+
+        Returns (result, shared), where shared is True if the result came from
+        a call started by another thread.
+        """
+        call, leader = self.begin(key)
+        if not leader:
+            self.wait(call)
+            return self.result(call), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result, False
+
+    def begin(self, key: str) -> Tuple[_Call, bool]:
+        """
+        Claim key for a call driven by the caller (e.g. a streaming generator).
+
+        Returns (call, leader). The leader must pass call to finish() exactly
+        once, whether it succeeds or fails; other callers wait() on it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            return call, True
+
+    def finish(self, key: str, call: _Call, result: Any = None, error: Optional[BaseException] = None):
+        """
+        Publish the leader's result (or exception) and release the key
+        """
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    def wait(self, call: _Call, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the leader to finish. Returns False if timeout expired first.
+        """
+        return call.done.wait(timeout)
+
+    def result(self, call: _Call) -> Any:
+        """
+        A copy of a finished call's result, or its exception raised
+        """
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    def in_flight(self) -> int:
+        """
+        Number of keys currently executing
+        """
+        with self._lock:
+            return len(self._calls)
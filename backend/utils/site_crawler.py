@@ -0,0 +1,479 @@
+"""
+Website crawler for the Claude Use Case Explorer.
+Fetches a company's home page and its About/Products/Services/Careers pages
+over pooled connections, concurrently and within a total deadline. Downloads
+are streamed and capped, and HTML is parsed in worker processes.
+"""
+
+import logging
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import requests
+import urllib3
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, PreformattedString, Tag
+from requests.adapters import HTTPAdapter
+
+from utils.page_cache import PageCache
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# Sub-pages worth fetching, in priority order, with the words that identify
+# them in a link's text or path
+PAGE_KINDS = [
+    ("ABOUT", ("about", "company", "who-we-are", "who we are", "our-story", "our story", "team")),
+    ("PRODUCTS", ("products", "product", "solutions", "platform")),
+    ("SERVICES", ("services", "service", "what-we-do", "what we do")),
+    ("CAREERS", ("careers", "career", "jobs", "join-us", "join us", "work-with-us")),
+]
+
+# Bump when extract_page output changes so cached pages are re-extracted
+EXTRACTOR_VERSION = 2
+
+BLOCK_TAGS = [
+    "p", "div", "section", "article", "main", "li", "dd", "dt", "td", "th", "tr", "blockquote",
+    "h1", "h2", "h3", "h4", "h5", "h6", "br", "hr", "pre", "address", "figcaption", "caption"
+]
+BOILERPLATE_TAGS = ["nav", "footer", "aside", "form", "button", "select", "dialog", "menu"]
+BOILERPLATE_ROLES = {"navigation", "contentinfo", "dialog", "alertdialog", "menu", "menubar", "search"}
+# Share of a list's text that may be link text before it counts as a menu
+LINK_DENSITY_LIMIT = 0.7
+
+_BOILERPLATE_NAMES = re.compile(
+    r"cookie|consent|gdpr|newsletter|subscribe|modal|popup|breadcrumb|navbar|^nav$|^nav[-_]|[-_]nav$|"
+    r"menu|footer|sidebar|social|share|skip[-_]link|signup|login",
+    re.IGNORECASE
+)
+_KEEP_TAGS = {"html", "body", "main", "article"}
+_BLOCK_SET = frozenset(BLOCK_TAGS)
+
+_SKIP_EXTENSIONS = re.compile(r"\.(pdf|jpe?g|png|gif|svg|webp|zip|mp4|mp3|docx?|xlsx?|pptx?)$", re.IGNORECASE)
+
+
+def normalize_site_url(url: str) -> str:
+    """
+    Add a scheme if missing
+    """
+    url = url.strip()
+    if not url.startswith(("http://", "https://")):
+        url = "https://" + url
+    return url
+
+
+def _site_host(url: str) -> str:
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def extract_page(html: str, url: str) -> Dict[str, Any]:
+    """
+    Extract the meta description, links and main text of an HTML page.
+
+    Links are collected from the whole page; the text leaves out navigation,
+    footers, cookie banners and link lists, and has one paragraph (block
+    element) per line.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    # Remove elements that never carry visible text
+    for element in soup(["script", "style", "noscript", "svg", "template", "iframe"]):
+        element.decompose()
+
+    meta_description = ""
+    meta_tag = soup.find("meta", attrs={"name": "description"})
+    if meta_tag and meta_tag.get("content"):
+        meta_description = meta_tag["content"]
+
+    links = []
+    for anchor in soup.find_all("a", href=True):
+        links.append((anchor["href"], anchor.get_text(" ", strip=True)))
+
+    _remove_boilerplate(soup)
+
+    text = "\n".join(_paragraphs(soup))
+
+    soup.decompose()
+    return {
+        "url": url,
+        "text": text,
+        "metaDescription": meta_description,
+        "links": links,
+        "extractor": EXTRACTOR_VERSION
+    }
+
+
+def _paragraphs(soup: BeautifulSoup) -> List[str]:
+    """
+    Visible text with one paragraph per block element; inline markup inside a
+    paragraph stays joined. Walks the tree once, iteratively.
+    """
+    paragraphs = []
+    parts: List[str] = []
+
+    def flush():
+        if parts:
+            paragraph = re.sub(r"\s+", " ", "".join(parts)).strip()
+            if paragraph:
+                paragraphs.append(paragraph)
+            parts.clear()
+
+    stack = [(soup, iter(soup.children))]
+    while stack:
+        element, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if element.name in _BLOCK_SET:
+                flush()
+            elif element.name == "a":
+                parts.append(" ")
+        elif isinstance(child, Tag):
+            if child.name in _BLOCK_SET:
+                flush()
+            stack.append((child, iter(child.children)))
+        elif isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+            parts.append(str(child))
+    flush()
+    return paragraphs
+
+
+def _removed(element: Tag) -> bool:
+    # Read the flag directly: a missing attribute on a live Tag falls through
+    # to Tag.__getattr__, which searches the element's whole subtree
+    return bool(element.__dict__.get("_decomposed"))
+
+
+def _remove_boilerplate(soup: BeautifulSoup):
+    for element in soup(BOILERPLATE_TAGS):
+        if not _removed(element):
+            element.decompose()
+
+    for element in soup.find_all(True):
+        if not element.attrs or element.name in _KEEP_TAGS or _removed(element):
+            continue
+        names = [element.get("id") or ""] + list(element.get("class") or [])
+        if (element.get("role") in BOILERPLATE_ROLES or element.get("aria-hidden") == "true"
+                or any(_BOILERPLATE_NAMES.search(name) for name in names if isinstance(name, str))):
+            element.decompose()
+
+    # Lists and tables that are mostly links are menus, not content. Text and
+    # link lengths come from one pass over the tree, so nested lists are not
+    # re-scanned once per level.
+    lengths = _text_lengths(soup)
+    for element in soup.find_all(["ul", "ol", "table", "dl"]):
+        if _removed(element):
+            continue
+        text_length, link_length, anchors = lengths[id(element)]
+        if anchors >= 3 and text_length and link_length / text_length > LINK_DENSITY_LIMIT:
+            element.decompose()
+
+
+def _text_lengths(soup: BeautifulSoup) -> Dict[int, Tuple[int, int, int]]:
+    """
+    For every tag, by id(): the length of get_text(" ", strip=True), the
+    summed length of the same for the anchors inside it, and the number of
+    those anchors. Computed in one iterative post-order walk.
+    """
+    lengths: Dict[int, Tuple[int, int, int]] = {}
+    # Per open element: [stripped characters, strings, link characters, anchors]
+    stack = [(soup, iter(soup.children), [0, 0, 0, 0])]
+    while stack:
+        element, children, totals = stack[-1]
+        child = next(children, None)
+        if isinstance(child, Tag):
+            stack.append((child, iter(child.children), [0, 0, 0, 0]))
+        elif child is not None:
+            if isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+                stripped = len(child.strip())
+                if stripped:
+                    totals[0] += stripped
+                    totals[1] += 1
+        else:
+            stack.pop()
+            text_length = totals[0] + max(totals[1] - 1, 0)
+            if element.name == "a":
+                totals[2] += text_length
+                totals[3] += 1
+            lengths[id(element)] = (text_length, totals[2], totals[3])
+            if stack:
+                parent = stack[-1][2]
+                for index in range(4):
+                    parent[index] += totals[index]
+    return lengths
+
+
+def select_subpages(base_url: str, links: List[Tuple[str, str]], limit: int) -> List[Tuple[str, str]]:
+    """
+    Pick up to `limit` same-site links as (kind, url), at most one per page
+    kind, preferring links whose path matches over links whose text matches
+    """
+    host = _site_host(base_url)
+    base = urldefrag(base_url)[0].rstrip("/")
+    selected = []
+    seen_urls = set()
+    for kind, words in PAGE_KINDS:
+        if len(selected) >= limit:
+            break
+        best = None
+        for href, text in links:
+            if href.startswith(("mailto:", "tel:", "javascript:", "#")):
+                continue
+            absolute = urldefrag(urljoin(base_url, href))[0]
+            parts = urlsplit(absolute)
+            if parts.scheme not in ("http", "https") or _site_host(absolute) != host:
+                continue
+            if absolute.rstrip("/") == base or absolute in seen_urls or _SKIP_EXTENSIONS.search(parts.path):
+                continue
+            path = parts.path.lower()
+            label = (text or "").lower()
+            if any(word in path for word in words):
+                # Shorter paths are usually the section's landing page
+                score = (0, path.count("/"), len(path))
+            elif any(word in label for word in words):
+                score = (1, path.count("/"), len(path))
+            else:
+                continue
+            if best is None or score < best[0]:
+                best = (score, absolute)
+        if best is not None:
+            seen_urls.add(best[1])
+            selected.append((kind, best[1]))
+    return selected
+
+
+class SiteCrawler:
+    """
+    Crawls a company site: the home page first, then up to max_pages - 1
+    sub-pages in parallel. One pooled requests.Session is shared by all
+    crawls; everything must finish within deadline_seconds, and sub-pages that
+    miss it are skipped. With a PageCache, fresh pages are served from disk and
+    stale ones are revalidated with a conditional GET.
+
+    Bodies are streamed and cut off after max_bytes. HTML extraction runs in a
+    pool of extract_processes worker processes so parsing does not compete
+    with request threads for the GIL; with 0 processes, or if the pool breaks,
+    pages are extracted inline.
+    """
+
+    def __init__(self, max_pages: int = 5, deadline_seconds: float = 20.0, request_timeout: float = 10.0,
+                 max_workers: int = 4, cache: Optional[PageCache] = None, max_bytes: int = 2 * 1024 * 1024,
+                 extract_processes: int = 2):
+        self.max_pages = max_pages
+        self.deadline_seconds = deadline_seconds
+        self.request_timeout = request_timeout
+        self.max_workers = max_workers
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.extract_processes = extract_processes
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(16, max_workers * 2))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crawl")
+
+    def crawl(self, url: str) -> List[Dict[str, Any]]:
+        """
+        Return the extracted pages of a site: the home page (kind "MAIN") then
+        the sub-pages that were fetched in time. Raises if the home page
+        cannot be fetched.
+        """
+        url = normalize_site_url(url)
+        deadline = time.monotonic() + self.deadline_seconds
+
+        home = self.fetch_page(url, deadline)
+        home["kind"] = "MAIN"
+        pages = [home]
+
+        subpages = select_subpages(home["url"], home["links"], self.max_pages - 1)
+        if not subpages:
+            return pages
+
+        futures = [(kind, self._executor.submit(self.fetch_page, page_url, deadline)) for kind, page_url in subpages]
+        wait([future for _, future in futures], timeout=max(0.0, deadline - time.monotonic()))
+        for kind, future in futures:
+            if not future.done():
+                future.cancel()
+                logger.info(f"Skipped {kind.lower()} page of {url}: crawl deadline reached")
+                continue
+            try:
+                page = future.result()
+            except Exception as e:
+                logger.info(f"Skipped {kind.lower()} page of {url}: {e}")
+                continue
+            page["kind"] = kind
+            pages.append(page)
+        return pages
+
+    def fetch_page(self, url: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Download and extract one page, giving up at the deadline
+        """
+        cached = self.cache.get(url) if self.cache is not None else None
+        if cached is not None and cached["page"].get("extractor") != EXTRACTOR_VERSION:
+            cached = None
+        if cached is not None and cached["fresh"]:
+            self.cache.count("hit")
+            return cached["page"]
+
+        timeout = self.request_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                raise TimeoutError("Crawl deadline reached")
+
+        headers = {}
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["lastModified"]:
+                headers["If-Modified-Since"] = cached["lastModified"]
+
+        try:
+            with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    self.cache.touch(url)
+                    self.cache.count("revalidated")
+                    return cached["page"]
+                response.raise_for_status()
+                html = self._read_body(response, deadline)
+                final_url = response.url
+                validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        except (requests.RequestException, TimeoutError) as e:
+            if cached is None:
+                raise
+            # Better a stale page than none while the site is unreachable
+            logger.info(f"Serving stale copy of {url}: {e}")
+            self.cache.count("hit")
+            return cached["page"]
+
+        page = self._extract(html, final_url, deadline)
+        if self.cache is not None:
+            self.cache.count("miss")
+            self.cache.set(url, page, *validators)
+        return page
+
+    def _read_body(self, response: requests.Response, deadline: Optional[float] = None) -> str:
+        """
+        Read at most max_bytes of a streamed response and decode it, giving
+        up at the deadline
+        """
+        content_type = response.headers.get("Content-Type", "")
+        if content_type and "html" not in content_type and "text" not in content_type:
+            raise ValueError(f"Not an HTML page: {content_type}")
+
+        chunks = []
+        size = 0
+        for chunk in self._iter_body(response):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                logger.info(f"Truncated {response.url} at {self.max_bytes} bytes")
+                break
+            # The request timeout only bounds each socket read; a server
+            # dripping its body could otherwise run past the deadline
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Crawl deadline reached")
+        body = b"".join(chunks)[:self.max_bytes]
+        return body.decode(response.encoding or "utf-8", errors="replace")
+
+    @staticmethod
+    def _iter_body(response: requests.Response) -> Iterator[bytes]:
+        """
+        Decoded body chunks as soon as they arrive. iter_content blocks until
+        a whole chunk has been read, so use read1 where urllib3 has it.
+        """
+        read1 = getattr(response.raw, "read1", None)
+        if read1 is None:
+            yield from response.iter_content(chunk_size=64 * 1024)
+            return
+        while True:
+            # Wrapped like iter_content does, so callers see requests errors
+            try:
+                chunk = read1(64 * 1024, decode_content=True)
+            except urllib3.exceptions.ReadTimeoutError as e:
+                raise requests.exceptions.ConnectionError(e)
+            except urllib3.exceptions.DecodeError as e:
+                raise requests.exceptions.ContentDecodingError(e)
+            except urllib3.exceptions.HTTPError as e:
+                raise requests.exceptions.ChunkedEncodingError(e)
+            if not chunk:
+                return
+            yield chunk
+
+    def _extract(self, html: str, url: str, deadline: Optional[float]) -> Dict[str, Any]:
+        pool = self._get_process_pool()
+        if pool is None:
+            return extract_page(html, url)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return pool.submit(extract_page, html, url).result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError("Crawl deadline reached")
+        except (BrokenProcessPool, OSError) as e:
+            logger.error(f"Extraction pool failed, extracting inline: {e}")
+            with self._pool_lock:
+                if self._process_pool is pool:
+                    self._process_pool = None
+                    self.extract_processes = 0
+            pool.shutdown(wait=False)
+            return extract_page(html, url)
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        # Created on first use. Workers are started by a forkserver (or
+        # spawned), never forked from this process: it runs request, crawler
+        # and job threads, and a fork could copy a lock one of them holds.
+        if self.extract_processes <= 0:
+            return None
+        with self._pool_lock:
+            if self._process_pool is None and self.extract_processes > 0:
+                try:
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.extract_processes, mp_context=multiprocessing.get_context(method)
+                    )
+                except (OSError, NotImplementedError) as e:
+                    logger.error(f"Extraction pool unavailable, extracting inline: {e}")
+                    self.extract_processes = 0
+            return self._process_pool
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+        with self._pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False)
+                self._process_pool = None
+
+
+def format_pages(pages: List[Dict[str, Any]]) -> str:
+    """
+    Merge crawled pages into the website content block of the analysis prompt
+    """
+    home = pages[0]
+    meta = f"META DESCRIPTION: {home['metaDescription']}\n\n" if home.get("metaDescription") else ""
+    content = f"URL: {home['url']}\n\n{meta}MAIN PAGE CONTENT:\n{home['text']}\n\n"
+    for page in pages[1:]:
+        content += f"{page['kind']} PAGE CONTENT ({page['url']}):\n{page['text']}\n\n"
+    return content
@@ -0,0 +1,184 @@
+"""
+Prompt template registry for the Claude Use Case Explorer.
+Loads and validates the prompt templates in data/templates once, keeps them
+in memory with content-hash versions for cache keys, and reloads them when
+the files on disk change.
+"""
+
+import hashlib
+import logging
+import os
+import string
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATES_DIR = Path(__file__).parent.parent / "data" / "templates"
+
+# Template file -> the placeholders it must contain (and the only ones allowed)
+TEMPLATE_FIELDS: Dict[str, Set[str]] = {
+    "company_website_prompt.txt": {"url", "content"},
+    "company_description_prompt.txt": {"description"},
+    "extraction_prompt.txt": {"url", "content"},
+}
+
+
+class TemplateError(ValueError):
+    """
+    A template is not a valid str.format template for its fields
+    """
+
+
+class PromptTemplate:
+    """
+    One loaded template and the content hash of its text
+    """
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+    def format(self, **fields: str) -> str:
+        return self.text.format(**fields)
+
+
+def _placeholders(text: str) -> Set[str]:
+    """
+    Top-level field names used by a str.format template. Raises ValueError on
+    unbalanced braces.
+    """
+    names = set()
+    for _, field, _, _ in string.Formatter().parse(text):
+        if field is not None:
+            names.add(field.split(".")[0].split("[")[0])
+    return names
+
+
+def validate_template(name: str, text: str, fields: Set[str]):
+    """
+    Check that text formats with exactly the given fields (literal braces,
+    e.g. in JSON examples, must be doubled)
+    """
+    try:
+        used = _placeholders(text)
+    except ValueError as e:
+        raise TemplateError(f"Template {name} is not a valid format string: {e}") from e
+    unknown = used - fields
+    if unknown:
+        raise TemplateError(f"Template {name} has unknown placeholders "
+                            f"{', '.join(sorted(repr(field) for field in unknown))} (literal braces must be doubled)")
+    missing = fields - used
+    if missing:
+        raise TemplateError(f"Template {name} is missing placeholders: {', '.join(sorted(missing))}")
+
+
+class TemplateSnapshot:
+    """
+    Immutable set of loaded templates. version changes whenever any template
+    does; each template also has its own version.
+    """
+
+    def __init__(self, templates: Dict[str, PromptTemplate]):
+        self.templates = templates
+        self.version = hashlib.sha256(
+            "\x00".join(f"{name}:{templates[name].version}" for name in sorted(templates)).encode("utf-8")
+        ).hexdigest()[:12]
+
+    def get(self, name: str) -> PromptTemplate:
+        return self.templates[name]
+
+
+class TemplateRegistry:
+    """
+    Process-wide, thread-safe holder of the current template snapshot.
+
+    The template files are stat()ed at most once every `check_interval`
+    seconds; when any of them changes all are re-read and validated, and the
+    snapshot is swapped only if every template is valid.
+    """
+
+    def __init__(self, directory: Optional[str] = None, fields: Optional[Dict[str, Set[str]]] = None,
+                 check_interval: float = 2.0):
+        self.directory = Path(directory or DEFAULT_TEMPLATES_DIR)
+        self.fields = fields or TEMPLATE_FIELDS
+        self.check_interval = check_interval
+        self._snapshot: Optional[TemplateSnapshot] = None
+        self._stat_key = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> TemplateSnapshot:
+        """
+        Return the current templates, reloading them if a file has changed.
+
+        Raises TemplateError or OSError if the templates have never been loaded
+        and are missing or invalid. After a successful load, a broken edit
+        keeps serving the last good templates.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._last_check < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._last_check < self.check_interval:
+                return self._snapshot
+            try:
+                self._reload_if_changed()
+            except Exception as e:
+                if self._snapshot is None:
+                    raise
+                logger.error(f"Error reloading prompt templates from {self.directory}: {e}")
+            finally:
+                self._last_check = time.monotonic()
+            return self._snapshot
+
+    def get(self, name: str) -> PromptTemplate:
+        return self.snapshot().get(name)
+
+    @property
+    def version(self) -> str:
+        return self.snapshot().version
+
+    def _stat(self) -> Tuple:
+        key = []
+        for name in sorted(self.fields):
+            stat = os.stat(self.directory / name)
+            key.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(key)
+
+    def _reload_if_changed(self):
+        stat_key = self._stat()
+        if self._snapshot is not None and stat_key == self._stat_key:
+            return
+
+        templates = {}
+        for name, fields in self.fields.items():
+            text = (self.directory / name).read_text(encoding="utf-8")
+            validate_template(name, text, fields)
+            templates[name] = PromptTemplate(name, text)
+        snapshot = TemplateSnapshot(templates)
+
+        if self._snapshot is None or snapshot.version != self._snapshot.version:
+            self._snapshot = snapshot
+            logger.info(f"Loaded {len(templates)} prompt templates (version {snapshot.version})")
+        self._stat_key = stat_key
+
+
+_default_registry: Optional[TemplateRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    """
+    Return the shared registry for the bundled prompt templates
+    """
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = TemplateRegistry(os.environ.get("TEMPLATES_DIR") or None)
+    return _default_registry
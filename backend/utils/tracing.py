@@ -0,0 +1,155 @@
+"""
+Per-request tracing for the Claude Use Case Explorer.
+Records timed spans for the stages of a request (scraping, prompt building,
+Claude calls, parsing, ROI post-processing) in a context variable, for the
+Server-Timing header and an optional JSON-lines trace log.
+"""
+
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from utils.metrics import STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Spans recorded while handling one request. Spans may be added from
+    worker threads that run with a copy of the request's context.
+    """
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        self.start = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, duration: float, **attrs: Any):
+        entry = {
+            "name": name,
+            "startMs": round((start - self.start) * 1000, 2),
+            "durationMs": round(duration * 1000, 2)
+        }
+        if attrs:
+            entry["attrs"] = attrs
+        with self._lock:
+            self.spans.append(entry)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value: one entry per span name with the summed
+        duration (and the call count when a stage ran more than once), plus
+        the total so far
+        """
+        totals: "OrderedDict[str, List[float]]" = OrderedDict()
+        with self._lock:
+            for entry in self.spans:
+                total = totals.setdefault(entry["name"], [0.0, 0])
+                total[0] += entry["durationMs"]
+                total[1] += 1
+        parts = []
+        for name, (duration, count) in totals.items():
+            desc = f';desc="{count} calls"' if count > 1 else ""
+            parts.append(f"{name}{desc};dur={duration:.1f}")
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "requestId": self.request_id,
+            "startedAt": self.started_at,
+            "totalMs": round(self.elapsed() * 1000, 2),
+            "spans": spans
+        }
+
+
+def start_trace(request_id: Optional[str] = None) -> Trace:
+    """
+    Begin a trace for the current context (one per request)
+    """
+    trace = Trace(request_id)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace():
+    _current_trace.set(None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[None]:
+    """
+    Time a stage. Recorded in the current trace, if any, and in the stage
+    latency histogram.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_LATENCY.observe(duration, stage=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, start, duration, **attrs)
+
+
+def add_timing(name: str, seconds: float, **attrs: Any):
+    """
+    Record a measurement that is not a block of code, e.g. time to first token
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, time.perf_counter() - seconds, seconds, **attrs)
+
+
+def in_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap fn to run in a copy of the current context, so spans recorded on
+    executor threads land in the submitting request's trace. Wrap once per
+    submission; a context can't be entered by two threads at a time.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+class TraceLog:
+    """
+    Appends finished traces as JSON lines to a file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._logger = logging.getLogger(f"{__name__}.log")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(handler)
+
+    def write(self, trace: Trace, **fields: Any):
+        record = trace.to_dict()
+        record.update(fields)
+        try:
+            self._logger.info(json.dumps(record, default=str))
+        except Exception as e:
+            logger.error(f"Failed to write trace {trace.request_id}: {e}")
@@ -0,0 +1,357 @@
+"""
+Use case ROI math for the Claude Use Case Explorer.
+The post-processing applied to Claude's matching output (annual ROI, quick win
+score and applicable hours per business function), shared by match_use_cases
+and the recompute-only ROI endpoint so edited numbers never need another
+Claude call. Combined-analysis results are scored with the results page's
+per-use-case formula instead.
+"""
+
+import copy
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+# Role name fragments mapped to the legacy use case categories
+ROLE_TO_CATEGORY = {
+    "Engineering/Development": "coding",
+    "Software Engineer": "coding",
+    "Developer": "coding",
+    "Customer Service": "customer_service",
+    "Support": "customer_service",
+    "Marketing": "content_creation",
+    "Content": "content_creation",
+    "Sales": "productivity",
+    "Legal": "document_qa",
+    "Compliance": "document_qa",
+    "Research": "document_qa",
+    "Data Analysis": "document_qa",
+    "Operations": "productivity",
+    "Administration": "productivity",
+    "Executive": "productivity",
+    "Management": "productivity"
+}
+
+# Default hourly rates for ROI calculation (US baseline)
+# Based on 2024/2025 market data
+# Aligned with our 9 standardized business functions
+DEFAULT_HOURLY_RATES = {
+    "Executive/Leadership": 100,      # ~$200k/year = $100/hr
+    "Sales": 50,                      # ~$100k/year = $50/hr
+    "Marketing": 40,                  # ~$80k/year = $40/hr
+    "Product & Engineering": 60,      # ~$120k/year = $60/hr (includes IT/DevOps)
+    "Operations": 30,                 # ~$60k/year = $30/hr
+    "Finance & Accounting": 55,       # ~$110k/year = $55/hr
+    "Human Resources": 35,            # ~$70k/year = $35/hr
+    "Legal & Compliance": 75,         # ~$150k/year = $75/hr
+    "Customer Support": 20,           # $17-22/hr US average
+    "Other": 35                       # Generic professional fallback
+}
+
+DEFAULT_HOURLY_RATE = 35
+HOURS_PER_YEAR = 2000   # Salary to hourly rate
+WORK_WEEKS_PER_YEAR = 50
+HOURS_PER_WEEK = 40
+
+# Results page (UseCaseMatchesV2) formula for combined-analysis results
+COMBINED_WEEKS_PER_YEAR = 52
+COMBINED_DEFAULT_HOURS_PER_WEEK = 5
+COMBINED_DEFAULT_TIME_SAVINGS_PERCENT = 20
+COMBINED_DEFAULT_SALARY_USD = 80000
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive substring lookup over an ordered keyword mapping.
+
+    Equivalent to returning the value of the first key (in mapping order) with
+    key.lower() in text.lower(), but compiled into one regex: each key is an
+    alternative "^.*?key", and alternatives are tried in order, so the first
+    matching group is the highest-priority key found anywhere in the text.
+    """
+
+    def __init__(self, mapping: Dict[str, Any]):
+        self._values = list(mapping.values())
+        self._pattern = re.compile(
+            "^(?:" + "|".join(f".*?({re.escape(key.lower())})" for key in mapping) + ")",
+            re.DOTALL
+        )
+
+    def match(self, text: str, default: Any = None) -> Any:
+        found = self._pattern.match(text.lower())
+        if found is None:
+            return default
+        return self._values[found.lastindex - 1]
+
+
+_CATEGORY_MATCHER = KeywordMatcher(ROLE_TO_CATEGORY)
+_RATE_MATCHER = KeywordMatcher(DEFAULT_HOURLY_RATES)
+
+
+@lru_cache(maxsize=4096)
+def role_category(role_name: str) -> str:
+    """
+    Legacy use case category for a role name
+    """
+    return _CATEGORY_MATCHER.match(role_name, "productivity")
+
+
+@lru_cache(maxsize=4096)
+def default_role_rate(role_name: str) -> float:
+    """
+    Default hourly rate for a role name, by the first matching function name
+    """
+    return _RATE_MATCHER.match(role_name, DEFAULT_HOURLY_RATE)
+
+
+def function_employees(business_function: Dict[str, Any]) -> int:
+    """
+    Employee count of a business function in the matching output
+    """
+    return business_function.get("totalEmployees", 0)
+
+
+def function_hourly_rate(business_function: Dict[str, Any]) -> float:
+    """
+    Hourly rate for a business function in the matching output: the adjusted
+    rate Claude gave the first target role, else the default rate for that role
+    """
+    target_roles = business_function.get("targetRoles") or []
+    if target_roles:
+        if "adjustedHourlyRate" in target_roles[0]:
+            return target_roles[0]["adjustedHourlyRate"]
+        return default_role_rate(target_roles[0].get("role", "Other"))
+    return DEFAULT_HOURLY_RATE
+
+
+def is_combined_function(business_function: Dict[str, Any]) -> bool:
+    """
+    True for a business function from the combined analysis (employeeCount,
+    avgSalaryUSD and per-use-case employeesUsing) rather than the matching
+    output (totalEmployees and targetRoles)
+    """
+    return "totalEmployees" not in business_function and "targetRoles" not in business_function
+
+
+def combined_annual_salary(business_function: Dict[str, Any]) -> float:
+    """
+    Annual salary the UI uses for a combined-analysis function: the user's
+    adjusted salary, else Claude's average, else the default for the function
+    """
+    name = business_function.get("name")
+    # The page has no "Other" rate; unknown functions get the flat fallback
+    default_rate = DEFAULT_HOURLY_RATES.get(name, 0) if name != "Other" else 0
+    return (business_function.get("adjustedSalaryUSD")
+            or business_function.get("avgSalaryUSD")
+            or default_rate * HOURS_PER_YEAR
+            or COMBINED_DEFAULT_SALARY_USD)
+
+
+def combined_use_case_roi(use_case: Dict[str, Any], annual_salary: float) -> float:
+    """
+    Annual savings of one combined-analysis use case, as the results page
+    computes them: employees using it x hours/week x 52 weeks x time savings
+    x hourly rate. Missing (or zero) hours and savings take the page's
+    defaults.
+    """
+    hours_per_week = use_case.get("hoursPerWeek") or COMBINED_DEFAULT_HOURS_PER_WEEK
+    time_savings_percent = (use_case.get("timeSavingsPercent") or COMBINED_DEFAULT_TIME_SAVINGS_PERCENT) / 100
+    employees = use_case.get("employeesUsing") or 0
+    return employees * hours_per_week * COMBINED_WEEKS_PER_YEAR * time_savings_percent * (annual_salary / HOURS_PER_YEAR)
+
+
+def score_business_function(business_function: Dict[str, Any]):
+    """
+    Set annualROI and quickWinScore on each use case of a matching-output
+    function, sort the use cases by quick win score and fill in
+    totalApplicableHours/totalApplicablePercent where they are missing.
+    """
+    total_employees = function_employees(business_function)
+    hourly_rate = function_hourly_rate(business_function)
+    _score_use_cases(business_function, lambda use_case: _hours_saved(use_case) * hourly_rate * total_employees)
+
+    # Sort use cases by quickWinScore
+    business_function["useCases"] = sorted(
+        business_function["useCases"],
+        key=lambda x: x.get("quickWinScore", 0),
+        reverse=True
+    )
+    _set_totals(business_function, overwrite_totals=False)
+
+
+def score_combined_function(business_function: Dict[str, Any]):
+    """
+    Set annualROI on each use case of a combined-analysis function with the
+    results page's formula, and recompute the totals. The combined output
+    has no complexityWeeks, so quickWinScore is only set on use cases that
+    carry one. Use case order is left as Claude returned it.
+    """
+    annual_salary = combined_annual_salary(business_function)
+    _score_use_cases(business_function, lambda use_case: combined_use_case_roi(use_case, annual_salary),
+                     default_complexity_weeks=None)
+    _set_totals(business_function, overwrite_totals=True)
+
+
+def _hours_saved(use_case: Dict[str, Any]) -> float:
+    """
+    Annual hours one employee saves with a use case (matching-output math)
+    """
+    return use_case.get("hoursPerWeek", 0) * (use_case.get("timeSavingsPercent", 0) / 100) * WORK_WEEKS_PER_YEAR
+
+
+def _score_use_cases(business_function: Dict[str, Any], annual_roi_of,
+                     default_complexity_weeks: Optional[float] = 1):
+    for use_case in business_function["useCases"]:
+        complexity_weeks = use_case.get("complexityWeeks", default_complexity_weeks)
+
+        # Calculate annual ROI for this use case
+        annual_roi = annual_roi_of(use_case)
+        use_case["annualROI"] = int(annual_roi)
+
+        # Calculate quick win score
+        if complexity_weeks is None:
+            use_case.pop("quickWinScore", None)
+        elif complexity_weeks > 0:
+            use_case["quickWinScore"] = int(annual_roi / (complexity_weeks * 1000))  # Divide by 1000 for readability
+        else:
+            use_case["quickWinScore"] = 0
+
+
+def _set_totals(business_function: Dict[str, Any], overwrite_totals: bool):
+    total_applicable_hours = sum(use_case.get("hoursPerWeek", 0) for use_case in business_function["useCases"])
+
+    # Calculate total applicable percentage
+    if overwrite_totals or business_function.get("totalApplicableHours") is None:
+        business_function["totalApplicableHours"] = total_applicable_hours
+    if overwrite_totals or business_function.get("totalApplicablePercent") is None:
+        if total_applicable_hours > 0:
+            business_function["totalApplicablePercent"] = int((total_applicable_hours / HOURS_PER_WEEK) * 100)
+        elif overwrite_totals:
+            business_function.pop("totalApplicablePercent", None)
+
+
+def apply_use_case_roi(matches: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Post-process Claude's matching output in place: ROI figures for the
+    businessFunctions format and role categories for both formats
+    """
+    if "businessFunctions" in matches:
+        for business_function in matches["businessFunctions"]:
+            # Calculate ROI for each use case if not provided
+            if "useCases" in business_function:
+                score_business_function(business_function)
+
+            # Add category mapping for backward compatibility
+            for role_info in business_function.get("targetRoles", []):
+                role_info["category"] = role_category(role_info["role"])
+    elif "useCases" in matches:
+        # Old format - keep for backward compatibility
+        for use_case in matches["useCases"]:
+            for role_info in use_case.get("targetRoles", []):
+                role_info["category"] = role_category(role_info["role"])
+    return matches
+
+
+def _find(items: List[Dict[str, Any]], edit: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    for key in ("id", "name"):
+        if edit.get(key) is not None:
+            for item in items:
+                if item.get(key) == edit[key]:
+                    return item
+    return None
+
+
+def recompute_roi(result: Dict[str, Any], edits: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply numeric edits to a previous analysis result and recompute its ROI
+    figures without calling Claude. Returns a new result.
+
+    edits.businessFunctions is a list of {id or name, employeeCount,
+    adjustedSalaryUSD, avgSalaryUSD, useCases: [{id or name, hoursPerWeek,
+    timeSavingsPercent, employeesUsing}]}; every field is optional. Raises
+    ValueError for edits that don't match the result.
+
+    Combined-analysis functions are scored per use case with the results
+    page's formula (employeesUsing, 52 weeks, adjustedSalaryUSD or
+    avgSalaryUSD / 2000), so the figures match what the user sees.
+    Matching-output functions keep the match_use_cases math; there an
+    adjusted salary replaces the role's hourly rate and employeesUsing, if
+    given, replaces the function's headcount for that use case.
+    """
+    if not isinstance(result, dict) or not isinstance(result.get("businessFunctions"), list):
+        raise ValueError("result must contain a businessFunctions list")
+    updated = copy.deepcopy(result)
+    functions = updated["businessFunctions"]
+    employees_edited = False
+
+    for function_edit in (edits or {}).get("businessFunctions", []) or []:
+        business_function = _find(functions, function_edit)
+        if business_function is None:
+            raise ValueError(f"Unknown business function: {function_edit.get('id') or function_edit.get('name')}")
+
+        if "employeeCount" in function_edit:
+            count = _number(function_edit["employeeCount"], "employeeCount")
+            key = "totalEmployees" if "totalEmployees" in business_function else "employeeCount"
+            business_function[key] = int(count)
+            employees_edited = True
+
+        for field in ("adjustedSalaryUSD", "avgSalaryUSD"):
+            if function_edit.get(field) is not None:
+                business_function[field] = _number(function_edit[field], field)
+
+        for use_case_edit in function_edit.get("useCases", []) or []:
+            use_case = _find(business_function.get("useCases", []), use_case_edit)
+            if use_case is None:
+                raise ValueError(f"Unknown use case in {business_function.get('name')}: "
+                                 f"{use_case_edit.get('id') or use_case_edit.get('name')}")
+            for field in ("hoursPerWeek", "timeSavingsPercent", "employeesUsing"):
+                if field in use_case_edit:
+                    use_case[field] = _number(use_case_edit[field], field)
+
+    for business_function in functions:
+        if "useCases" not in business_function:
+            continue
+        if is_combined_function(business_function):
+            score_combined_function(business_function)
+        else:
+            _rescore_matching_function(business_function)
+
+    company_info = updated.get("companyInfo")
+    if employees_edited and isinstance(company_info, dict) and "totalEmployees" in company_info:
+        company_info["totalEmployees"] = sum(
+            f.get("totalEmployees", f.get("employeeCount")) or 0 for f in functions
+        )
+    return updated
+
+
+def _rescore_matching_function(business_function: Dict[str, Any]):
+    """
+    match_use_cases math with the edits recompute_roi accepts on top
+    """
+    if business_function.get("adjustedSalaryUSD"):
+        hourly_rate = business_function["adjustedSalaryUSD"] / HOURS_PER_YEAR
+    else:
+        hourly_rate = function_hourly_rate(business_function)
+    total_employees = function_employees(business_function) or 0
+
+    def annual_roi_of(use_case: Dict[str, Any]) -> float:
+        employees = use_case["employeesUsing"] if "employeesUsing" in use_case else total_employees
+        return _hours_saved(use_case) * hourly_rate * employees
+
+    _score_use_cases(business_function, annual_roi_of)
+    business_function["useCases"] = sorted(
+        business_function["useCases"], key=lambda x: x.get("quickWinScore", 0), reverse=True
+    )
+    _set_totals(business_function, overwrite_totals=True)
+
+
+def _number(value: Any, field: str) -> float:
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a number")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+    if number < 0:
+        raise ValueError(f"{field} must not be negative")
+    return int(number) if number.is_integer() else number